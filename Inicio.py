@@ -1,17 +1,18 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
 from streamlit_cookies_manager import CookieManager
 from db_management import (
     verify_user, 
-    get_all_equipments, 
-    get_all_customers, 
-    get_all_rentals,
     update_rental_in_db,
     is_authenticated,
     logout,
-    get_user_by_id
+    get_user_by_id,
+    get_rental_alerts
 )
+from alerts import DUE_SOON, OVERDUE
+from profiler import start_page_profile
+from prefetch import load_page_data, warm_user_caches
+from reports import merge_rental_details
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -19,6 +20,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="auto",
 )
+profiler = start_page_profile("Inicio")
 
 # --- Cookie Manager ---
 cookies = CookieManager()
@@ -37,11 +39,14 @@ def login_form():
         if submitted:
             user_found, user_id, db_username = verify_user(username, password)
             if user_found:
+                # Carrega os quadros do usuário enquanto o Dashboard é montado.
+                warm_user_caches(user_id)
                 st.session_state.logged_in = True
                 st.session_state.username = db_username
                 st.session_state.user_id = user_id
-                cookies['user_id'] = user_id
-                cookies.save()
+                if cookies.ready():
+                    cookies['user_id'] = user_id
+                    cookies.save()
                 st.rerun()
             else:
                 st.error("Usuário ou senha incorretos.")
@@ -59,32 +64,28 @@ def main_dashboard():
 
     # --- Load live data from DB ---
     user_id = st.session_state.user_id
-    equipment_df = get_all_equipments(user_id)
-    customers_df = get_all_customers(user_id)
-    rentals_df = get_all_rentals(user_id)
+    with profiler.phase("carregar_dados"):
+        data = load_page_data(user_id, "Inicio")
+        equipment_df, customers_df, rentals_df = data["equipments"], data["customers"], data["rentals"]
 
     # --- KPIs ---
     st.header("Indicadores de Performance")
-    total_items = len(equipment_df)
-    rented_items = len(equipment_df[equipment_df['status'] == 'Alugado'])
-    available_items = len(equipment_df[equipment_df['status'] == 'Disponível'])
-    
-    rentals_due_this_week = 0
-    if not rentals_df.empty:
-        rentals_df['end_date'] = pd.to_datetime(rentals_df['end_date'])
-        today = datetime.now().date()
-        end_of_week = today + timedelta(days=7)
-        rentals_due_this_week = len(rentals_df[
-            (rentals_df['end_date'].dt.date >= today) &
-            (rentals_df['end_date'].dt.date <= end_of_week) &
-            (rentals_df['status'] == 'Ativo')
-        ])
+    with profiler.phase("kpis"):
+        total_items = len(equipment_df)
+        rented_items = len(equipment_df[equipment_df['status'] == 'Alugado'])
+        available_items = len(equipment_df[equipment_df['status'] == 'Disponível'])
+
+        # Pré-calculados pelo job de alertas (alerts.py).
+        rental_alerts = get_rental_alerts(user_id)
+        rentals_due_this_week = int((rental_alerts['kind'] == DUE_SOON).sum())
+        overdue_rentals = int((rental_alerts['kind'] == OVERDUE).sum())
 
-    col1, col2, col3, col4 = st.columns(4)
+    col1, col2, col3, col4, col5 = st.columns(5)
     col1.metric("Equipamentos Totais", total_items)
     col2.metric("Itens Alugados", rented_items)
     col3.metric("Itens Disponíveis", available_items)
     col4.metric("Devoluções Nesta Semana", rentals_due_this_week)
+    col5.metric("Aluguéis Atrasados", overdue_rentals)
 
     st.divider()
 
@@ -95,34 +96,36 @@ def main_dashboard():
     else:
         active_rentals = rentals_df[rentals_df['status'] == 'Ativo']
         if not active_rentals.empty:
-            merged_df = active_rentals.merge(customers_df, on="customer_id").merge(equipment_df, on="equipment_id")
+            with profiler.phase("merge"):
+                merged_df = merge_rental_details(active_rentals, customers_df, equipment_df)
 
-            for index, row in merged_df.iterrows():
-                with st.container(border=True):
-                    c1, c2 = st.columns(2)
-                    with c1:
-                        st.markdown(f"**Equipamento:** {row['name']} ({row['serial_number']})")
-                        st.markdown(f"**Cliente:** {row['full_name']}")
-                        st.markdown(f"**Localização:** {row['address']}")
-                        st.markdown(f"**Valor:** R$ {row['valor']:.2f}")
-                    with c2:
-                        payment_options = ["Em Aberto", "Cartão", "Dinheiro", "Parcelado", "Pix"]
-                        selected_payment = st.selectbox(
-                            "Status Pagamento", options=payment_options, 
-                            index=payment_options.index(row['payment_status']),
-                            key=f"payment_{row['rental_id']}"
-                        )
-                        if selected_payment != row['payment_status']:
-                            update_rental_in_db(row['rental_id'], 'payment_status', selected_payment)
-                            st.rerun()
+            with profiler.phase("renderizacao"):
+                for index, row in merged_df.iterrows():
+                    with st.container(border=True):
+                        c1, c2 = st.columns(2)
+                        with c1:
+                            st.markdown(f"**Equipamento:** {row['name']} ({row['serial_number']})")
+                            st.markdown(f"**Cliente:** {row['full_name']}")
+                            st.markdown(f"**Localização:** {row['address']}")
+                            st.markdown(f"**Valor:** R$ {row['valor']:.2f}")
+                        with c2:
+                            payment_options = ["Em Aberto", "Cartão", "Dinheiro", "Parcelado", "Pix"]
+                            selected_payment = st.selectbox(
+                                "Status Pagamento", options=payment_options, 
+                                index=payment_options.index(row['payment_status']),
+                                key=f"payment_{row['rental_id']}"
+                            )
+                            if selected_payment != row['payment_status']:
+                                update_rental_in_db(user_id, row['rental_id'], 'payment_status', selected_payment)
+                                st.rerun()
 
-                        new_end_date = st.date_input(
-                            "Data de Devolução", value=pd.to_datetime(row['end_date']).date(),
-                            key=f"end_date_{row['rental_id']}"
-                        )
-                        if new_end_date != pd.to_datetime(row['end_date']).date():
-                            update_rental_in_db(row['rental_id'], 'end_date', new_end_date.strftime("%Y-%m-%d %H:%M:%S"))
-                            st.rerun()
+                            new_end_date = st.date_input(
+                                "Data de Devolução", value=pd.to_datetime(row['end_date']).date(),
+                                key=f"end_date_{row['rental_id']}"
+                            )
+                            if new_end_date != pd.to_datetime(row['end_date']).date():
+                                update_rental_in_db(user_id, row['rental_id'], 'end_date', new_end_date.strftime("%Y-%m-%d %H:%M:%S"))
+                                st.rerun()
         else:
             st.info("Nenhum aluguel ativo no momento.")
 
@@ -130,4 +133,5 @@ if __name__ == "__main__":
     if is_authenticated(cookies):
         main_dashboard()
     else:
-        login_form()
\ No newline at end of file
+        login_form()
+    profiler.finish()
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+Alertas de devolução pré-calculados.
+
+Um job agendado calcula, para todos os usuários de uma vez, os aluguéis ativos
+atrasados e os que vencem nos próximos DUE_SOON_DAYS dias, e grava o resultado em
+rental_alerts (migração 0007). O painel e a página de contratos apenas leem os
+alertas do usuário. As escritas em aluguéis recalculam os alertas dos aluguéis
+alterados, e se o job não rodou no dia o acesso de cada usuário calcula os dele.
+
+O mesmo job atualiza o status dos equipamentos cujas reservas começam no dia
+(sync_equipment_status): o status 'Alugado' segue os períodos dos aluguéis.
+
+Uso (cron, uma vez por dia, ex.: 0 6 * * *):
+    python alerts.py run [--digest-dir DIR]
+
+A janela de vencimento é CONCRENTAL_ALERT_DAYS (padrão 7 dias), a mesma do painel.
+
+O resumo diário é gravado em DIR (CONCRENTAL_ALERTS_DIR, padrão alerts/): um
+arquivo resumo_AAAA-MM-DD.txt e uma mensagem por usuário na caixa local
+alerts.mbox, no lugar do envio de e-mail.
+"""
+import argparse
+import mailbox
+import os
+import sys
+from datetime import date, timedelta
+from email.message import EmailMessage
+
+import pandas as pd
+
+from repository import create_repository
+
+OVERDUE = "Atrasado"
+DUE_SOON = "A Vencer"
+DUE_SOON_DAYS = int(os.environ.get("CONCRENTAL_ALERT_DAYS", 7))
+DIGEST_DIR = os.environ.get("CONCRENTAL_ALERTS_DIR", "alerts")
+
+
+def alert_window(today=None, days=DUE_SOON_DAYS):
+    """(data de referência, limite exclusivo): vence até hoje + `days`, inclusive."""
+    today = today or date.today()
+    return today, today + timedelta(days=days + 1)
+
+
+def refresh_alerts(repo, rental_ids=None, user_id=None, today=None, days=DUE_SOON_DAYS):
+    """Recalcula os alertas de todos os aluguéis (ou do usuário / de `rental_ids`); retorna a quantidade."""
+    reference_date, due_before = alert_window(today, days)
+    return repo.refresh_rental_alerts(reference_date, due_before, rental_ids, user_id)
+
+
+def sync_equipment_status(repo, user_id=None, today=None):
+    """Status dos equipamentos conforme os aluguéis iniciados até hoje; retorna quantos mudaram."""
+    return repo.sync_equipment_status(today or date.today(), user_id)
+
+
+def alerts_are_current(repo, today=None):
+    return repo.last_alert_run_date() == (today or date.today())
+
+
+def _format_user_digest(rows):
+    lines = []
+    for kind, title in ((OVERDUE, "Aluguéis atrasados"), (DUE_SOON, f"Devoluções nos próximos {DUE_SOON_DAYS} dias")):
+        selected = rows[rows["kind"] == kind]
+        if selected.empty:
+            continue
+        lines.append(f"{title} ({len(selected)}):")
+        for row in selected.itertuples(index=False):
+            end_date = pd.to_datetime(row.end_date).strftime("%d/%m/%Y")
+            lines.append(f"  {end_date}  {row.rental_id}  {row.name} - {row.full_name} ({row.phone_number or 'sem telefone'})")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def write_digest(repo, directory=DIGEST_DIR, today=None):
+    """Grava o resumo do dia e as mensagens da caixa local; retorna o caminho do resumo."""
+    today = today or date.today()
+    digest = repo.list_alert_digest()
+    os.makedirs(directory, exist_ok=True)
+    sections = []
+    box = mailbox.mbox(os.path.join(directory, "alerts.mbox"))
+    box.lock()
+    try:
+        for username, rows in digest.groupby("username", sort=True):
+            body = _format_user_digest(rows)
+            sections.append(f"== {username} ==\n{body}")
+            message = EmailMessage()
+            message["From"] = "concrental@localhost"
+            message["To"] = f"{username}@localhost"
+            message["Subject"] = f"ConcRental - alertas de devolução de {today.strftime('%d/%m/%Y')}"
+            message.set_content(body)
+            box.add(message)
+        box.flush()
+    finally:
+        box.unlock()
+        box.close()
+    path = os.path.join(directory, f"resumo_{today.isoformat()}.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(sections) if sections else "Nenhum alerta de devolução.\n")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Alertas de devolução do ConcRental.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Atualiza o status dos equipamentos, recalcula os alertas de todos os usuários e grava o resumo do dia.")
+    run_parser.add_argument("--digest-dir", default=DIGEST_DIR, help="Diretório do resumo e da caixa local.")
+    args = parser.parse_args(argv)
+
+    repo = create_repository()
+    try:
+        changed = sync_equipment_status(repo)
+        count = refresh_alerts(repo)
+        path = write_digest(repo, args.digest_dir)
+        print(f"{changed} equipamentos com status atualizado; {count} alertas calculados; resumo em {path}")
+    finally:
+        repo.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Utilização dos equipamentos em uma janela de datas.
+
+Para cada equipamento: dias alugado, dias disponíveis na janela (a partir da data
+de aquisição), dias ociosos, taxa de utilização e receita no período. Os cálculos
+são vetorizados com NumPy sobre os intervalos dos aluguéis, em dias inteiros e com
+períodos fechados (o dia da devolução conta como alugado): cada aluguel é recortado
+pela janela e somado ao seu equipamento com np.bincount. A receita de um aluguel é
+dividida igualmente pelos seus dias, e a janela recebe a parte dos dias que cobre.
+"""
+import numpy as np
+import pandas as pd
+
+UTILIZATION_COLUMNS = ["equipment_id", "name", "category", "rentals", "days_rented", "days_available",
+                       "idle_days", "utilization", "revenue", "revenue_per_day"]
+
+
+def _days(values):
+    return pd.to_datetime(values).to_numpy("datetime64[D]")
+
+
+def equipment_utilization(equipment_df, rentals_df, window_start, window_end):
+    """
+    Uma linha por equipamento de `equipment_df` (colunas UTILIZATION_COLUMNS),
+    considerando os aluguéis de `rentals_df` entre `window_start` e `window_end`,
+    inclusive. Aluguéis de equipamentos fora de `equipment_df` são ignorados.
+    """
+    window_first = np.datetime64(pd.Timestamp(window_start).date(), "D")
+    window_last = np.datetime64(pd.Timestamp(window_end).date(), "D")
+    window_days = max(int((window_last - window_first).astype(int)) + 1, 0)
+
+    equipment_ids = equipment_df["equipment_id"].to_numpy()
+    positions = pd.Index(equipment_ids).get_indexer(rentals_df["equipment_id"])
+    known = positions >= 0
+    positions = positions[known]
+    starts = _days(rentals_df["start_date"])[known]
+    ends = _days(rentals_df["end_date"])[known]
+    valor = rentals_df["valor"].to_numpy(dtype="float64")[known]
+
+    # Dias de cada aluguel dentro da janela (0 se não a cruza).
+    overlap = (np.minimum(ends, window_last) - np.maximum(starts, window_first)).astype(int) + 1
+    overlap = np.clip(overlap, 0, None)
+    duration = np.maximum((ends - starts).astype(int) + 1, 1)
+    size = len(equipment_ids)
+    days_rented = np.bincount(positions, weights=overlap, minlength=size)
+    revenue = np.bincount(positions, weights=valor * overlap / duration, minlength=size)
+    rentals = np.bincount(positions, weights=(overlap > 0).astype("float64"), minlength=size)
+
+    # Equipamentos adquiridos durante a janela só contam a partir da aquisição.
+    if "acquisition_date" in equipment_df:
+        acquired = _days(equipment_df["acquisition_date"])
+        first_day = np.where(np.isnat(acquired), window_first, np.maximum(acquired, window_first))
+    else:
+        first_day = np.full(size, window_first)
+    days_available = np.clip((window_last - first_day).astype(int) + 1, 0, window_days)
+    # Aluguéis concluídos antes do fim previsto podem se sobrepor a um novo aluguel.
+    days_rented = np.minimum(days_rented, days_available)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        utilization = np.where(days_available > 0, days_rented / days_available, 0.0)
+        revenue_per_day = np.where(days_available > 0, revenue / days_available, 0.0)
+    return pd.DataFrame({
+        "equipment_id": equipment_ids,
+        "name": equipment_df["name"].to_numpy(),
+        "category": equipment_df["category"].astype(object).to_numpy(),
+        "rentals": rentals.astype("int64"),
+        "days_rented": days_rented.astype("int64"),
+        "days_available": days_available.astype("int64"),
+        "idle_days": (days_available - days_rented).astype("int64"),
+        "utilization": utilization,
+        "revenue": revenue,
+        "revenue_per_day": revenue_per_day,
+    }, columns=UTILIZATION_COLUMNS)
+
+
+def category_utilization(utilization_df):
+    """
+    Agrega a utilização por categoria: categorias com utilização alta são candidatas
+    a novas compras; as com muitos dias ociosos, a venda ou remanejamento.
+    """
+    grouped = utilization_df.groupby("category", dropna=False).agg(
+        equipments=("equipment_id", "size"),
+        days_rented=("days_rented", "sum"),
+        days_available=("days_available", "sum"),
+        idle_days=("idle_days", "sum"),
+        revenue=("revenue", "sum"),
+    )
+    available = grouped["days_available"].where(grouped["days_available"] > 0)
+    grouped["utilization"] = (grouped["days_rented"] / available).fillna(0.0)
+    grouped["revenue_per_day"] = (grouped["revenue"] / available).fillna(0.0)
+    return grouped.sort_values("utilization", ascending=False).reset_index()
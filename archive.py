@@ -0,0 +1,64 @@
+"""
+Arquivo dos aluguéis antigos.
+
+Um job agendado move para rentals_archive (migração 0011) os aluguéis concluídos
+e pagos cuja devolução foi há mais de ARCHIVE_AFTER_DAYS dias. Os carregadores do
+app (get_all_rentals e os quadros derivados) leem apenas rentals; o arquivo é lido
+quando o usuário pede o histórico arquivado em Contratos, quando o Financeiro
+inclui o arquivo nos totais e na exportação dos lançamentos. Aluguéis em aberto
+nunca são arquivados, para o A Receber continuar completo sem o arquivo.
+
+Os IDs arquivados continuam reservados, e as exclusões em rentals chegam aos
+caches do app pelas notificações de escrita, como as demais.
+
+Uso (cron, ex.: uma vez por semana):
+    python archive.py run [--days N] [--user USUARIO]
+
+A idade mínima é CONCRENTAL_ARCHIVE_AFTER_DAYS (padrão 365 dias).
+"""
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+
+from repository import create_repository
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get("CONCRENTAL_ARCHIVE_AFTER_DAYS", 365))
+
+
+def archive_cutoff(today=None, days=ARCHIVE_AFTER_DAYS):
+    """Data limite (exclusiva): arquiva os aluguéis devolvidos antes dela."""
+    return (today or date.today()) - timedelta(days=days)
+
+
+def archive_completed(repo, user_id=None, today=None, days=ARCHIVE_AFTER_DAYS):
+    """Arquiva os aluguéis concluídos antigos (de todos os usuários, ou de `user_id`); retorna a quantidade."""
+    return repo.archive_rentals(archive_cutoff(today, days), user_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Arquivo dos aluguéis concluídos do ConcRental.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Arquiva os aluguéis concluídos e pagos antigos.")
+    run_parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS,
+                            help=f"Idade mínima da devolução, em dias (padrão {ARCHIVE_AFTER_DAYS}).")
+    run_parser.add_argument("--user", default=None, help="Arquiva apenas os aluguéis deste usuário.")
+    args = parser.parse_args(argv)
+
+    repo = create_repository()
+    try:
+        user_id = None
+        if args.user:
+            user_id = repo.get_user_id(args.user)
+            if user_id is None:
+                print(f"Usuário '{args.user}' não encontrado.", file=sys.stderr)
+                return 1
+        count = archive_completed(repo, user_id, days=args.days)
+        print(f"{count} aluguéis arquivados (devolvidos antes de {archive_cutoff(days=args.days):%d/%m/%Y}).")
+    finally:
+        repo.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Disponibilidade de equipamentos por período.
+
+O banco garante que um equipamento não tenha dois aluguéis em aberto com períodos
+sobrepostos (restrição de exclusão no Postgres, gatilho no SQLite; migração 0006).
+Para a interface, `AvailabilityIndex` indexa os períodos do quadro de aluguéis em
+memória: por equipamento, os inícios ordenados e o máximo acumulado dos fins.
+Verificar um equipamento custa uma busca binária, O(log n).
+
+Os períodos são fechados: um aluguel que termina no dia D ocupa o equipamento
+nesse dia, como o tsrange '[]' do banco.
+"""
+import numpy as np
+import pandas as pd
+
+# Aluguéis concluídos (devolvidos) não ocupam o equipamento.
+CLOSED_STATUS = "Concluído"
+
+
+def _as_datetime64(value):
+    return pd.Timestamp(value).to_datetime64()
+
+
+class AvailabilityIndex:
+    def __init__(self, rentals_df):
+        booked = rentals_df.loc[rentals_df["status"] != CLOSED_STATUS, ["equipment_id", "start_date", "end_date"]]
+        booked = booked.sort_values(["equipment_id", "start_date"], kind="stable")
+        self._periods = {}
+        if booked.empty:
+            return
+        ids = booked["equipment_id"].to_numpy()
+        starts = booked["start_date"].to_numpy("datetime64[ns]")
+        max_ends = booked.groupby("equipment_id", sort=False)["end_date"].cummax().to_numpy("datetime64[ns]")
+        boundaries = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+        for first, group_starts, group_ends in zip(np.r_[0, boundaries], np.split(starts, boundaries), np.split(max_ends, boundaries)):
+            self._periods[ids[first]] = (group_starts, group_ends)
+
+    def is_free(self, equipment_id, start, end):
+        """True se o equipamento não tem aluguel em aberto que cruze [start, end]."""
+        periods = self._periods.get(equipment_id)
+        if periods is None:
+            return True
+        starts, max_ends = periods
+        # Último aluguel que começa até `end`; algum anterior cruza o período
+        # somente se o maior fim até ele alcançar `start`.
+        i = np.searchsorted(starts, _as_datetime64(end), side="right") - 1
+        return i < 0 or max_ends[i] < _as_datetime64(start)
+
+    def free_equipment(self, equipment_df, start, end):
+        """Linhas de `equipment_df` livres no período (e fora de manutenção)."""
+        mask = [self.is_free(equipment_id, start, end) for equipment_id in equipment_df["equipment_id"]]
+        return equipment_df[np.array(mask, dtype=bool) & (equipment_df["status"] != "Em Manutenção").to_numpy()]
@@ -0,0 +1,120 @@
+"""
+Tempo de import (partida a frio) de cada página.
+
+Cada página roda em um interpretador novo: primeiro o Streamlit e o pandas (base
+comum a todas as páginas, fora do orçamento), depois apenas os imports do topo do
+script, lidos com ast, sem executar a página. O tempo desses imports é comparado
+com o orçamento, e nenhuma das dependências de LAZY_MODULES pode ser carregada
+por eles: geocodificação, rotas, PDFs, uploads e planilhas importam as suas
+bibliotecas só no primeiro uso.
+
+Com --report, o relatório do `python -X importtime` lista os módulos mais lentos
+carregados pelos imports da página.
+
+Uso:
+    python -m benchmarks.import_time [--budget 150] [--repeat 5] [--report] [--output arquivo.json]
+
+Termina com código 1 se alguma página estourar o orçamento ou carregar um módulo
+de LAZY_MODULES (para rodar no CI).
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["Inicio.py"] + sorted(os.path.relpath(path, ROOT_DIR)
+                               for path in glob.glob(os.path.join(ROOT_DIR, "pages", "*.py")))
+BUDGET_MS = 150
+LAZY_MODULES = ("bcrypt", "filestack", "fpdf", "geopy", "openpyxl", "requests", "validate_docbr")
+REPORT_TOP = 15
+
+_PROBE = """
+import json, sys, time
+import streamlit, pandas
+baseline = set(sys.modules)
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted(set(sys.modules) - baseline)}}))
+"""
+
+
+def page_imports(page):
+    """Comandos import do nível superior do script da página, como código-fonte."""
+    with open(os.path.join(ROOT_DIR, page), encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=page)
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def _probe(page, importtime=False):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", _PROBE.format(imports=page_imports(page))]
+    completed = subprocess.run(command, cwd=ROOT_DIR, capture_output=True, text=True, env={**os.environ, "PYTHONWARNINGS": "ignore"})
+    if completed.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {page}:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+
+def _slowest(stderr, modules):
+    """Módulos de `modules` com maior tempo próprio no relatório do -X importtime."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if name.strip() in modules:
+            rows.append((int(self_us) / 1000, int(cumulative_us) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:REPORT_TOP]
+
+
+def measure(page, repeat=5, report=False):
+    samples = [_probe(page)[0] for _ in range(repeat)]
+    modules = set(samples[0]["modules"])
+    result = {
+        "page": page,
+        "median_ms": statistics.median(s["ms"] for s in samples),
+        "min_ms": min(s["ms"] for s in samples),
+        "modules": len(modules),
+        "lazy_loaded": sorted(m for m in LAZY_MODULES if m in modules),
+    }
+    if report:
+        result["slowest"] = _slowest(_probe(page, importtime=True)[1], modules)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo de import das páginas do ConcRental.")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="Orçamento por página, em ms.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--report", action="store_true", help="Mostra os módulos mais lentos (-X importtime).")
+    parser.add_argument("--output", default=None, help="Salva os resultados em JSON.")
+    args = parser.parse_args(argv)
+
+    results = []
+    failures = 0
+    for page in PAGES:
+        result = measure(page, args.repeat, args.report)
+        flag = ""
+        if result["median_ms"] > args.budget:
+            flag += f"  <-- ACIMA DO ORÇAMENTO ({args.budget:.0f} ms)"
+        if result["lazy_loaded"]:
+            flag += f"  <-- CARREGA {', '.join(result['lazy_loaded'])}"
+        failures += bool(flag)
+        print(f"{page:<28} mediana {result['median_ms']:8.2f} ms  mín {result['min_ms']:8.2f} ms  "
+              f"{result['modules']:4d} módulos{flag}")
+        for self_ms, cumulative_ms, name in result.get("slowest", []):
+            print(f"    {self_ms:8.2f} ms próprio  {cumulative_ms:8.2f} ms total  {name}")
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"budget_ms": args.budget, "results": results}, f, indent=2, ensure_ascii=False)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""
+Teste de carga com várias sessões simultâneas.
+
+Usa o AppTest headless do Streamlit para simular N sessões concorrentes no mesmo
+processo (compartilhando caches e conexões, como num servidor real) executando
+fluxos realistas contra o banco em DATABASE_URL (ver benchmarks/synthetic_data.py):
+
+    login        login pelo formulário do Inicio.py
+    contratos    abrir a página de Contratos
+    pagamento    alterar o status de pagamento de um aluguel ativo no Dashboard
+    inventario   salvar o editor do Inventário (o AppTest não edita células do
+                 st.data_editor, então o salvamento percorre a comparação sem alterações)
+
+Para cada fluxo são reportados os percentis de latência dos reruns, as consultas
+registradas pela instrumentação e o uso de conexões do Postgres (pg_stat_activity).
+
+Uso:
+    python -m benchmarks.load_test --sessions 20 --iterations 5 [--flows login,contratos]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.synthetic_data import BENCHMARK_PASSWORD
+from repository import open_postgres_connection
+from instrumentation import get_query_records
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_TIMEOUT = 120
+
+
+def _app(script, user=None):
+    at = AppTest.from_file(os.path.join(ROOT_DIR, script), default_timeout=APP_TIMEOUT)
+    if user is not None:
+        at.session_state["logged_in"] = True
+        at.session_state["user_id"] = user["id"]
+        at.session_state["username"] = user["username"]
+    return at
+
+
+def _timed_run(element_or_app, latencies):
+    start = time.perf_counter()
+    at = element_or_app.run()
+    latencies.append((time.perf_counter() - start) * 1000)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return at
+
+
+def flow_login(user, latencies):
+    at = _timed_run(_app("Inicio.py"), latencies)
+    at.text_input[0].input(user["username"])
+    at.text_input[1].input(BENCHMARK_PASSWORD)
+    at = _timed_run(at.button[0].click(), latencies)
+    if not at.session_state["logged_in"]:
+        raise RuntimeError(f"Login falhou para {user['username']}")
+
+
+def flow_contratos(user, latencies):
+    _timed_run(_app("pages/3_Contratos.py", user), latencies)
+
+
+def flow_pagamento(user, latencies):
+    at = _timed_run(_app("Inicio.py", user), latencies)
+    selects = [s for s in at.selectbox if s.key and s.key.startswith("payment_")]
+    if not selects:
+        return
+    select = selects[0]
+    new_value = next(option for option in select.options if option != select.value)
+    _timed_run(select.select(new_value), latencies)
+
+
+def flow_inventario(user, latencies):
+    at = _timed_run(_app("pages/1_Inventario.py", user), latencies)
+    save_buttons = [b for b in at.button if b.label == "Salvar Alterações no Inventário"]
+    if save_buttons:
+        _timed_run(save_buttons[0].click(), latencies)
+
+
+FLOWS = {
+    "login": flow_login,
+    "contratos": flow_contratos,
+    "pagamento": flow_pagamento,
+    "inventario": flow_inventario,
+}
+
+
+class ConnectionMonitor(threading.Thread):
+    """Amostra pg_stat_activity periodicamente com uma conexão própria."""
+
+    def __init__(self, interval=0.1):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        conn = open_postgres_connection()
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                while not self._stop_event.is_set():
+                    cursor.execute("""
+                        SELECT COUNT(*), COUNT(*) FILTER (WHERE state = 'active')
+                        FROM pg_stat_activity
+                        WHERE datname = current_database() AND pid <> pg_backend_pid()
+                    """)
+                    self.samples.append(cursor.fetchone())
+                    self._stop_event.wait(self.interval)
+        finally:
+            conn.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _load_users(limit):
+    conn = open_postgres_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT id, username FROM users ORDER BY id LIMIT %s", (limit,))
+            return [{"id": row[0], "username": row[1]} for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def run_flow(name, users, sessions, iterations):
+    """Executa o fluxo em `sessions` sessões simultâneas e retorna o resumo."""
+    flow = FLOWS[name]
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def session(index):
+        user = users[index % len(users)]
+        session_latencies = []
+        for _ in range(iterations):
+            try:
+                flow(user, session_latencies)
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+        with lock:
+            latencies.extend(session_latencies)
+
+    monitor = ConnectionMonitor()
+    monitor.start()
+    started_at = time.time()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        list(executor.map(session, range(sessions)))
+    elapsed = time.perf_counter() - start
+    monitor.stop()
+
+    queries = [q for q in get_query_records() if q["timestamp"] >= started_at]
+    connections = [sample[0] for sample in monitor.samples] or [0]
+    active = [sample[1] for sample in monitor.samples] or [0]
+    return {
+        "flow": name,
+        "sessions": sessions,
+        "iterations": iterations,
+        "reruns": len(latencies),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "elapsed_s": elapsed,
+        "p50_ms": _percentile(latencies, 0.50) if latencies else None,
+        "p90_ms": _percentile(latencies, 0.90) if latencies else None,
+        "p95_ms": _percentile(latencies, 0.95) if latencies else None,
+        "p99_ms": _percentile(latencies, 0.99) if latencies else None,
+        "max_ms": max(latencies) if latencies else None,
+        "mean_ms": statistics.mean(latencies) if latencies else None,
+        "queries": len(queries),
+        "query_time_ms": sum(q["duration_ms"] for q in queries),
+        "db_connections_max": max(connections),
+        "db_connections_mean": statistics.mean(connections),
+        "db_active_max": max(active),
+    }
+
+
+def _print_summary(result):
+    if result["reruns"] == 0:
+        print(f"{result['flow']:<11} nenhum rerun concluído ({result['errors']} erros)")
+        return
+    print(f"{result['flow']:<11} reruns {result['reruns']:5d}  p50 {result['p50_ms']:8.1f}  p95 {result['p95_ms']:8.1f}  "
+          f"p99 {result['p99_ms']:8.1f}  máx {result['max_ms']:8.1f} ms | consultas {result['queries']:6d} "
+          f"({result['query_time_ms']:.0f} ms) | conexões máx {result['db_connections_max']} "
+          f"(ativas {result['db_active_max']}) | erros {result['errors']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga multi-sessão com AppTest.")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--flows", default=",".join(FLOWS), help="Fluxos separados por vírgula.")
+    parser.add_argument("--output", default=None, help="Salva o resumo em JSON.")
+    args = parser.parse_args(argv)
+
+    if not os.environ.get("DATABASE_URL"):
+        print("Defina DATABASE_URL apontando para o Postgres local de benchmark.", file=sys.stderr)
+        return 1
+
+    users = _load_users(args.sessions)
+    if not users:
+        print("Nenhum usuário no banco. Rode antes: python -m benchmarks.synthetic_data --reset", file=sys.stderr)
+        return 1
+
+    results = []
+    for name in args.flows.split(","):
+        result = run_flow(name.strip(), users, args.sessions, args.iterations)
+        _print_summary(result)
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,615 @@
+"""
+Benchmarks da camada de dados.
+
+Executa cenários cronometrados para as funções de leitura e escrita de
+db_management.py usadas pelas páginas e para o caminho de dados de cada página, usando o banco apontado por DATABASE_URL
+(carregado com benchmarks/synthetic_data.py). Os resultados são salvos em JSON
+para comparação entre commits.
+
+Uso:
+    python -m benchmarks.run_benchmarks run [--repeat 5] [--only get_all] [--output arquivo.json]
+    python -m benchmarks.run_benchmarks compare base.json novo.json [--threshold 0.10]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+# Sem workers em segundo plano: os cenários de jobs executam a fila no tempo medido.
+os.environ.setdefault("CONCRENTAL_JOB_WORKERS", "0")
+
+import db_management as db
+import jobs
+import prefetch
+from analytics import equipment_utilization
+from archive import archive_completed
+from benchmarks.synthetic_data import BENCHMARK_PASSWORD, cpf_from_number
+from bulk_import import validate
+from documents import validate_documents
+from duplicates import find_duplicates
+from exports import export_entries
+from reports import PAGE_COLUMNS, financial_summary, merge_rental_details
+from repository import RENTAL_COLUMNS
+from revenue import daily_revenue, revenue_series
+from schemas import editable_frame
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+# Cadastros criados e removidos pelos cenários de escrita; não colidem com os dados
+# sintéticos (SN-00000001, cpf_from_number(1), ...).
+BENCHMARK_SERIAL = "BENCH-SN-0001"
+BENCHMARK_DOCUMENT = cpf_from_number(999_999_999)
+BENCHMARK_ADDRESS = "Benchmark"
+
+SCENARIOS = []
+
+
+def scenario(name, setup=None, teardown=None):
+    """Registra um cenário. `setup`/`teardown` rodam fora do tempo medido."""
+    def decorator(func):
+        SCENARIOS.append({"name": name, "run": func, "setup": setup, "teardown": teardown})
+        return func
+    return decorator
+
+
+def _clear_caches():
+    db.get_all_equipments.clear()
+    db.get_all_customers.clear()
+    db.get_all_rentals.clear()
+
+
+def _pick_tenants(conn):
+    """Retorna o maior inquilino (em aluguéis) e um inquilino mediano."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT user_id, COUNT(*) FROM rentals GROUP BY user_id ORDER BY COUNT(*) DESC")
+        rows = cursor.fetchall()
+    if not rows:
+        raise RuntimeError("Banco sem aluguéis. Rode antes: python -m benchmarks.synthetic_data --reset")
+    return {"large": rows[0][0], "median": rows[len(rows) // 2][0]}
+
+
+# --- Funções de leitura (cache frio e quente) ---
+def _register_loader_scenarios():
+    for size in ("large", "median"):
+        for loader in ("get_all_equipments", "get_all_customers", "get_all_rentals"):
+            def run_loader(ctx, loader=loader, size=size):
+                return getattr(db, loader)(ctx["tenants"][size])
+            scenario(f"{loader}[{size}] frio", setup=lambda ctx: _clear_caches())(run_loader)
+            scenario(f"{loader}[{size}] quente", setup=run_loader)(run_loader)
+
+
+_register_loader_scenarios()
+
+
+def _pick_username(ctx):
+    ctx["username"] = db.get_user_by_id(ctx["tenants"]["large"])
+
+
+@scenario("verify_user (bcrypt)", setup=_pick_username)
+def _verify_user(ctx):
+    return db.verify_user(ctx["username"], BENCHMARK_PASSWORD)
+
+
+@scenario("get_user_by_id")
+def _get_user_by_id(ctx):
+    return db.get_user_by_id(ctx["tenants"]["large"])
+
+
+@scenario("get_user_settings")
+def _get_user_settings(ctx):
+    return db.get_user_settings(ctx["tenants"]["large"])
+
+
+@scenario("get_user_addresses")
+def _get_user_addresses(ctx):
+    return db.get_user_addresses(ctx["tenants"]["large"])
+
+
+# --- Funções de escrita ---
+def _prepare_new_rental(ctx):
+    equipments = db.get_all_equipments(ctx["tenants"]["large"])
+    customers = db.get_all_customers(ctx["tenants"]["large"])
+    ctx["new_rental"] = {
+        "customer_id": customers["customer_id"].iloc[0],
+        "equipment_ids": equipments[equipments["status"] == "Disponível"]["equipment_id"].head(3).tolist(),
+    }
+
+
+def _remove_new_rental(ctx):
+    repo = db.get_repository()
+    with repo.transaction() as cursor:
+        repo.execute(cursor, "DELETE FROM rentals WHERE start_date = %s AND equipment_id = ANY(%s)",
+                     (ctx["benchmark_date"], ctx["new_rental"]["equipment_ids"]))
+        repo.execute(cursor, "UPDATE equipments SET status = 'Disponível', times_rented = times_rented - 1 WHERE equipment_id = ANY(%s)",
+                     (ctx["new_rental"]["equipment_ids"],))
+
+
+@scenario("add_rentals_to_db (3 itens)", setup=_prepare_new_rental, teardown=_remove_new_rental)
+def _add_rentals(ctx):
+    rental = ctx["new_rental"]
+    return db.add_rentals_to_db(ctx["tenants"]["large"], rental["customer_id"], rental["equipment_ids"],
+                                ctx["benchmark_date"], ctx["benchmark_date"], 100.0)
+
+
+def _insert_new_rentals(ctx):
+    _prepare_new_rental(ctx)
+    rental = ctx["new_rental"]
+    ctx["new_rental_ids"] = db.get_repository().add_rentals(
+        ctx["tenants"]["large"], rental["customer_id"], rental["equipment_ids"], ctx["benchmark_date"],
+        ctx["benchmark_date"], 100.0)
+
+
+@scenario("complete_rental_in_db", setup=_insert_new_rentals, teardown=_remove_new_rental)
+def _complete_rental(ctx):
+    return db.complete_rental_in_db(ctx["tenants"]["large"], ctx["new_rental_ids"][0],
+                                    ctx["new_rental"]["equipment_ids"][0])
+
+
+def _insert_benchmark_equipment(ctx):
+    ctx["equipment_id"] = db.get_repository().add_equipment(ctx["tenants"]["large"], "Betoneira 400L", "Betoneiras",
+                                                            BENCHMARK_SERIAL, ctx["benchmark_date"], "Quitado")
+
+
+def _remove_benchmark_equipment(ctx):
+    repo = db.get_repository()
+    with repo.transaction() as cursor:
+        repo.execute(cursor, "DELETE FROM equipments WHERE user_id = %s AND serial_number = %s",
+                     (ctx["tenants"]["large"], BENCHMARK_SERIAL))
+
+
+@scenario("add_equipment_to_db", teardown=_remove_benchmark_equipment)
+def _add_equipment(ctx):
+    return db.add_equipment_to_db(ctx["tenants"]["large"], "Betoneira 400L", "Betoneiras", BENCHMARK_SERIAL,
+                                  ctx["benchmark_date"], "Quitado")
+
+
+@scenario("update_equipment_in_db (category)", setup=_insert_benchmark_equipment, teardown=_remove_benchmark_equipment)
+def _update_equipment(ctx):
+    return db.update_equipment_in_db(ctx["tenants"]["large"], ctx["equipment_id"], {"category": "Mistura"})
+
+
+@scenario("delete_equipment_from_db", setup=_insert_benchmark_equipment)
+def _delete_equipment(ctx):
+    return db.delete_equipment_from_db(ctx["tenants"]["large"], ctx["equipment_id"])
+
+
+def _insert_benchmark_customer(ctx):
+    ctx["customer_id"] = db.get_repository().add_customer(ctx["tenants"]["large"], "Cliente Benchmark", None,
+                                                          "(41) 90000-0000", None, "Rua XV de Novembro, 1",
+                                                          "CPF", BENCHMARK_DOCUMENT)
+
+
+def _remove_benchmark_customer(ctx):
+    repo = db.get_repository()
+    with repo.transaction() as cursor:
+        repo.execute(cursor, "DELETE FROM customers WHERE user_id = %s AND document_number = %s",
+                     (ctx["tenants"]["large"], BENCHMARK_DOCUMENT))
+
+
+@scenario("add_customer_to_db", teardown=_remove_benchmark_customer)
+def _add_customer(ctx):
+    return db.add_customer_to_db(ctx["tenants"]["large"], "Cliente Benchmark", None, "(41) 90000-0000", None,
+                                 "Rua XV de Novembro, 1", "CPF", BENCHMARK_DOCUMENT)
+
+
+@scenario("update_customer_in_db (full_name)", setup=_insert_benchmark_customer, teardown=_remove_benchmark_customer)
+def _update_customer(ctx):
+    return db.update_customer_in_db(ctx["tenants"]["large"], ctx["customer_id"], {"full_name": "Cliente Benchmark 2"})
+
+
+@scenario("delete_customer_from_db", setup=_insert_benchmark_customer)
+def _delete_customer(ctx):
+    return db.delete_customer_from_db(ctx["tenants"]["large"], ctx["customer_id"])
+
+
+def _pick_user_settings(ctx):
+    ctx["user_settings"] = db.get_user_settings(ctx["tenants"]["large"])
+
+
+@scenario("update_user_settings", setup=_pick_user_settings)
+def _update_user_settings(ctx):
+    settings = ctx["user_settings"]
+    return db.update_user_settings(ctx["tenants"]["large"], settings["fuel_consumption"], settings["fuel_cost"])
+
+
+def _remove_address_job(ctx):
+    repo = db.get_repository()
+    with repo.transaction() as cursor:
+        repo.execute(cursor, "DELETE FROM jobs WHERE id = %s", (ctx["address_job"][1],))
+
+
+@scenario("add_user_address (agenda a geocodificação)", teardown=_remove_address_job)
+def _add_user_address(ctx):
+    # A geocodificação roda no worker (desativado aqui); mede-se o agendamento.
+    ctx["address_job"] = db.add_user_address(ctx["tenants"]["large"], BENCHMARK_ADDRESS, "Rua XV de Novembro, 1")
+    return ctx["address_job"]
+
+
+def _insert_benchmark_address(ctx):
+    repo = db.get_repository()
+    repo.add_user_address(ctx["tenants"]["large"], BENCHMARK_ADDRESS, "Rua XV de Novembro, 1", -25.43, -49.27)
+    addresses = repo.list_user_addresses(ctx["tenants"]["large"])
+    ctx["address_id"] = int(addresses.loc[addresses["address_name"] == BENCHMARK_ADDRESS, "id"].iloc[-1])
+
+
+@scenario("delete_user_address", setup=_insert_benchmark_address)
+def _delete_user_address(ctx):
+    return db.delete_user_address(ctx["tenants"]["large"], ctx["address_id"])
+
+
+def _pick_rental(ctx):
+    rentals = db.get_all_rentals(ctx["tenants"]["large"])
+    ctx["rental_id"] = rentals["rental_id"].iloc[0]
+    ctx["payment_status"] = rentals["payment_status"].iloc[0]
+
+
+@scenario("update_rental_in_db (payment_status)", setup=_pick_rental)
+def _update_rental(ctx):
+    return db.update_rental_in_db(ctx["tenants"]["large"], ctx["rental_id"], "payment_status", ctx["payment_status"])
+
+
+def _change_one_rental(ctx):
+    _pick_rental(ctx)
+    _update_rental(ctx)
+
+
+@scenario("get_all_rentals[large] delta (1 alteração)", setup=_change_one_rental)
+def _rentals_delta(ctx):
+    return db.get_all_rentals(ctx["tenants"]["large"])
+
+
+# --- Caminhos de dados das páginas (carregamento com cache frio + processamento) ---
+def _load_page_data(ctx, page):
+    """(aluguéis, clientes, equipamentos) com as colunas da página; None para as tabelas que ela não lê."""
+    _clear_caches()
+    user_id = ctx["tenants"]["large"]
+    columns = PAGE_COLUMNS[page]
+    loaders = {"rentals": db.get_all_rentals, "customers": db.get_all_customers, "equipments": db.get_all_equipments}
+    return tuple(loaders[table](user_id, columns[table]) if table in columns else None for table in loaders)
+
+
+@scenario("página Inventario (editor)")
+def _page_inventario(ctx):
+    _clear_caches()
+    return editable_frame(db.get_all_equipments(ctx["tenants"]["large"]))
+
+
+@scenario("página CRM (editor + duplicados)")
+def _page_crm(ctx):
+    _clear_caches()
+    user_id = ctx["tenants"]["large"]
+    # Direto no repositório: o cache de db.get_customer_duplicates esconderia a consulta.
+    return editable_frame(db.get_all_customers(user_id)), db.get_repository().list_customer_duplicates(user_id)
+
+
+@scenario("página Frete (configurações, endereços e busca)")
+def _page_frete(ctx):
+    user_id = ctx["tenants"]["large"]
+    return (db.get_user_settings(user_id), db.get_user_addresses(user_id),
+            db.get_repository().search_customers(user_id, "silva"))
+
+
+@scenario("página Inicio")
+def _page_inicio(ctx):
+    rentals_df, customers_df, equipment_df = _load_page_data(ctx, "Inicio")
+    active = rentals_df[rentals_df["status"] == "Ativo"]
+    return merge_rental_details(active, customers_df, equipment_df)
+
+
+@scenario("página Contratos (merge)")
+def _page_contratos(ctx):
+    rentals_df, customers_df, equipment_df = _load_page_data(ctx, "3_Contratos")
+    return merge_rental_details(rentals_df, customers_df, equipment_df, suffixes=("_rental", "_equip"))
+
+
+@scenario("página Financeiro (KPIs + merge)")
+def _page_financeiro(ctx):
+    rentals_df, customers_df, equipment_df = _load_page_data(ctx, "4_Financeiro")
+    financial_summary(daily_revenue(rentals_df), datetime.now())
+    return merge_rental_details(rentals_df, customers_df, equipment_df)
+
+
+@scenario("página Mapa")
+def _page_mapa(ctx):
+    rentals_df, customers_df, _ = _load_page_data(ctx, "5_Mapa")
+    active = rentals_df[rentals_df["status"] == "Ativo"]
+    return active.merge(customers_df, on="customer_id").dropna(subset=["latitude", "longitude"])
+
+
+@scenario("carregar_dados Contratos[large] (sequencial)", setup=lambda ctx: _clear_caches())
+def _contratos_sequential(ctx):
+    user_id = ctx["tenants"]["large"]
+    return [prefetch.LOADERS[table](user_id, columns) for table, columns in prefetch.PAGE_DATASETS["3_Contratos"]]
+
+
+@scenario("carregar_dados Contratos[large] (paralelo)", setup=lambda ctx: _clear_caches())
+def _contratos_parallel(ctx):
+    return prefetch.load_page_data(ctx["tenants"]["large"], "3_Contratos")
+
+
+@scenario("busca de clientes[large] (nome parcial + documento)")
+def _customer_search(ctx):
+    # Direto no repositório: o cache de db.search_customers esconderia a consulta.
+    repo = db.get_repository()
+    user_id = ctx["tenants"]["large"]
+    return repo.search_customers(user_id, "silva"), repo.search_customers(user_id, "123.45")
+
+
+def _synthetic_customers(ctx, customers=50_000):
+    """
+    50 mil clientes, 2% recadastrados com um erro de digitação no nome e outro CPF
+    (o cadastro exige o documento, e ele é único).
+    """
+    rng = np.random.default_rng(11)
+    letters = np.array(list("abcdefghijlmnoprstuv"))
+    first = np.array(["".join(rng.choice(letters, rng.integers(4, 8))).title() for _ in range(100)])
+    last = np.array(["".join(rng.choice(letters, rng.integers(5, 10))).title() for _ in range(300)])
+    names = (pd.Series(first[rng.integers(0, len(first), customers)]) + " " + last[rng.integers(0, len(last), customers)]
+             + " " + last[rng.integers(0, len(last), customers)])
+    frame = pd.DataFrame({
+        "customer_id": [f"CUST{i:05d}" for i in range(customers)],
+        "full_name": names,
+        "phone_number": [f"(41) 9{n:08d}" for n in rng.integers(0, 10**8, customers)],
+        "email_address": None,
+    })
+    copies = frame.sample(frac=0.02, random_state=1)
+    copies = copies.assign(customer_id=[f"CUST{customers + i:05d}" for i in range(len(copies))],
+                           full_name=copies["full_name"].str[:-1] + "x", phone_number=None)
+    customers_df = pd.concat([frame, copies], ignore_index=True)
+    customers_df["document_number"] = [cpf_from_number(n) for n in rng.choice(10**9, len(customers_df), replace=False)]
+    ctx["synthetic_customers"] = customers_df
+
+
+@scenario("duplicados 50k clientes (sintético, blocagem)", setup=_synthetic_customers)
+def _duplicates_synthetic(ctx):
+    return find_duplicates(ctx["synthetic_customers"])
+
+
+# --- Importação em lote ---
+def _prepare_bulk_import(ctx, rows=10_000):
+    ctx["bulk_sheet"] = pd.DataFrame({
+        "Nome": [f"Betoneira {i}" for i in range(rows)],
+        "Categoria": "Maquinário Pesado",
+        "Número de Série": [f"BULK-{i:08d}" for i in range(rows)],
+        "Data de Aquisição": "15/03/2024",
+        "Status da Compra": "quitado",
+    })
+
+
+def _remove_bulk_import(ctx):
+    repo = db.get_repository()
+    with repo.transaction() as cursor:
+        repo.execute(cursor, "DELETE FROM equipments WHERE serial_number LIKE %s", ("BULK-%",))
+
+
+@scenario("importação 10k equipamentos (validação + COPY)", setup=_prepare_bulk_import, teardown=_remove_bulk_import)
+def _bulk_import(ctx):
+    valid_rows, _ = validate("equipments", ctx["bulk_sheet"])
+    return db.bulk_import_to_db(ctx["tenants"]["large"], "equipments", valid_rows)
+
+
+# --- Análises ---
+@scenario("utilização[large] (12 meses)", setup=lambda ctx: _load_page_data(ctx, "1_Inventario"))
+def _utilization_large(ctx):
+    user_id = ctx["tenants"]["large"]
+    columns = PAGE_COLUMNS["1_Inventario"]
+    equipment_df = db.get_all_equipments(user_id, columns["equipments"])
+    rentals_df = db.get_all_rentals(user_id, columns["rentals"])
+    return equipment_utilization(equipment_df, rentals_df, date(2024, 7, 1), date(2025, 6, 30))
+
+
+def _synthetic_rentals(ctx, rentals=500_000, equipments=5_000):
+    """Quadros em memória com 500 mil aluguéis (meta: utilização em menos de 1 s)."""
+    if "synthetic_rentals" in ctx:
+        return
+    rng = np.random.default_rng(42)
+    starts = np.datetime64("2020-01-01") + rng.integers(0, 5 * 365, rentals).astype("timedelta64[D]")
+    ctx["synthetic_equipments"] = pd.DataFrame({
+        "equipment_id": [f"EQ{i:05d}" for i in range(equipments)],
+        "name": "Equipamento",
+        "category": pd.Categorical(rng.choice(["Betoneira", "Andaime", "Compactador", "Gerador"], equipments)),
+        "acquisition_date": pd.Timestamp("2019-01-01"),
+    })
+    ctx["synthetic_rentals"] = pd.DataFrame({
+        "equipment_id": ctx["synthetic_equipments"]["equipment_id"].to_numpy()[rng.integers(0, equipments, rentals)],
+        "start_date": starts.astype("datetime64[ns]"),
+        "end_date": (starts + rng.integers(1, 60, rentals).astype("timedelta64[D]")).astype("datetime64[ns]"),
+        "valor": rng.uniform(100, 5000, rentals).round(2),
+    })
+
+
+@scenario("utilização 500k aluguéis (sintético)", setup=_synthetic_rentals)
+def _utilization_synthetic(ctx):
+    return equipment_utilization(ctx["synthetic_equipments"], ctx["synthetic_rentals"], date(2020, 1, 1), date(2024, 12, 31))
+
+
+@scenario("receita pró-rata 500k aluguéis (sintético, mensal + semanal)", setup=_synthetic_rentals)
+def _revenue_synthetic(ctx):
+    rentals_df = ctx["synthetic_rentals"].assign(payment_status="Pix", freight_cost=50.0)
+    daily = daily_revenue(rentals_df)
+    return revenue_series(daily, "M"), revenue_series(daily, "W")
+
+
+@scenario("exportação CSV[large]")
+def _export_csv_large(ctx):
+    with open(os.devnull, "wb") as output:
+        export_entries(ctx["tenants"]["large"], "csv", output)
+
+
+# --- Arquivo de aluguéis ---
+def _restore_archived(ctx):
+    """Devolve para rentals os aluguéis arquivados pelo cenário."""
+    repo = db.get_repository()
+    columns = ", ".join(RENTAL_COLUMNS)
+    with repo.transaction() as cursor:
+        repo.execute(cursor, f"INSERT INTO rentals ({columns}) SELECT {columns} FROM rentals_archive WHERE user_id = %s",
+                     (ctx["tenants"]["large"],))
+        repo.execute(cursor, "DELETE FROM rentals_archive WHERE user_id = %s", (ctx["tenants"]["large"],))
+
+
+def _archive_large(ctx):
+    archive_completed(db.get_repository(), ctx["tenants"]["large"])
+    _clear_caches()
+
+
+@scenario("arquivamento[large] (concluídos há mais de 1 ano)", teardown=_restore_archived)
+def _archive_rentals_large(ctx):
+    return archive_completed(db.get_repository(), ctx["tenants"]["large"])
+
+
+@scenario("get_all_rentals[large] frio, após arquivamento", setup=_archive_large, teardown=_restore_archived)
+def _rentals_after_archive(ctx):
+    return db.get_all_rentals(ctx["tenants"]["large"])
+
+
+# --- Jobs em segundo plano ---
+@jobs.handler("benchmark_noop")
+def _noop_job(repo, user_id, payload):
+    return payload
+
+
+def _enqueue_jobs(ctx, count=500):
+    repo = db.get_repository()
+    for i in range(count):
+        jobs.submit(repo, ctx["tenants"]["large"], "benchmark_noop", {"i": i})
+
+
+def _remove_jobs(ctx):
+    repo = db.get_repository()
+    with repo.transaction() as cursor:
+        repo.execute(cursor, "DELETE FROM jobs WHERE kind = %s", ("benchmark_noop",))
+
+
+@scenario("fila de jobs (500 jobs vazios, reserva + conclusão)", setup=_enqueue_jobs, teardown=_remove_jobs)
+def _run_jobs(ctx):
+    return jobs.run_pending(db.get_repository())
+
+
+# --- Documentos ---
+def _synthetic_documents(ctx, documents=100_000):
+    """100 mil CPFs e CNPJs formatados (a validade não altera o custo)."""
+    if "synthetic_documents" in ctx:
+        return
+    rng = np.random.default_rng(7)
+    cpfs = [f"{n[:3]}.{n[3:6]}.{n[6:9]}-{n[9:]}" for n in rng.integers(10**10, 10**11, documents // 2).astype(str)]
+    cnpjs = [f"{n[:2]}.{n[2:5]}.{n[5:8]}/{n[8:12]}-{n[12:]}" for n in rng.integers(10**13, 10**14, documents // 2).astype(str)]
+    ctx["synthetic_documents"] = (cpfs + cnpjs, ["CPF"] * len(cpfs) + ["CNPJ"] * len(cnpjs))
+
+
+@scenario("validação CPF/CNPJ 100k (NumPy)", setup=_synthetic_documents)
+def _documents_vectorized(ctx):
+    numbers, doc_types = ctx["synthetic_documents"]
+    return validate_documents(numbers, doc_types)
+
+
+@scenario("validação CPF/CNPJ 100k (validate_docbr, referência)", setup=_synthetic_documents)
+def _documents_per_row(ctx):
+    from validate_docbr import CNPJ, CPF
+
+    validators = {"CPF": CPF(), "CNPJ": CNPJ()}
+    numbers, doc_types = ctx["synthetic_documents"]
+    return [validators[kind].validate(number) for number, kind in zip(numbers, doc_types)]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def run(repeat=5, only=None):
+    repo = db.get_repository()
+    if repo is None:
+        raise RuntimeError("Não foi possível conectar ao banco. Verifique DATABASE_URL.")
+    ctx = {"tenants": _pick_tenants(repo.conn), "benchmark_date": date(2099, 1, 1)}
+    results = []
+    for item in SCENARIOS:
+        if only and only not in item["name"]:
+            continue
+        timings = []
+        for _ in range(repeat):
+            if item["setup"]:
+                item["setup"](ctx)
+            start = time.perf_counter()
+            item["run"](ctx)
+            timings.append((time.perf_counter() - start) * 1000)
+            if item["teardown"]:
+                item["teardown"](ctx)
+        results.append({
+            "name": item["name"],
+            "repeat": repeat,
+            "min_ms": min(timings),
+            "median_ms": statistics.median(timings),
+            "mean_ms": statistics.mean(timings),
+            "max_ms": max(timings),
+        })
+        print(f"{item['name']:<45} mediana {results[-1]['median_ms']:9.2f} ms  mín {results[-1]['min_ms']:9.2f} ms")
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "tenants": ctx["tenants"],
+        "results": results,
+    }
+
+
+def compare(base_path, new_path, threshold=0.10):
+    """Compara duas execuções pela mediana. Retorna o número de regressões acima do limite."""
+    with open(base_path, encoding="utf-8") as f:
+        base = {r["name"]: r for r in json.load(f)["results"]}
+    with open(new_path, encoding="utf-8") as f:
+        new = {r["name"]: r for r in json.load(f)["results"]}
+    regressions = 0
+    for name, result in new.items():
+        if name not in base:
+            print(f"{name:<45} (novo) {result['median_ms']:9.2f} ms")
+            continue
+        ratio = result["median_ms"] / base[name]["median_ms"] if base[name]["median_ms"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- REGRESSÃO"
+            regressions += 1
+        print(f"{name:<45} {base[name]['median_ms']:9.2f} -> {result['median_ms']:9.2f} ms ({ratio:5.2f}x){flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks da camada de dados do ConcRental.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Executa os cenários e salva o JSON de resultados.")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--only", default=None, help="Executa apenas cenários cujo nome contém este texto.")
+    run_parser.add_argument("--output", default=None, help="Arquivo JSON de saída (padrão: benchmarks/results/).")
+    compare_parser = subparsers.add_parser("compare", help="Compara dois arquivos de resultados.")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Regressão tolerada (0.10 = 10%%).")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        return 1 if compare(args.base, args.new, args.threshold) else 0
+
+    if not os.environ.get("DATABASE_URL"):
+        print("Defina DATABASE_URL apontando para o Postgres local de benchmark.", file=sys.stderr)
+        return 1
+    report = run(args.repeat, args.only)
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}_{report['commit']}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultados salvos em {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
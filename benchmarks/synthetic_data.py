@@ -0,0 +1,212 @@
+"""
+Gerador determinístico de dados sintéticos para benchmarks.
+
+Cria inquilinos (users), equipamentos, clientes e aluguéis num Postgres LOCAL e
+carrega tudo com COPY. A mesma semente e escala sempre produzem os mesmos dados.
+Os períodos de aluguel de um mesmo equipamento nunca se sobrepõem.
+
+Uso:
+    DATABASE_URL=postgresql://localhost/concrental_bench \
+        python -m benchmarks.synthetic_data --scale default --reset
+
+Escalas: veja SCALES. Por segurança o script só roda com DATABASE_URL definida e
+apaga os dados existentes apenas com --reset.
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import bcrypt
+
+from repository import open_postgres_connection
+
+SCALES = {
+    "small": {"tenants": 5, "equipments": 500, "customers": 2_000, "rentals": 20_000},
+    "default": {"tenants": 50, "equipments": 10_000, "customers": 50_000, "rentals": 500_000},
+}
+DEFAULT_SEED = 42
+DEFAULT_ANCHOR_DATE = date(2025, 6, 30)
+BENCHMARK_PASSWORD = "benchmark"
+
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+               "Karina", "Lucas", "Mariana", "Nicolas", "Olívia", "Paulo", "Rafaela", "Sérgio", "Tatiane", "Vinícius"]
+LAST_NAMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+              "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa"]
+STREETS = ["Rua XV de Novembro", "Av. Sete de Setembro", "Rua Marechal Deodoro", "Av. República Argentina",
+           "Rua Padre Anchieta", "Av. Visconde de Guarapuava", "Rua Brigadeiro Franco", "Av. Batel"]
+NEIGHBORHOODS = ["Centro", "Batel", "Água Verde", "Portão", "Boqueirão", "Cabral", "Bigorrilho", "Rebouças"]
+CATEGORIES = ["Maquinário Pesado", "Betoneiras", "Andaimes", "Compactadores", "Geradores", "Ferramentas Elétricas"]
+EQUIPMENT_NAMES = ["Betoneira 400L", "Betoneira 500L", "Andaime Tubular", "Compactador de Solo", "Gerador 5kVA",
+                   "Martelete Rompedor", "Serra Mármore", "Vibrador de Concreto", "Placa Vibratória", "Cortadora de Piso"]
+PAID_STATUSES = ["Cartão", "Dinheiro", "Parcelado", "Pix"]
+
+
+def cpf_from_number(number):
+    """Gera um CPF válido (11 dígitos) a partir de um inteiro de até 9 dígitos."""
+    digits = [int(d) for d in f"{number:09d}"]
+    for weight_start in (10, 11):
+        total = sum(d * w for d, w in zip(digits, range(weight_start, 1, -1)))
+        remainder = total % 11
+        digits.append(0 if remainder < 2 else 11 - remainder)
+    return "".join(map(str, digits))
+
+
+def _split_counts(rng, total, parts):
+    """Divide `total` em `parts` partes com tamanhos desiguais (alguns inquilinos grandes)."""
+    weights = [rng.paretovariate(1.5) for _ in range(parts)]
+    scale = total / sum(weights)
+    counts = [max(1, int(w * scale)) for w in weights]
+    counts[counts.index(max(counts))] += total - sum(counts)
+    return counts
+
+
+def generate(scale, seed=DEFAULT_SEED, anchor_date=DEFAULT_ANCHOR_DATE):
+    """
+    Retorna um dicionário tabela -> (colunas, linhas). Aluguéis que terminam após
+    `anchor_date` ficam ativos; os demais são concluídos (com alguns atrasados).
+    """
+    rng = random.Random(seed)
+    sizes = SCALES[scale]
+    password_hash = bcrypt.hashpw(BENCHMARK_PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=4)).decode("utf-8")
+    tenant_ids = list(range(1, sizes["tenants"] + 1))
+
+    users = [(tenant_id, f"tenant{tenant_id:03d}", password_hash) for tenant_id in tenant_ids]
+    settings = [(tenant_id, round(rng.uniform(6, 14), 2), round(rng.uniform(5, 7), 2)) for tenant_id in tenant_ids]
+    addresses = [(tenant_id, "Matriz", f"{rng.choice(STREETS)}, {rng.randint(1, 3000)}, Curitiba, PR",
+                  -25.43 + rng.uniform(-0.08, 0.08), -49.27 + rng.uniform(-0.08, 0.08)) for tenant_id in tenant_ids]
+
+    equipment_counts = _split_counts(rng, sizes["equipments"], len(tenant_ids))
+    customer_counts = _split_counts(rng, sizes["customers"], len(tenant_ids))
+
+    customers, customer_ids_by_tenant = [], {}
+    next_customer = 1
+    for tenant_id, count in zip(tenant_ids, customer_counts):
+        ids = []
+        for _ in range(count):
+            customer_id = f"CUST{next_customer:03d}"
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            company = f"{last} Construções Ltda" if rng.random() < 0.3 else None
+            customers.append((
+                customer_id, tenant_id, f"{first} {last} {rng.choice(LAST_NAMES)}", company,
+                f"(41) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+                f"{first.lower()}.{last.lower()}{next_customer}@email.com",
+                f"{rng.choice(STREETS)}, {rng.randint(1, 3000)}, {rng.choice(NEIGHBORHOODS)}, Curitiba, PR",
+                "CPF", cpf_from_number(next_customer), None,
+                -25.43 + rng.uniform(-0.1, 0.1), -49.27 + rng.uniform(-0.1, 0.1),
+            ))
+            ids.append(customer_id)
+            next_customer += 1
+        customer_ids_by_tenant[tenant_id] = ids
+
+    equipment_rows, equipment_tenants = [], []
+    next_equipment = 1
+    for tenant_id, count in zip(tenant_ids, equipment_counts):
+        for _ in range(count):
+            equipment_rows.append([
+                f"EQ{next_equipment:03d}", tenant_id, rng.choice(EQUIPMENT_NAMES), rng.choice(CATEGORIES),
+                f"SN-{next_equipment:08d}", anchor_date - timedelta(days=rng.randint(400, 2500)),
+                "Disponível", rng.choice(["Quitado", "Não Quitado"]), 0,
+            ])
+            equipment_tenants.append(tenant_id)
+            next_equipment += 1
+
+    # Distribui os aluguéis pelos equipamentos e gera períodos consecutivos, do mais
+    # recente para o mais antigo, sem sobreposição.
+    rentals_per_equipment = [0] * len(equipment_rows)
+    for _ in range(sizes["rentals"]):
+        rentals_per_equipment[rng.randrange(len(equipment_rows))] += 1
+
+    rentals = []
+    next_rental = 1
+    for equipment, tenant_id, count in zip(equipment_rows, equipment_tenants, rentals_per_equipment):
+        cursor = datetime.combine(anchor_date, datetime.min.time()) + timedelta(days=rng.randint(-15, 20))
+        for position in range(count):
+            end = cursor
+            start = end - timedelta(days=rng.randint(1, 30))
+            cursor = start - timedelta(days=rng.randint(0, 10))
+            is_latest = position == 0
+            if is_latest and (end.date() >= anchor_date or rng.random() < 0.05):
+                status, payment_status = "Ativo", "Em Aberto"
+                equipment[6] = "Alugado"
+            else:
+                status = "Concluído"
+                payment_status = "Em Aberto" if rng.random() < 0.1 else rng.choice(PAID_STATUSES)
+            rentals.append((
+                f"RENT{next_rental:03d}", tenant_id, rng.choice(customer_ids_by_tenant[tenant_id]), equipment[0],
+                start, end, status, payment_status, round(rng.uniform(80, 3500), 2),
+                round(rng.uniform(0, 250), 2) if rng.random() < 0.6 else 0, None,
+            ))
+            next_rental += 1
+        equipment[8] = count
+
+    return {
+        "users": (("id", "username", "password_hash"), users),
+        "user_settings": (("user_id", "fuel_consumption", "fuel_cost"), settings),
+        "user_addresses": (("user_id", "address_name", "address", "latitude", "longitude"), addresses),
+        "equipments": (("equipment_id", "user_id", "name", "category", "serial_number", "acquisition_date",
+                        "status", "purchase_status", "times_rented"), [tuple(row) for row in equipment_rows]),
+        "customers": (("customer_id", "user_id", "full_name", "company_name", "phone_number", "email_address",
+                       "address", "document_type", "document_number", "document_path", "latitude", "longitude"),
+                      customers),
+        "rentals": (("rental_id", "user_id", "customer_id", "equipment_id", "start_date", "end_date", "status",
+                     "payment_status", "valor", "freight_cost", "signed_contract_path"), rentals),
+    }
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Carrega as linhas com COPY ... FROM STDIN (CSV; campos vazios viram NULL)."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def load(conn, data, reset=False):
+    with conn.cursor() as cursor:
+        if reset:
+            cursor.execute("TRUNCATE users, equipments, customers, rentals, user_settings, user_addresses, deleted_rows, rental_alerts, alert_runs, customer_duplicates, rentals_archive RESTART IDENTITY CASCADE")
+        for table in ("users", "user_settings", "user_addresses", "equipments", "customers", "rentals"):
+            columns, rows = data[table]
+            start = time.perf_counter()
+            copy_rows(cursor, table, columns, rows)
+            print(f"{table}: {len(rows)} linhas em {time.perf_counter() - start:.1f} s")
+        cursor.execute("SELECT setval(pg_get_serial_sequence('users', 'id'), (SELECT MAX(id) FROM users))")
+        cursor.execute("SELECT setval('rental_number_seq', %s)", (len(data["rentals"][1]),))
+    conn.commit()
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    conn.autocommit = False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera e carrega dados sintéticos num Postgres local.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="default")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--anchor-date", type=date.fromisoformat, default=DEFAULT_ANCHOR_DATE,
+                        help="Data de referência para aluguéis ativos/atrasados (AAAA-MM-DD).")
+    parser.add_argument("--reset", action="store_true", help="Apaga os dados existentes antes de carregar.")
+    args = parser.parse_args(argv)
+
+    if not os.environ.get("DATABASE_URL"):
+        print("Defina DATABASE_URL apontando para um Postgres local de benchmark.", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    data = generate(args.scale, args.seed, args.anchor_date)
+    print(f"Dados gerados em {time.perf_counter() - start:.1f} s")
+    conn = open_postgres_connection()
+    try:
+        load(conn, data, reset=args.reset)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
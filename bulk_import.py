@@ -0,0 +1,139 @@
+"""
+Importação em lote de equipamentos e clientes a partir de planilhas (CSV ou XLSX).
+
+read_spreadsheet lê o arquivo e reconhece os cabeçalhos em português ou pelos
+nomes das colunas; validate normaliza os valores e separa as linhas válidas das
+inválidas, com o motivo, usando operações vetorizadas do pandas. As linhas válidas
+são gravadas por db_management.bulk_import_to_db com Repository.bulk_insert (COPY
+para uma tabela temporária e um único INSERT ... SELECT, com IDs atribuídos em
+bloco). Números de série e documentos já cadastrados são ignorados na gravação.
+"""
+import os
+import unicodedata
+
+import pandas as pd
+
+from documents import infer_document_type, normalize_documents, validate_documents
+
+PURCHASE_STATUS = ("Quitado", "Não Quitado")
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+
+# Colunas de cada tabela e os cabeçalhos aceitos (sem acentos, em minúsculas).
+SPECS = {
+    "equipments": {
+        "columns": {
+            "name": ("name", "nome", "equipamento"),
+            "category": ("category", "categoria"),
+            "serial_number": ("serial_number", "numero de serie", "serie", "n de serie"),
+            "acquisition_date": ("acquisition_date", "data de aquisicao", "aquisicao"),
+            "purchase_status": ("purchase_status", "status da compra"),
+        },
+        "required": ("name", "category", "serial_number"),
+        "unique": "serial_number",
+    },
+    "customers": {
+        "columns": {
+            "full_name": ("full_name", "nome", "nome completo", "cliente"),
+            "company_name": ("company_name", "empresa", "nome da empresa"),
+            "document_type": ("document_type", "tipo de documento", "tipo doc"),
+            "document_number": ("document_number", "documento", "cpf/cnpj", "cpf", "cnpj", "numero do documento"),
+            "phone_number": ("phone_number", "telefone", "celular"),
+            "email_address": ("email_address", "email", "e-mail"),
+            "address": ("address", "endereco"),
+        },
+        "required": ("full_name", "email_address", "document_number"),
+        "unique": "document_number",
+    },
+}
+
+COLUMN_LABELS = {
+    "name": "Nome", "category": "Categoria", "serial_number": "Número de Série",
+    "acquisition_date": "Data de Aquisição", "purchase_status": "Status da Compra",
+    "full_name": "Nome Completo", "company_name": "Empresa", "document_type": "Tipo de Documento",
+    "document_number": "Documento", "phone_number": "Telefone", "email_address": "Email", "address": "Endereço",
+}
+
+
+def _normalize_header(header):
+    text = unicodedata.normalize("NFKD", str(header)).encode("ascii", "ignore").decode()
+    return " ".join(text.lower().replace("_", " ").replace(".", " ").split())
+
+
+def read_spreadsheet(uploaded_file, name=None):
+    """Lê um CSV (separado por vírgula ou ponto e vírgula) ou XLSX como texto."""
+    name = name or getattr(uploaded_file, "name", "")
+    extension = os.path.splitext(name)[1].lower()
+    if extension == ".csv":
+        return pd.read_csv(uploaded_file, sep=None, engine="python", dtype=str, keep_default_na=False)
+    if extension in (".xlsx", ".xlsm"):
+        return pd.read_excel(uploaded_file, dtype=str, keep_default_na=False)
+    raise ValueError(f"Formato de arquivo não suportado: {extension or name}")
+
+
+def _rename_columns(table, df):
+    aliases = {_normalize_header(alias): column
+               for column, names in SPECS[table]["columns"].items() for alias in names}
+    renamed = df.rename(columns=lambda header: aliases.get(_normalize_header(header), header))
+    missing = [COLUMN_LABELS[column] for column in SPECS[table]["required"] if column not in renamed.columns]
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(missing)}")
+    known = [column for column in SPECS[table]["columns"] if column in renamed.columns]
+    # Cabeçalhos repetidos (ex.: Nome e Nome Completo) ficam com a primeira coluna.
+    return renamed.loc[:, ~renamed.columns.duplicated()][known]
+
+
+def _text(series):
+    """Texto sem espaços nas pontas; vazio vira NA."""
+    return series.astype("string").str.strip().replace("", pd.NA)
+
+
+def validate(table, df):
+    """
+    Retorna (válidas, erros). `válidas` tem as colunas da tabela, prontas para
+    bulk_insert; `erros` tem a linha da planilha (contando o cabeçalho) e os motivos.
+    """
+    spec = SPECS[table]
+    frame = _rename_columns(table, df)
+    frame = frame.apply(_text)
+    for column in spec["columns"]:
+        if column not in frame.columns:
+            frame[column] = pd.Series(pd.NA, index=frame.index, dtype="string")
+    errors = pd.Series("", index=frame.index, dtype="string")
+
+    def flag(mask, message):
+        nonlocal errors
+        errors = errors.mask(mask.fillna(False).astype(bool), errors + message + "; ")
+
+    for column in spec["required"]:
+        flag(frame[column].isna(), f"{COLUMN_LABELS[column]} em branco")
+
+    if table == "equipments":
+        parsed = pd.to_datetime(frame["acquisition_date"], format="mixed", dayfirst=True, errors="coerce")
+        flag(frame["acquisition_date"].notna() & parsed.isna(), "data de aquisição inválida")
+        frame["acquisition_date"] = parsed.dt.date.astype(object).where(parsed.notna(), None)
+        status = frame["purchase_status"].str.lower().map({value.lower(): value for value in PURCHASE_STATUS})
+        flag(frame["purchase_status"].notna() & status.isna(), "status da compra deve ser Quitado ou Não Quitado")
+        frame["purchase_status"] = status.fillna("Não Quitado")
+    else:
+        digits = normalize_documents(frame["document_number"])
+        given_type = frame["document_type"].str.upper()
+        bad_type = given_type.notna() & ~given_type.isin(["CPF", "CNPJ"])
+        doc_type = given_type.fillna(infer_document_type(digits))
+        valid_doc, digits = validate_documents(digits, doc_type)
+        flag(bad_type, "tipo de documento deve ser CPF ou CNPJ")
+        flag(frame["document_number"].notna() & ~bad_type & ~valid_doc, "CPF/CNPJ inválido")
+        flag(frame["email_address"].notna() & ~frame["email_address"].str.match(EMAIL_PATTERN), "email inválido")
+        frame["document_number"] = digits
+        frame["document_type"] = doc_type
+
+    unique = frame[spec["unique"]]
+    flag(unique.notna() & unique.duplicated(keep=False), f"{COLUMN_LABELS[spec['unique']]} repetido na planilha")
+
+    invalid = (errors != "").to_numpy(dtype=bool)
+    error_rows = pd.DataFrame({
+        "Linha": frame.index[invalid] + 2,
+        "Erros": errors[invalid].str.rstrip("; ").to_numpy(),
+    })
+    valid = frame.loc[~invalid, list(spec["columns"])]
+    valid = valid.astype(object).where(valid.notna(), None).reset_index(drop=True)
+    return valid, error_rows.reset_index(drop=True)
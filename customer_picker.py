@@ -0,0 +1,43 @@
+"""
+Seletor de clientes com busca no servidor.
+
+Em vez de enviar os nomes de todos os clientes ao navegador, o campo de busca
+consulta db_management.search_customers (índice de trigramas e LIMIT, ver a
+migração 0008) e o selectbox mostra apenas os resultados. O Streamlit envia o
+termo ao pressionar Enter ou ao sair do campo.
+"""
+import streamlit as st
+
+from db_management import search_customers
+
+MIN_TERM_LENGTH = 3
+RESULT_LIMIT = 20
+
+
+def customer_label(customer):
+    """Nome, empresa e documento, para distinguir clientes com o mesmo nome."""
+    parts = [customer["full_name"]]
+    for column in ("company_name", "document_number"):
+        if isinstance(customer.get(column), str) and customer[column]:
+            parts.append(customer[column])
+    return " — ".join(parts)
+
+
+def customer_picker(user_id, label="Cliente", key="customer_picker"):
+    """Campo de busca e lista de resultados; retorna o cliente escolhido (dict) ou None."""
+    term = st.text_input(label, key=f"{key}_term", placeholder="Nome, empresa, CPF/CNPJ ou telefone")
+    if len(term.strip()) < MIN_TERM_LENGTH:
+        st.caption(f"Digite ao menos {MIN_TERM_LENGTH} caracteres para buscar.")
+        return None
+    results = search_customers(user_id, term, RESULT_LIMIT)
+    if results.empty:
+        st.info("Nenhum cliente encontrado.")
+        return None
+    customers = {row["customer_id"]: row for row in results.to_dict("records")}
+    selected_id = st.selectbox(
+        f"{label} (resultados)", options=list(customers), index=None, placeholder="Selecione...",
+        format_func=lambda customer_id: customer_label(customers[customer_id]), key=f"{key}_choice",
+    )
+    if len(results) == RESULT_LIMIT:
+        st.caption(f"Mostrando os {RESULT_LIMIT} primeiros resultados; refine a busca se necessário.")
+    return customers.get(selected_id)
@@ -1,35 +1,57 @@
+import os
+import tempfile
+import threading
 import streamlit as st
-import psycopg2
-import bcrypt
 import pandas as pd
-from geopy.geocoders import Nominatim
-
-# --- Configuração Inicial ---
-geolocator = Nominatim(user_agent="concrental_app_v3")
+import alerts
+import analytics
+import duplicates
+import exports
+import jobs
+import revenue
+from instrumentation import instrumented
+from invalidation import start_change_listener
+from reports import PAGE_COLUMNS
+from repository import CONNECTION_ERRORS, CUSTOMER_SEARCH_COLUMNS, create_repository, open_postgres_connection
+from schemas import CUSTOMER_SCHEMA, EQUIPMENT_SCHEMA, RENTAL_SCHEMA, apply_schema
+from table_cache import table_cache
 
 # --- Funções de Conexão ---
+_local = threading.local()
+
+def get_repository():
+    """
+    Repositório usado pelas funções deste módulo: o da thread atual, quando
+    definido com use_thread_repository (threads do prefetch.py), ou o repositório
+    compartilhado do app. A conexão compartilhada executa uma consulta por vez.
+    """
+    repo = getattr(_local, "repo", None)
+    return repo if repo is not None else _shared_repository()
+
+def use_thread_repository(repo):
+    """Faz as funções deste módulo usarem `repo` na thread atual (None volta ao compartilhado)."""
+    _local.repo = repo
+
 @st.cache_resource
-def get_db_connection():
+def _shared_repository():
     """
-    Estabelece e armazena em cache uma conexão com o banco de dados PostgreSQL
-    usando as credenciais do secrets.toml do Streamlit.
+    Cria e armazena em cache o repositório de dados do backend configurado
+    (PostgreSQL por padrão, ou SQLite) usando o secrets.toml do Streamlit.
     """
     try:
-        conn = psycopg2.connect(
-            host=st.secrets["postgres"]["host"],
-            port=st.secrets["postgres"]["port"],
-            dbname=st.secrets["postgres"]["dbname"],
-            user=st.secrets["postgres"]["user"],
-            password=st.secrets["postgres"]["password"],
-            sslmode='require'
-        )
-        return conn
-    except psycopg2.Error as e:
+        repo = create_repository()
+    except CONNECTION_ERRORS as e:
         st.error(f"Erro detalhado ao conectar: {e}")
         return None
-    except (psycopg2.OperationalError, KeyError) as e:
+    except (KeyError, ValueError) as e:
         st.error(f"Erro ao conectar ao banco dedados. Verifique suas configurações em .streamlit/secrets.toml. Detalhe: {e}")
         return None
+    if repo.dialect == "postgres":
+        # Escritas feitas por outros processos do servidor chegam por NOTIFY.
+        start_change_listener(open_postgres_connection, _on_table_change)
+    # Workers dos jobs em segundo plano deste processo, cada um com a sua conexão.
+    jobs.start_job_runner(create_repository, _on_table_change)
+    return repo
 
 # --- Funções de Autenticação ---
 def logout(cookie_manager):
@@ -43,7 +65,9 @@ def logout(cookie_manager):
     st.rerun()
 
 def is_authenticated(cookies):
-    if not st.session_state.get("logged_in"):
+    # Os cookies só ficam disponíveis depois que o componente responde ao navegador
+    # (e nunca em execuções headless, como o AppTest).
+    if not st.session_state.get("logged_in") and cookies.ready():
         user_id_from_cookie = cookies.get('user_id')
         if user_id_from_cookie:
             username = get_user_by_id(user_id_from_cookie)
@@ -54,331 +78,531 @@ def is_authenticated(cookies):
                 return True
     return st.session_state.get("logged_in", False)
 
+@instrumented
 def verify_user(username, password):
-    conn = get_db_connection()
-    if conn is None: return False, None, None
+    import bcrypt  # usado só no login; não entra no import das páginas
+    repo = get_repository()
+    if repo is None: return False, None, None
     user_found = False
     user_id = None
     db_username = None
     try:
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT id, password_hash, username FROM users WHERE username ILIKE %s", (username,))
-            result = cursor.fetchone()
-            if result:
-                user_id, stored_hash, db_username = result
-                if bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8')):
-                    user_found = True
-    except psycopg2.Error as e:
+        result = repo.get_user_credentials(username)
+        if result:
+            user_id, stored_hash, db_username = result
+            if bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8')):
+                user_found = True
+    except repo.Error as e:
         st.error(f"Erro ao verificar usuário: {e}")
     return user_found, user_id, db_username
 
 
+@instrumented
 def get_user_id_by_username(username):
-    conn = get_db_connection()
-    if conn is None:
+    repo = get_repository()
+    if repo is None:
         return None
     try:
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
-            result = cursor.fetchone()
-            return result[0] if result else None
-    except psycopg2.Error as e:
+        return repo.get_user_id(username)
+    except repo.Error as e:
         st.error(f"Erro ao buscar ID do usuário: {e}")
         return None
 
 
+@instrumented
 def get_user_by_id(user_id):
-    conn = get_db_connection()
-    if conn is None:
+    repo = get_repository()
+    if repo is None:
         return None
     try:
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT username FROM users WHERE id = %s", (user_id,))
-            result = cursor.fetchone()
-            return result[0] if result else None
-    except psycopg2.Error as e:
+        return repo.get_username(user_id)
+    except repo.Error as e:
         st.error(f"Erro ao buscar usuário por ID: {e}")
         return None
 
 
+@instrumented
+def is_admin_user(user_id):
+    repo = get_repository()
+    if repo is None:
+        return False
+    try:
+        return repo.is_admin(user_id)
+    except repo.Error as e:
+        st.error(f"Erro ao verificar permissões do usuário: {e}")
+        return False
+
+
+# --- Cache dos Quadros ---
+# Os carregadores aceitam `columns` (tupla) para ler apenas as colunas usadas pela
+# página; cada projeção tem sua própria entrada no cache. Ver reports.PAGE_COLUMNS.
+# Depois de uma escrita, o cache busca apenas as linhas alteradas (table_cache.py).
+# Os st.cache_data por usuário recebem `generation`, que faz parte da chave do cache:
+# incrementar a geração do usuário descarta só as entradas dele (as antigas expiram
+# pelo ttl), enquanto .clear() descartaria as de todos os usuários.
+_generations = {}
+_generations_lock = threading.Lock()
+
+def _generation(cached, user_id):
+    return _generations.get((cached, str(user_id)), 0)
+
+def _invalidate(user_id, *cached_functions):
+    """Descarta as entradas do usuário nos caches dados; com None, todas as entradas."""
+    for cached in cached_functions:
+        if user_id is None:
+            cached.clear()
+            continue
+        with _generations_lock:
+            key = (cached, str(user_id))
+            _generations[key] = _generations.get(key, 0) + 1
+
+def mark_tables_stale(user_id=None):
+    """Marca os quadros do usuário (ou de todos, com None) para sincronização."""
+    get_all_equipments.mark_stale(user_id)
+    get_all_customers.mark_stale(user_id)
+    get_all_rentals.mark_stale(user_id)
+    _invalidate(user_id, _fetch_customer_search, _fetch_customer_duplicates, _fetch_equipment_utilization,
+                _fetch_daily_revenue, _fetch_archived_rentals)
+
+def _on_table_change(table, user_id):
+    """Recebe as notificações de escrita (invalidation.py); None invalida tudo."""
+    loaders = {"equipments": get_all_equipments, "customers": get_all_customers, "rentals": get_all_rentals}
+    if table in loaders:
+        loaders[table].mark_stale(user_id)
+        _invalidate(user_id, _fetch_equipment_utilization)
+        if table == "customers":
+            _invalidate(user_id, _fetch_customer_search, _fetch_customer_duplicates)
+        if table == "rentals":
+            _invalidate(user_id, _fetch_rental_alerts, _fetch_daily_revenue, _fetch_archived_rentals)
+    elif table == "user_settings":
+        _invalidate(user_id, _fetch_user_settings)
+    elif table is None:
+        mark_tables_stale()
+        _invalidate(None, _fetch_user_settings, _fetch_rental_alerts)
+
 # --- Funções de Equipamento ---
-@st.cache_data
-def get_all_equipments(user_id):
-    conn = get_db_connection()
-    if conn is None: return pd.DataFrame()
-    return pd.read_sql('SELECT * FROM equipments WHERE user_id = %s ORDER BY equipment_id ASC', conn, params=(user_id,))
+@instrumented
+@table_cache(key="equipment_id", schema=EQUIPMENT_SCHEMA, sort_by="equipment_id")
+def get_all_equipments(user_id, columns=None, since=None):
+    repo = get_repository()
+    if repo is None: return None
+    return repo.sync_frame("equipments", user_id, columns, since)
 
 
+@instrumented
 def add_equipment_to_db(user_id, name, category, serial, acq_date, purchase_status):
-    conn = get_db_connection()
-    if conn is None: return False, "Falha na conexão."
-    sql = "INSERT INTO equipments (user_id, equipment_id, name, category, serial_number, acquisition_date, status, purchase_status, times_rented) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"
+    repo = get_repository()
+    if repo is None: return False, "Falha na conexão."
     try:
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT equipment_id FROM equipments ORDER BY equipment_id DESC LIMIT 1")
-            last_id = cursor.fetchone()
-            last_num = 0
-            if last_id: last_num = int(last_id[0].replace("EQ", ""))
-            new_id = f"EQ{last_num + 1:03d}"
-            cursor.execute(sql, (user_id, new_id, name, category, serial, acq_date, "Disponível", purchase_status, 0))
-            conn.commit()
-        st.cache_data.clear()
+        repo.add_equipment(user_id, name, category, serial, acq_date, purchase_status)
+        mark_tables_stale(user_id)
         return True, "Equipamento adicionado com sucesso!"
-    except psycopg2.IntegrityError:
-        conn.rollback()
+    except repo.IntegrityError:
         return False, f"Erro: Equipamento com número de série '{serial}' já existe."
-    except psycopg2.Error as e:
-        conn.rollback()
+    except repo.Error as e:
         return False, f"Erro no banco de dados: {e}"
 
-def update_equipment_in_db(equipment_id, updates):
-    conn = get_db_connection()
-    if conn is None: return
+@instrumented
+def update_equipment_in_db(user_id, equipment_id, updates):
+    repo = get_repository()
+    if repo is None: return
     try:
-        with conn.cursor() as cursor:
-            set_clause = ", ".join([f'{key} = %s' for key in updates.keys()])
-            query = f'UPDATE equipments SET {set_clause} WHERE equipment_id = %s'
-            params = list(updates.values()) + [equipment_id]
-            cursor.execute(query, params)
-            conn.commit()
-        st.cache_data.clear()
-    except psycopg2.Error as e:
-        conn.rollback()
+        repo.update_equipment(user_id, equipment_id, updates)
+        mark_tables_stale(user_id)
+    except repo.Error as e:
         st.error(f"Erro ao atualizar equipamento: {e}")
 
-def delete_equipment_from_db(equipment_id):
-    conn = get_db_connection()
-    if conn is None: return False, "Falha na conexão."
+@instrumented
+def delete_equipment_from_db(user_id, equipment_id):
+    repo = get_repository()
+    if repo is None: return False, "Falha na conexão."
     try:
-        with conn.cursor() as cursor:
-            cursor.execute('DELETE FROM equipments WHERE equipment_id = %s', (equipment_id,))
-            conn.commit()
-        st.cache_data.clear()
+        repo.delete_equipment(user_id, equipment_id)
+        mark_tables_stale(user_id)
         return True, "Equipamento deletado com sucesso."
-    except psycopg2.errors.ForeignKeyViolation:
-        conn.rollback()
+    except repo.IntegrityError:
+        # Na exclusão, a única restrição possível é a chave estrangeira dos aluguéis.
         return False, "Este equipamento não pode ser deletado pois está associado a um ou mais aluguéis."
-    except psycopg2.Error as e:
-        conn.rollback()
+    except repo.Error as e:
         return False, f"Erro no banco de dados: {e}"
 
 # --- Funções de Cliente ---
-@st.cache_data
-def get_all_customers(user_id):
-    conn = get_db_connection()
-    if conn is None: return pd.DataFrame()
-    return pd.read_sql('SELECT * FROM customers WHERE user_id = %s ORDER BY customer_id ASC', conn, params=(user_id,))
-
+@instrumented
+@table_cache(key="customer_id", schema=CUSTOMER_SCHEMA, sort_by="customer_id")
+def get_all_customers(user_id, columns=None, since=None):
+    repo = get_repository()
+    if repo is None: return None
+    return repo.sync_frame("customers", user_id, columns, since)
+
+@instrumented
 def add_customer_to_db(user_id, full_name, company_name, phone, email, address, doc_type, doc_number):
-    conn = get_db_connection()
-    if conn is None: return False, "Falha na conexão."
-    sql = "INSERT INTO customers (user_id, customer_id, full_name, company_name, phone_number, email_address, address, document_type, document_number) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"
+    repo = get_repository()
+    if repo is None: return False, "Falha na conexão."
     try:
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT customer_id FROM customers ORDER BY customer_id DESC LIMIT 1")
-            last_id = cursor.fetchone()
-            last_num = 0
-            if last_id: last_num = int(last_id[0].replace("CUST", ""))
-            new_id = f"CUST{last_num + 1:03d}"
-            cursor.execute(sql, (user_id, new_id, full_name, company_name, phone, email, address, doc_type, doc_number))
-            conn.commit()
-        st.cache_data.clear()
+        repo.add_customer(user_id, full_name, company_name, phone, email, address, doc_type, doc_number)
+        mark_tables_stale(user_id)
         return True, "Cliente adicionado com sucesso!"
-    except psycopg2.IntegrityError:
-        conn.rollback()
+    except repo.IntegrityError:
         return False, "Erro: Cliente com este CPF/CNPJ já existe."
-    except psycopg2.Error as e:
-        conn.rollback()
+    except repo.Error as e:
         return False, f"Erro no banco de dados: {e}"
 
-def update_customer_in_db(customer_id, updates):
-    conn = get_db_connection()
-    if conn is None: return
+@instrumented
+def update_customer_in_db(user_id, customer_id, updates):
+    repo = get_repository()
+    if repo is None: return
     try:
-        with conn.cursor() as cursor:
-            set_clause = ", ".join([f'{key} = %s' for key in updates.keys()])
-            query = f'UPDATE customers SET {set_clause} WHERE customer_id = %s'
-            params = list(updates.values()) + [customer_id]
-            cursor.execute(query, params)
-            conn.commit()
-        st.cache_data.clear()
-    except psycopg2.Error as e:
-        conn.rollback()
+        repo.update_customer(user_id, customer_id, updates)
+        mark_tables_stale(user_id)
+    except repo.Error as e:
         st.error(f"Erro ao atualizar cliente: {e}")
 
-def geocode_and_update_customer(customer_id, address):
+@instrumented
+def geocode_and_update_customer(user_id, customer_id, address):
+    """Agenda a geocodificação do endereço do cliente; retorna (True, id do job) ou (False, mensagem)."""
     if not address:
         return False, "Endereço vazio."
-    try:
-        location = geolocator.geocode(address + ", Curitiba, Brazil", timeout=10)
-        if location:
-            updates = {'latitude': location.latitude, 'longitude': location.longitude}
-            update_customer_in_db(customer_id, updates)
-            return True, "Coordenadas atualizadas com sucesso!"
-        else:
-            return False, "Endereço não encontrado."
-    except Exception as e:
-        return False, f"Erro de geolocalização: {e}"
+    return submit_job(user_id, "geocode_customer", {"customer_id": customer_id, "address": address})
 
-def delete_customer_from_db(customer_id):
-    conn = get_db_connection()
-    if conn is None: return False, "Falha na conexão."
+@instrumented
+def delete_customer_from_db(user_id, customer_id):
+    repo = get_repository()
+    if repo is None: return False, "Falha na conexão."
     try:
-        with conn.cursor() as cursor:
-            cursor.execute('DELETE FROM customers WHERE customer_id = %s', (customer_id,))
-            conn.commit()
-        st.cache_data.clear()
+        repo.delete_customer(user_id, customer_id)
+        mark_tables_stale(user_id)
         return True, "Cliente deletado com sucesso."
-    except psycopg2.errors.ForeignKeyViolation:
-        conn.rollback()
+    except repo.IntegrityError:
         return False, "Este cliente não pode ser deletado pois está associado a um ou mais aluguéis."
-    except psycopg2.Error as e:
-        conn.rollback()
+    except repo.Error as e:
         return False, f"Erro no banco de dados: {e}"
 
-# --- Funções de Aluguel ---
-@st.cache_data
-def get_all_rentals(user_id):
-    conn = get_db_connection()
-    if conn is None: return pd.DataFrame()
-    query = """
-        SELECT r.* FROM rentals r
-        JOIN customers c ON r.customer_id = c.customer_id
-        WHERE c.user_id = %s
-        ORDER BY r.start_date DESC
-    """
-    return pd.read_sql(query, conn, params=(user_id,))
+# --- Busca de Clientes ---
+@st.cache_data(ttl=600, max_entries=1000)
+def _fetch_customer_search(user_id, term, limit, generation=0):
+    return get_repository().search_customers(user_id, term, limit)
+
+@instrumented
+def search_customers(user_id, term, limit=20):
+    """Até `limit` clientes cujo nome, empresa, documento ou telefone casa com `term`."""
+    repo = get_repository()
+    if repo is None: return pd.DataFrame(columns=CUSTOMER_SEARCH_COLUMNS)
+    try:
+        return _fetch_customer_search(user_id, term.strip(), limit, _generation(_fetch_customer_search, user_id))
+    except repo.Error as e:
+        st.error(f"Erro ao buscar clientes: {e}")
+        return pd.DataFrame(columns=CUSTOMER_SEARCH_COLUMNS)
+
+# --- Clientes Duplicados ---
+@st.cache_data(ttl=600)
+def _fetch_customer_duplicates(user_id, generation=0):
+    return get_repository().list_customer_duplicates(user_id)
+
+@instrumented
+def get_customer_duplicates(user_id):
+    """Pares de possíveis duplicados da última execução do job (duplicates.py)."""
+    repo = get_repository()
+    if repo is None: return pd.DataFrame()
+    try:
+        return _fetch_customer_duplicates(user_id, _generation(_fetch_customer_duplicates, user_id))
+    except repo.Error as e:
+        st.error(f"Erro ao buscar clientes duplicados: {e}")
+        return pd.DataFrame()
+
+@instrumented
+def find_customer_duplicates_in_db(user_id):
+    """Executa o job de duplicados apenas para os clientes do usuário."""
+    repo = get_repository()
+    if repo is None: return False, "Falha na conexão."
+    try:
+        count = duplicates.refresh_duplicates(repo, [user_id])
+    except repo.Error as e:
+        return False, f"Erro no banco de dados: {e}"
+    _invalidate(user_id, _fetch_customer_duplicates)
+    return True, f"{count} possíveis duplicados encontrados."
+
+@instrumented
+def merge_customers_in_db(user_id, keep_id, duplicate_id):
+    repo = get_repository()
+    if repo is None: return False, "Falha na conexão."
+    try:
+        moved = repo.merge_customers(user_id, keep_id, duplicate_id)
+    except ValueError as e:
+        return False, str(e)
+    except repo.Error as e:
+        return False, f"Erro no banco de dados: {e}"
+    mark_tables_stale(user_id)
+    return True, f"Clientes mesclados: {moved} aluguéis transferidos para {keep_id}."
+
+# --- Importação em Lote ---
+@instrumented
+def bulk_import_to_db(user_id, table, frame):
+    """Grava as linhas validadas por bulk_import.validate ('equipments' ou 'customers')."""
+    repo = get_repository()
+    if repo is None: return False, "Falha na conexão."
+    try:
+        inserted, skipped = repo.bulk_insert(table, user_id, frame)
+        mark_tables_stale(user_id)
+    except repo.Error as e:
+        return False, f"Erro no banco de dados: {e}"
+    message = f"{inserted} registros importados com sucesso!"
+    if skipped:
+        examples = ", ".join(str(value) for value in skipped[:5])
+        message += f" {len(skipped)} já estavam cadastrados e foram ignorados (ex.: {examples})."
+    return True, message
 
+# --- Funções de Aluguel ---
+@instrumented
+@table_cache(key="rental_id", schema=RENTAL_SCHEMA, sort_by="start_date", ascending=False)
+def get_all_rentals(user_id, columns=None, since=None):
+    repo = get_repository()
+    if repo is None: return None
+    return repo.sync_frame("rentals", user_id, columns, since)
+
+@instrumented
 def add_rentals_to_db(user_id, customer_id, equipment_ids, start_date, end_date, valor, freight_cost=0):
-    conn = get_db_connection()
-    if conn is None: return False, "Falha na conexão."
-    sql = "INSERT INTO rentals (user_id, rental_id, customer_id, equipment_id, start_date, end_date, status, payment_status, valor, freight_cost) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+    repo = get_repository()
+    if repo is None: return False, "Falha na conexão."
     try:
-        with conn.cursor() as cursor:
-            cursor.execute('SELECT rental_id FROM rentals ORDER BY rental_id DESC LIMIT 1')
-            last_id = cursor.fetchone()
-            last_num = 0
-            if last_id:
-                last_num = int(last_id[0].replace("RENT", ""))
-            for i, equipment_id in enumerate(equipment_ids):
-                new_rental_id = f"RENT{last_num + 1 + i:03d}"
-                cursor.execute(sql, (user_id, new_rental_id, customer_id, equipment_id, start_date, end_date, "Ativo", "Em Aberto", valor, freight_cost))
-                cursor.execute('UPDATE equipments SET status = %s, times_rented = times_rented + 1 WHERE equipment_id = %s', ("Alugado", equipment_id))
-            conn.commit()
-        st.cache_data.clear()
+        rental_ids = repo.add_rentals(user_id, customer_id, equipment_ids, start_date, end_date, valor, freight_cost)
+        mark_tables_stale(user_id)
+        _refresh_rental_alerts(repo, user_id, rental_ids)
         return True, "Aluguel criado com sucesso!"
-    except psycopg2.Error as e:
-        conn.rollback()
+    except repo.IntegrityError:
+        return False, "Um ou mais equipamentos já estão reservados em parte desse período."
+    except repo.Error as e:
         return False, f"Erro no banco de dados: {e}"
 
-def complete_rental_in_db(rental_id, equipment_id):
-    conn = get_db_connection()
-    if conn is None: return False, "Falha na conexão."
+@instrumented
+def complete_rental_in_db(user_id, rental_id, equipment_id):
+    repo = get_repository()
+    if repo is None: return False, "Falha na conexão."
     try:
-        with conn.cursor() as cursor:
-            cursor.execute('UPDATE rentals SET status = %s WHERE rental_id = %s', ("Concluído", rental_id))
-            cursor.execute('UPDATE equipments SET status = %s WHERE equipment_id = %s', ("Disponível", equipment_id))
-            conn.commit()
-        st.cache_data.clear()
+        repo.complete_rental(user_id, rental_id, equipment_id)
+        mark_tables_stale(user_id)
+        _refresh_rental_alerts(repo, user_id, [rental_id])
         return True, "Aluguel marcado como concluído."
-    except psycopg2.Error as e:
-        conn.rollback()
+    except repo.Error as e:
         return False, f"Erro no banco de dados: {e}"
 
-def update_rental_in_db(rental_id, column, value):
-    conn = get_db_connection()
-    if conn is None: return
+@instrumented
+def update_rental_in_db(user_id, rental_id, column, value):
+    repo = get_repository()
+    if repo is None: return
     try:
-        with conn.cursor() as cursor:
-            query = f'UPDATE rentals SET {column} = %s WHERE rental_id = %s'
-            cursor.execute(query, (value, rental_id))
-            conn.commit()
-        st.cache_data.clear()
-    except psycopg2.Error as e:
-        conn.rollback()
+        repo.update_rental(user_id, rental_id, column, value)
+        mark_tables_stale(user_id)
+        _refresh_rental_alerts(repo, user_id, [rental_id])
+    except repo.Error as e:
         st.error(f"Erro ao atualizar aluguel: {e}")
 
+# --- Aluguéis Arquivados ---
+# Lidos só quando o histórico arquivado é pedido (archive.py); não passam pelo
+# cache incremental dos quadros.
+@st.cache_data(ttl=600)
+def _fetch_archived_rentals(user_id, columns=None, generation=0):
+    return apply_schema(get_repository().list_archived_rentals(user_id, columns), RENTAL_SCHEMA)
+
+@instrumented
+def get_archived_rentals(user_id, columns=None):
+    """Aluguéis arquivados do usuário (tabela rentals_archive), em cache."""
+    repo = get_repository()
+    if repo is None: return pd.DataFrame(columns=columns)
+    try:
+        return _fetch_archived_rentals(user_id, columns, _generation(_fetch_archived_rentals, user_id))
+    except repo.Error as e:
+        st.error(f"Erro ao buscar o histórico arquivado: {e}")
+        return pd.DataFrame(columns=columns)
+
+# --- Alertas de Devolução ---
+# Calculados pelo job agendado (alerts.py); as escritas acima recalculam apenas os
+# alertas dos aluguéis alterados.
+def _refresh_rental_alerts(repo, user_id, rental_ids):
+    alerts.refresh_alerts(repo, rental_ids, user_id)
+    _invalidate(user_id, _fetch_rental_alerts)
+
+@st.cache_data(ttl=600)
+def _fetch_rental_alerts(user_id, generation=0):
+    repo = get_repository()
+    if not alerts.alerts_are_current(repo):
+        # O job não rodou hoje (ou ainda não foi agendado): calcula só os do usuário.
+        if alerts.sync_equipment_status(repo, user_id):
+            get_all_equipments.mark_stale(user_id)
+        alerts.refresh_alerts(repo, user_id=user_id)
+    return repo.list_rental_alerts(user_id)
+
+@instrumented
+def get_rental_alerts(user_id):
+    """Alertas do usuário (rental_id, kind, end_date); kind é alerts.OVERDUE ou alerts.DUE_SOON."""
+    empty = pd.DataFrame(columns=["rental_id", "kind", "end_date"])
+    repo = get_repository()
+    if repo is None: return empty
+    try:
+        return _fetch_rental_alerts(user_id, _generation(_fetch_rental_alerts, user_id))
+    except repo.Error as e:
+        st.error(f"Erro ao buscar alertas de devolução: {e}")
+        return empty
+
+# --- Utilização dos Equipamentos ---
+@st.cache_data(ttl=3600)
+def _fetch_equipment_utilization(user_id, window_start, window_end, generation=0):
+    columns = PAGE_COLUMNS["1_Inventario"]
+    equipment_df = get_all_equipments(user_id, columns["equipments"])
+    rentals_df = get_all_rentals(user_id, columns["rentals"])
+    if equipment_df.empty:
+        return pd.DataFrame(columns=analytics.UTILIZATION_COLUMNS)
+    if rentals_df.empty:
+        rentals_df = pd.DataFrame(columns=columns["rentals"])
+    return analytics.equipment_utilization(equipment_df, rentals_df, window_start, window_end)
+
+@instrumented
+def get_equipment_utilization(user_id, window_start, window_end):
+    """Utilização por equipamento na janela (analytics.equipment_utilization), em cache."""
+    return _fetch_equipment_utilization(user_id, window_start, window_end,
+                                        _generation(_fetch_equipment_utilization, user_id))
+
+# --- Receita Reconhecida ---
+@st.cache_data(ttl=3600)
+def _fetch_daily_revenue(user_id, include_archive=False, generation=0):
+    columns = PAGE_COLUMNS["4_Financeiro"]["rentals"]
+    rentals_df = get_all_rentals(user_id, columns)
+    if include_archive:
+        archived_df = get_archived_rentals(user_id, columns)
+        if not archived_df.empty:
+            rentals_df = pd.concat([rentals_df, archived_df], ignore_index=True)
+    return revenue.daily_revenue(rentals_df)
+
+@instrumented
+def get_daily_revenue(user_id, include_archive=False):
+    """
+    Receita pró-rata por dia do usuário (revenue.daily_revenue), em cache. Por
+    padrão só dos aluguéis não arquivados; `include_archive` soma o arquivo.
+    """
+    return _fetch_daily_revenue(user_id, include_archive, _generation(_fetch_daily_revenue, user_id))
+
+@instrumented
+def get_revenue_series(user_id, freq="M", include_archive=False):
+    """Receita reconhecida por mês ("M") ou semana ("W")."""
+    daily = _fetch_daily_revenue(user_id, include_archive, _generation(_fetch_daily_revenue, user_id))
+    return revenue.revenue_series(daily, freq)
+
+# --- Exportação dos Lançamentos ---
+@instrumented
+def export_entries_to_file(user_id, fmt):
+    """
+    Grava os lançamentos do usuário em um arquivo temporário, em blocos (exports.py).
+    Retorna (True, caminho) ou (False, mensagem); quem chama remove o arquivo.
+    """
+    with tempfile.NamedTemporaryFile(suffix="." + exports.FORMATS[fmt]["extension"], delete=False) as output:
+        path = output.name
+        try:
+            exports.export_entries(user_id, fmt, output.file)
+            return True, path
+        except CONNECTION_ERRORS as e:
+            error = f"Erro no banco de dados: {e}"
+        except ImportError as e:
+            error = f"Formato indisponível neste servidor: {e}"
+    os.remove(path)
+    return False, error
+
 # --- Funções de Configurações do Usuário ---
 
+@st.cache_data
+def _fetch_user_settings(user_id, generation=0):
+    # Erros não ficam em cache: a exceção é tratada em get_user_settings.
+    return get_repository().get_user_settings(user_id)
+
+@instrumented
 def get_user_settings(user_id):
-    conn = get_db_connection()
-    if conn is None: return {"fuel_consumption": 10.0, "fuel_cost": 5.50}
+    repo = get_repository()
+    if repo is None: return {"fuel_consumption": 10.0, "fuel_cost": 5.50}
     try:
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT fuel_consumption, fuel_cost FROM user_settings WHERE user_id = %s", (user_id,))
-            settings = cursor.fetchone()
-            if settings:
-                # Ensure conversion to float, handling potential non-numeric values
-                try:
-                    fuel_consumption = float(settings[0]) if settings[0] is not None else 10.0
-                except (ValueError, TypeError):
-                    fuel_consumption = 10.0 # Default if conversion fails
-
-                try:
-                    fuel_cost = float(settings[1]) if settings[1] is not None else 5.50
-                except (ValueError, TypeError):
-                    fuel_cost = 5.50 # Default if conversion fails
-
-                return {"fuel_consumption": fuel_consumption, "fuel_cost": fuel_cost}
-            else:
-                return {"fuel_consumption": 10.0, "fuel_cost": 5.50}
-    except psycopg2.Error as e:
+        settings = _fetch_user_settings(user_id, _generation(_fetch_user_settings, user_id))
+        if settings:
+            # Ensure conversion to float, handling potential non-numeric values
+            try:
+                fuel_consumption = float(settings[0]) if settings[0] is not None else 10.0
+            except (ValueError, TypeError):
+                fuel_consumption = 10.0 # Default if conversion fails
+
+            try:
+                fuel_cost = float(settings[1]) if settings[1] is not None else 5.50
+            except (ValueError, TypeError):
+                fuel_cost = 5.50 # Default if conversion fails
+
+            return {"fuel_consumption": fuel_consumption, "fuel_cost": fuel_cost}
+        else:
+            return {"fuel_consumption": 10.0, "fuel_cost": 5.50}
+    except repo.Error as e:
         st.error(f"Erro ao buscar configurações do usuário: {e}")
         return {"fuel_consumption": 10.0, "fuel_cost": 5.50}
 
+@instrumented
 def update_user_settings(user_id, fuel_consumption, fuel_cost):
-    conn = get_db_connection()
-    if conn is None: return False, "Falha na conexão."
+    repo = get_repository()
+    if repo is None: return False, "Falha na conexão."
     try:
-        with conn.cursor() as cursor:
-            # Upsert (Insert or Update)
-            cursor.execute("""
-                INSERT INTO user_settings (user_id, fuel_consumption, fuel_cost)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (user_id) DO UPDATE
-                SET fuel_consumption = EXCLUDED.fuel_consumption,
-                    fuel_cost = EXCLUDED.fuel_cost;
-            """, (user_id, fuel_consumption, fuel_cost))
-            conn.commit()
+        repo.save_user_settings(user_id, fuel_consumption, fuel_cost)
+        _invalidate(user_id, _fetch_user_settings)
         return True, "Configurações salvas com sucesso!"
-    except psycopg2.Error as e:
-        conn.rollback()
+    except repo.Error as e:
         return False, f"Erro no banco de dados: {e}"
 
 # --- Funções de Endereços do Usuário ---
 
+@instrumented
 def get_user_addresses(user_id):
-    conn = get_db_connection()
-    if conn is None: return pd.DataFrame()
-    return pd.read_sql("SELECT * FROM user_addresses WHERE user_id = %s ORDER BY address_name", conn, params=(user_id,))
+    repo = get_repository()
+    if repo is None: return pd.DataFrame()
+    return repo.list_user_addresses(user_id)
 
+@instrumented
 def add_user_address(user_id, address_name, address):
-    conn = get_db_connection()
-    if conn is None: return False, "Falha na conexão."
+    """Agenda a geocodificação e o cadastro do endereço; retorna (True, id do job) ou (False, mensagem)."""
+    return submit_job(user_id, "add_user_address", {"address_name": address_name, "address": address})
+
+@instrumented
+def delete_user_address(user_id, address_id):
+    repo = get_repository()
+    if repo is None: return False, "Falha na conexão."
     try:
-        location = geolocator.geocode(address)
-        if not location:
-            return False, "Endereço não encontrado ou inválido."
-
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                INSERT INTO user_addresses (user_id, address_name, address, latitude, longitude)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (user_id, address_name, address, location.latitude, location.longitude))
-            conn.commit()
-        return True, "Endereço adicionado com sucesso!"
-    except psycopg2.Error as e:
-        conn.rollback()
+        repo.delete_user_address(user_id, address_id)
+        return True, "Endereço deletado com sucesso."
+    except repo.Error as e:
         return False, f"Erro no banco de dados: {e}"
 
-def delete_user_address(address_id):
-    conn = get_db_connection()
-    if conn is None: return False, "Falha na conexão."
+# --- Jobs em Segundo Plano ---
+# Trabalho lento (rede, PDF) sai do rerun das páginas: a página agenda o job e
+# acompanha o status (jobs.py e job_status.py).
+@instrumented
+def submit_job(user_id, kind, payload):
+    """Agenda um job; retorna (True, id do job) ou (False, mensagem)."""
+    repo = get_repository()
+    if repo is None: return False, "Falha na conexão."
     try:
-        with conn.cursor() as cursor:
-            cursor.execute("DELETE FROM user_addresses WHERE id = %s", (address_id,))
-            conn.commit()
-        return True, "Endereço deletado com sucesso."
-    except psycopg2.Error as e:
-        conn.rollback()
-        return False, f"Erro no banco de dados: {e}"
\ No newline at end of file
+        return True, jobs.submit(repo, user_id, kind, payload)
+    except repo.Error as e:
+        return False, f"Erro no banco de dados: {e}"
+
+@instrumented
+def submit_upload(user_id, kind, row_id, uploaded_file):
+    """
+    Grava o arquivo do st.file_uploader em jobs.JOBS_DIR e agenda o envio para o
+    FileStack (kind 'upload_customer_document' ou 'upload_signed_contract').
+    """
+    from file_management import save_temp_file  # importa o cliente do FileStack só quando há upload
+
+    id_column = "customer_id" if kind == "upload_customer_document" else "rental_id"
+    path = save_temp_file(uploaded_file, os.path.join(jobs.JOBS_DIR, "uploads"))
+    return submit_job(user_id, kind, {id_column: row_id, "path": path})
+
+@instrumented
+def get_job_status(user_id, job_id):
+    """Status do job (jobs.get_job), ou None se não existe ou houve erro."""
+    repo = get_repository()
+    if repo is None: return None
+    try:
+        return jobs.get_job(repo, user_id, job_id)
+    except repo.Error as e:
+        st.error(f"Erro ao consultar o job: {e}")
+        return None
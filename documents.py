@@ -0,0 +1,69 @@
+"""
+Validação de CPF e CNPJ em lote.
+
+Os dígitos verificadores são calculados com NumPy sobre matrizes de dígitos (uma
+linha por documento), sem laços por documento: usado no cadastro de clientes, na
+edição da lista do CRM e na importação de planilhas (bulk_import.py). Segue as
+mesmas regras do validate_docbr: 11 dígitos para CPF, 14 para CNPJ, e números com
+todos os dígitos iguais são inválidos.
+"""
+import numpy as np
+import pandas as pd
+
+DOCUMENT_LENGTHS = {"CPF": 11, "CNPJ": 14}
+_CPF_WEIGHTS = (np.arange(10, 1, -1), np.arange(11, 1, -1))
+_CNPJ_WEIGHTS = (np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]), np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]))
+
+
+def normalize_documents(numbers):
+    """Mantém apenas os dígitos (pontos, traços e barras são removidos)."""
+    return pd.Series(numbers, dtype="string").str.replace(r"\D", "", regex=True)
+
+
+def infer_document_type(digits):
+    """'CPF' para 11 dígitos, 'CNPJ' para 14, NA nos demais."""
+    return digits.str.len().map({length: kind for kind, length in DOCUMENT_LENGTHS.items()}).astype("string")
+
+
+def _digit_matrix(digits, length):
+    return np.frombuffer("".join(digits).encode("ascii"), dtype=np.uint8).reshape(-1, length).astype(np.int64) - 48
+
+
+def _cpf_valid(matrix):
+    first = (matrix[:, :9] @ _CPF_WEIGHTS[0]) * 10 % 11 % 10
+    second = (matrix[:, :10] @ _CPF_WEIGHTS[1]) * 10 % 11 % 10
+    return (matrix[:, 9] == first) & (matrix[:, 10] == second)
+
+
+def _cnpj_valid(matrix):
+    remainder = (matrix[:, :12] @ _CNPJ_WEIGHTS[0]) % 11
+    first = np.where(remainder < 2, 0, 11 - remainder)
+    remainder = (matrix[:, :13] @ _CNPJ_WEIGHTS[1]) % 11
+    second = np.where(remainder < 2, 0, 11 - remainder)
+    return (matrix[:, 12] == first) & (matrix[:, 13] == second)
+
+
+def validate_documents(numbers, doc_types=None):
+    """
+    Valida CPFs e CNPJs. `doc_types` é um tipo ('CPF'/'CNPJ') para todos, um tipo
+    por documento ou None; tipos ausentes são inferidos pelo número de dígitos.
+    Retorna (válidos, dígitos): máscara booleana NumPy e os números normalizados
+    (pd.Series de texto).
+    """
+    digits = normalize_documents(numbers)
+    if isinstance(doc_types, str):
+        kinds = pd.Series(doc_types.upper(), index=digits.index, dtype="string")
+    else:
+        kinds = pd.Series(doc_types, index=digits.index, dtype="string").str.upper()
+        kinds = kinds.fillna(infer_document_type(digits))
+    valid = np.zeros(len(digits), dtype=bool)
+    lengths = digits.str.len()
+    for kind, check in (("CPF", _cpf_valid), ("CNPJ", _cnpj_valid)):
+        length = DOCUMENT_LENGTHS[kind]
+        selected = (kinds.eq(kind) & lengths.eq(length)).fillna(False).to_numpy(dtype=bool)
+        if not selected.any():
+            continue
+        matrix = _digit_matrix(digits[selected].tolist(), length)
+        repeated = (matrix == matrix[:, :1]).all(axis=1)
+        valid[selected] = check(matrix) & ~repeated
+    return valid, digits
@@ -0,0 +1,180 @@
+"""
+Detecção de clientes duplicados.
+
+Comparar todos os pares de clientes é quadrático; por isso os candidatos são
+agrupados antes (blocagem) por chaves normalizadas: documento (só os dígitos),
+telefone (últimos 8 dígitos), email, cada palavra do nome e cada par de palavras do nome (um erro de digitação
+em uma palavra mantém os pares das outras). Só os clientes de um mesmo bloco são
+comparados, com a semelhança dos nomes do difflib. Blocos com mais de
+MAX_BLOCK_SIZE clientes (um sobrenome comum, por exemplo) não geram pares.
+
+Um par é candidato quando os nomes são muito parecidos (NAME_THRESHOLD) ou quando
+há telefone ou email em comum e os nomes são razoavelmente parecidos
+(CONTACT_NAME_THRESHOLD). Sem contato em comum, nomes que diferem em mais de uma
+palavra, ou em uma palavra com outra inicial ou tamanho bem diferente, são
+descartados antes do difflib. O mesmo documento (com outra formatação) sempre
+gera o par. Documentos diferentes não o descartam, pois o cadastro exige um
+documento e o recadastro costuma trazer outro (CNPJ em vez de CPF, dígito
+errado): a semelhança só é reduzida em DOCUMENT_PENALTY.
+
+O job grava os pares em customer_duplicates (migração 0009), e a página do CRM
+mostra o relatório e mescla o par escolhido (Repository.merge_customers).
+
+Uso (cron, ex.: uma vez por noite):
+    python duplicates.py run [--user USUARIO]
+"""
+import argparse
+import sys
+from difflib import SequenceMatcher
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from documents import normalize_documents
+from repository import create_repository
+
+MAX_BLOCK_SIZE = 50
+# Palavras do nome usadas nos pares (limita as combinações de nomes longos).
+MAX_NAME_TOKENS = 5
+NAME_THRESHOLD = 0.85
+CONTACT_NAME_THRESHOLD = 0.5
+DOCUMENT_PENALTY = 0.05
+CUSTOMER_COLUMNS = ("customer_id", "full_name", "phone_number", "email_address", "document_number")
+DUPLICATE_COLUMNS = ["customer_id", "duplicate_id", "score", "reasons"]
+# Palavras que não identificam ninguém (preposições e sufixos de empresa).
+STOPWORDS = {"da", "das", "de", "do", "dos", "e", "ltda", "me", "epp", "eireli", "sa"}
+REASONS = {"doc": "documento", "email": "email", "nome": "nome", "tel": "telefone"}
+
+
+def normalize_names(names):
+    """Nomes sem acentos, em minúsculas, só com letras e dígitos, sem STOPWORDS."""
+    text = (names.fillna("").astype(str).str.normalize("NFKD")
+            .str.encode("ascii", "ignore").str.decode("ascii")
+            .str.lower().str.replace(r"[^a-z0-9]+", " ", regex=True))
+    return text.str.split().map(lambda tokens: " ".join(t for t in tokens if t not in STOPWORDS))
+
+
+def _name_words(names):
+    return names.str.split().map(lambda tokens: sorted({t for t in tokens[:MAX_NAME_TOKENS] if len(t) > 2}))
+
+
+def _blocking_keys(customers, words, documents):
+    phones = customers["phone_number"].fillna("").astype(str).str.replace(r"\D", "", regex=True)
+    emails = customers["email_address"].fillna("").astype(str).str.strip().str.lower()
+    tokens = words.explode().dropna()
+    token_pairs = words.map(lambda tokens: [" ".join(pair) for pair in combinations(tokens, 2)]).explode().dropna()
+    ids = customers["customer_id"]
+    keys = pd.concat([
+        pd.DataFrame({"customer_id": ids, "kind": "doc", "key": documents})[documents != ""],
+        pd.DataFrame({"customer_id": ids, "kind": "tel", "key": phones.str[-8:]})[phones.str.len() >= 8],
+        pd.DataFrame({"customer_id": ids, "kind": "email", "key": emails})[emails != ""],
+        pd.DataFrame({"customer_id": ids.reindex(tokens.index), "kind": "nome", "key": tokens}),
+        pd.DataFrame({"customer_id": ids.reindex(token_pairs.index), "kind": "nome", "key": token_pairs}),
+    ], ignore_index=True).drop_duplicates()
+    sizes = keys.groupby(["kind", "key"])["customer_id"].transform("size")
+    return keys[(sizes > 1) & (sizes <= MAX_BLOCK_SIZE)]
+
+
+def _words_close(a, b):
+    """No máximo uma palavra diferente de cada lado, com a mesma inicial e tamanho parecido."""
+    only_a, only_b = a - b, b - a
+    if len(only_a) > 1 or len(only_b) > 1:
+        return False
+    if not only_a or not only_b:
+        return True
+    word_a, word_b = next(iter(only_a)), next(iter(only_b))
+    return word_a[0] == word_b[0] and abs(len(word_a) - len(word_b)) <= 2
+
+
+def _similarity(a, b, threshold):
+    """ratio() do difflib, ou 0 quando os limites superiores baratos já ficam abaixo de `threshold`."""
+    matcher = SequenceMatcher(None, a, b)
+    if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+        return 0.0
+    return matcher.ratio()
+
+
+def find_duplicates(customers_df):
+    """
+    Pares de possíveis duplicados entre os clientes de `customers_df` (colunas
+    CUSTOMER_COLUMNS). Retorna um quadro com DUPLICATE_COLUMNS, com o cliente mais
+    antigo em customer_id, ordenado pela semelhança dos nomes.
+    """
+    if customers_df.empty:
+        return pd.DataFrame(columns=DUPLICATE_COLUMNS)
+    customers = customers_df.reset_index(drop=True)
+    names = normalize_names(customers["full_name"])
+    words = _name_words(names)
+    documents = normalize_documents(customers["document_number"]).fillna("").to_numpy(dtype=object)
+    keys = _blocking_keys(customers, words, documents)
+    # Ordem de cadastro pelo número do ID (CUST999 vem antes de CUST1000).
+    order = pd.Series(customers["customer_id"].str.extract(r"(\d+)$", expand=False).astype(float).to_numpy(),
+                      index=customers["customer_id"])
+    keys = keys.assign(order=keys["customer_id"].map(order))
+    pairs = keys.merge(keys, on=["kind", "key"], suffixes=("", "_dup"))
+    pairs = pairs[pairs["order"] < pairs["order_dup"]]
+    if pairs.empty:
+        return pd.DataFrame(columns=DUPLICATE_COLUMNS)
+    pairs = (pairs.assign(**{kind: pairs["kind"] == kind for kind in REASONS})
+             .groupby(["customer_id", "customer_id_dup"])[list(REASONS)].any()
+             .reset_index())
+
+    by_id = pd.DataFrame({"name": names.to_numpy(), "words": words.map(set).to_numpy(),
+                          "document": documents}, index=customers["customer_id"])
+    left = by_id.loc[pairs["customer_id"]].to_numpy()
+    right = by_id.loc[pairs["customer_id_dup"]].to_numpy()
+    same_document = pairs["doc"].to_numpy(dtype=bool)
+    has_contact = (pairs["tel"] | pairs["email"]).to_numpy(dtype=bool)
+    thresholds = np.where(same_document, 0.0, np.where(has_contact, CONTACT_NAME_THRESHOLD, NAME_THRESHOLD))
+    penalties = np.where((left[:, 2] != "") & (right[:, 2] != "") & (left[:, 2] != right[:, 2]), DOCUMENT_PENALTY, 0.0)
+    skip = ~same_document & ~has_contact & np.array([not _words_close(a, b) for a, b in zip(left[:, 1], right[:, 1])],
+                                                    dtype=bool)
+    scores = np.array([0.0 if skipped else max(_similarity(a, b, threshold + penalty) - penalty, 0.0)
+                       for a, b, threshold, penalty, skipped in zip(left[:, 0], right[:, 0], thresholds, penalties, skip)])
+    selected = same_document | ((scores > 0) & (scores >= thresholds))
+    result = pairs[selected]
+    reasons = result[list(REASONS)].apply(lambda row: ", ".join(REASONS[kind] for kind in REASONS if row[kind]), axis=1)
+    return pd.DataFrame({
+        "customer_id": result["customer_id"],
+        "duplicate_id": result["customer_id_dup"],
+        "score": scores[selected].round(3),
+        "reasons": reasons if not result.empty else pd.Series(dtype=str),
+    }).sort_values(["score", "customer_id"], ascending=[False, True]).reset_index(drop=True)
+
+
+def refresh_duplicates(repo, user_ids=None):
+    """Recalcula os pares de cada usuário (todos, se None); retorna o total de pares."""
+    total = 0
+    for user_id in (repo.list_user_ids() if user_ids is None else user_ids):
+        candidates = find_duplicates(repo.list_customers(user_id, CUSTOMER_COLUMNS))
+        repo.replace_customer_duplicates(user_id, candidates)
+        total += len(candidates)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detecção de clientes duplicados do ConcRental.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Recalcula os possíveis duplicados de todos os usuários.")
+    run_parser.add_argument("--user", default=None, help="Recalcula apenas os clientes deste usuário.")
+    args = parser.parse_args(argv)
+
+    repo = create_repository()
+    try:
+        user_ids = None
+        if args.user:
+            user_id = repo.get_user_id(args.user)
+            if user_id is None:
+                print(f"Usuário '{args.user}' não encontrado.", file=sys.stderr)
+                return 1
+            user_ids = [user_id]
+        count = refresh_duplicates(repo, user_ids)
+        print(f"{count} possíveis duplicados encontrados.")
+    finally:
+        repo.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
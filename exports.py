@@ -0,0 +1,135 @@
+"""
+Exportação dos lançamentos (aluguéis com cliente e equipamento) em CSV, XLSX ou
+Parquet, com memória constante.
+
+As linhas são lidas em blocos de CHUNK_SIZE (cursor nomeado no Postgres, ver
+Repository.stream_rows) e cada bloco é gravado no arquivo antes da leitura do
+próximo, então o consumo de memória não depende do número de aluguéis. O XLSX
+usa o modo write-only do openpyxl e o Parquet grava um row group por bloco.
+
+A leitura ocupa uma conexão do início ao fim; por isso cada exportação abre um
+repositório próprio em vez de usar o compartilhado pelo app.
+
+Uso:
+    python exports.py USUARIO [--format csv|xlsx|parquet] [--output ARQUIVO]
+"""
+import argparse
+import csv
+import io
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+
+from repository import ENTRY_COLUMNS, create_repository
+
+CHUNK_SIZE = 10_000
+FORMATS = {
+    "csv": {"extension": "csv", "mime": "text/csv"},
+    "xlsx": {"extension": "xlsx", "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+    "parquet": {"extension": "parquet", "mime": "application/vnd.apache.parquet"},
+}
+HEADERS = list(ENTRY_COLUMNS)
+DATE_COLUMNS = {"start_date", "end_date"}
+MONEY_COLUMNS = {"valor", "freight_cost"}
+
+
+def _normalize(rows):
+    """Datas como datetime (o SQLite as devolve em texto) e valores como float."""
+    date_positions = [i for i, name in enumerate(HEADERS) if name in DATE_COLUMNS]
+    money_positions = [i for i, name in enumerate(HEADERS) if name in MONEY_COLUMNS]
+    for row in rows:
+        row = list(row)
+        for i in date_positions:
+            if isinstance(row[i], str):
+                row[i] = datetime.fromisoformat(row[i])
+            elif isinstance(row[i], date) and not isinstance(row[i], datetime):
+                row[i] = datetime.combine(row[i], datetime.min.time())
+        for i in money_positions:
+            if isinstance(row[i], Decimal):
+                row[i] = float(row[i])
+        yield row
+
+
+def _write_csv(chunks, output):
+    # BOM para o Excel reconhecer o UTF-8 ao abrir o arquivo diretamente.
+    text = io.TextIOWrapper(output, encoding="utf-8-sig", newline="")
+    try:
+        writer = csv.writer(text, delimiter=";")
+        writer.writerow(HEADERS)
+        for chunk in chunks:
+            writer.writerows(_normalize(chunk))
+    finally:
+        text.flush()
+        text.detach()
+
+
+def _write_xlsx(chunks, output):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Lançamentos")
+    sheet.append(HEADERS)
+    for chunk in chunks:
+        for row in _normalize(chunk):
+            sheet.append(row)
+    workbook.save(output)
+
+
+def _write_parquet(chunks, output):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (name, pa.timestamp("us") if name in DATE_COLUMNS else pa.float64() if name in MONEY_COLUMNS else pa.string())
+        for name in HEADERS
+    ])
+    with pq.ParquetWriter(output, schema) as writer:
+        for chunk in chunks:
+            columns = list(zip(*_normalize(chunk)))
+            arrays = [pa.array(values, type=field.type) for values, field in zip(columns, schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+WRITERS = {"csv": _write_csv, "xlsx": _write_xlsx, "parquet": _write_parquet}
+
+
+def export_entries(user_id, fmt, output, chunk_size=CHUNK_SIZE, repo=None):
+    """
+    Grava os lançamentos do usuário em `output` (arquivo binário aberto) no formato
+    `fmt`. Sem `repo`, abre e fecha um repositório próprio.
+    """
+    own_repo = repo is None
+    if own_repo:
+        repo = create_repository()
+    try:
+        WRITERS[fmt](repo.iter_rental_entries(user_id, chunk_size), output)
+    finally:
+        if own_repo:
+            repo.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta os lançamentos de um usuário do ConcRental.")
+    parser.add_argument("username", help="Usuário dono dos lançamentos.")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+    parser.add_argument("--output", default=None, help="Arquivo de saída (padrão: lancamentos_USUARIO.EXT).")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Linhas lidas por bloco.")
+    args = parser.parse_args(argv)
+
+    repo = create_repository()
+    try:
+        user_id = repo.get_user_id(args.username)
+        if user_id is None:
+            print(f"Usuário '{args.username}' não encontrado.", file=sys.stderr)
+            return 1
+        output_path = args.output or f"lancamentos_{args.username}.{FORMATS[args.format]['extension']}"
+        with open(output_path, "wb") as output:
+            export_entries(user_id, args.format, output, args.chunk_size, repo=repo)
+        print(f"Lançamentos exportados para {output_path}")
+    finally:
+        repo.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,10 @@
 import streamlit as st
 from filestack import Client
 import os
+import shutil
+import uuid
+
+TEMP_DIR = "temp_uploads"
 
 def get_filestack_client():
     """Inicializa e retorna o cliente do FileStack com a API Key dos segredos."""
@@ -14,6 +18,32 @@ def get_filestack_client():
         st.error(f"Erro na configuração do FileStack. Verifique o arquivo secrets.toml. Detalhes: {e}")
         return None
 
+def save_temp_file(file_to_upload, directory=TEMP_DIR):
+    """
+    Grava o arquivo do st.file_uploader em uma pasta própria dentro de `directory`,
+    mantendo o nome original (usado pelo FileStack), e retorna o caminho.
+    """
+    folder = os.path.join(directory, uuid.uuid4().hex)
+    os.makedirs(folder, exist_ok=True)
+    temp_filepath = os.path.join(folder, file_to_upload.name)
+    with open(temp_filepath, "wb") as f:
+        f.write(file_to_upload.getvalue())
+    return temp_filepath
+
+def remove_temp_file(temp_filepath):
+    """Remove o arquivo gravado por save_temp_file e a sua pasta."""
+    shutil.rmtree(os.path.dirname(temp_filepath), ignore_errors=True)
+
+def upload_path(filepath):
+    """
+    Envia um arquivo já gravado em disco para o FileStack e retorna a URL. Usado
+    pelos jobs em segundo plano (jobs.py): os erros são propagados.
+    """
+    client = get_filestack_client()
+    if not client:
+        raise ValueError("FileStack não configurado. Verifique o arquivo secrets.toml.")
+    return client.upload(filepath=filepath).url
+
 def upload_file(file_to_upload):
     """
     Faz o upload de um arquivo para o FileStack salvando-o temporariamente no disco.
@@ -22,16 +52,11 @@ def upload_file(file_to_upload):
     if not client:
         return None
 
-    # Criar um caminho temporário para o arquivo
-    temp_dir = "temp_uploads"
-    os.makedirs(temp_dir, exist_ok=True)
-    temp_filepath = os.path.join(temp_dir, file_to_upload.name)
-
+    temp_filepath = None
     try:
         # Salvar o arquivo carregado em um local temporário
-        with open(temp_filepath, "wb") as f:
-            f.write(file_to_upload.getvalue())
-        
+        temp_filepath = save_temp_file(file_to_upload)
+
         # Fazer o upload a partir do caminho do arquivo
         filelink = client.upload(filepath=temp_filepath)
         return filelink.url
@@ -39,8 +64,8 @@ def upload_file(file_to_upload):
     except Exception as e:
         st.error(f"Erro ao fazer upload do arquivo para o FileStack: {e}")
         return None
-        
+
     finally:
         # Garantir que o arquivo temporário seja sempre removido
-        if os.path.exists(temp_filepath):
-            os.remove(temp_filepath)
\ No newline at end of file
+        if temp_filepath:
+            remove_temp_file(temp_filepath)
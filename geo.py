@@ -0,0 +1,56 @@
+"""
+Geocodificação (Nominatim) e rotas (OSRM), com os resultados guardados no cache
+compartilhado (shared_cache.py) para que cada endereço e cada trajeto sejam
+consultados uma única vez por host. Apenas respostas bem-sucedidas são guardadas.
+"""
+import requests
+from geopy.geocoders import Nominatim
+
+from shared_cache import get_lookup, set_lookup
+
+OSRM_URL = "http://router.project-osrm.org/route/v1/driving/"
+# Endereços e ruas mudam pouco; rotas são revistas depois de uma semana.
+ROUTE_MAX_AGE = 7 * 24 * 3600
+ROUTE_TIMEOUT = 10
+
+geolocator = Nominatim(user_agent="concrental_app_v3")
+
+
+def geocode(address, timeout=None):
+    """Retorna (latitude, longitude) do endereço ou None se não encontrado."""
+    cached = get_lookup("geocode", address)
+    if cached is not None:
+        return tuple(cached)
+    location = geolocator.geocode(address, timeout=timeout) if timeout else geolocator.geocode(address)
+    if not location:
+        return None
+    coords = (location.latitude, location.longitude)
+    set_lookup("geocode", address, list(coords))
+    return coords
+
+
+def route_distance_km(start_coords, end_coords, timeout=ROUTE_TIMEOUT):
+    """
+    Distância de carro entre dois pontos (latitude, longitude) pelo OSRM.
+    Retorna (distância_km, None) ou (None, mensagem_de_erro) se o OSRM não encontra
+    a rota. Falhas temporárias (rede, tempo esgotado, HTTP 5xx ou 429, resposta que
+    não é JSON) geram requests.RequestException.
+    """
+    # O OSRM recebe longitude,latitude
+    key = f"{start_coords[1]},{start_coords[0]};{end_coords[1]},{end_coords[0]}"
+    cached = get_lookup("route", key, max_age=ROUTE_MAX_AGE)
+    if cached is not None:
+        return cached, None
+    response = requests.get(f"{OSRM_URL}{key}?overview=false", timeout=timeout)
+    if response.status_code >= 500 or response.status_code == 429:
+        response.raise_for_status()
+    try:
+        data = response.json()
+    except ValueError as e:
+        raise requests.HTTPError(f"Resposta inválida do OSRM (HTTP {response.status_code})", response=response) from e
+    if response.status_code == 200 and data['code'] == 'Ok':
+        # Distance is in meters, convert to kilometers
+        distance_km = data['routes'][0]['distance'] / 1000
+        set_lookup("route", key, distance_km)
+        return distance_km, None
+    return None, data.get('message', 'Erro desconhecido')
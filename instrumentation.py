@@ -0,0 +1,199 @@
+"""
+Instrumentação das chamadas ao banco de dados.
+
+Cada função de db_management.py decorada com `instrumented` registra latência,
+linhas retornadas, bytes (tamanho em memória do resultado), número de consultas
+executadas e erros. As consultas individuais são registradas pelo
+`InstrumentedCursor` (cursor_factory da conexão psycopg2) ou pela
+`InstrumentedSqliteConnection` (factory da conexão sqlite3).
+
+Consultas SELECT mais lentas que CONCRENTAL_SLOW_QUERY_MS podem ter o plano
+amostrado com EXPLAIN ANALYZE (EXPLAIN QUERY PLAN no SQLite), na proporção CONCRENTAL_EXPLAIN_SAMPLE_RATE
+(0 desativa; 1 amostra todas).
+
+As métricas ficam em memória, por processo, e são exibidas na página de diagnóstico.
+"""
+import collections
+import functools
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import psycopg2.extensions
+
+logger = logging.getLogger("concrental.db")
+
+SLOW_QUERY_MS = float(os.environ.get("CONCRENTAL_SLOW_QUERY_MS", "200"))
+EXPLAIN_SAMPLE_RATE = float(os.environ.get("CONCRENTAL_EXPLAIN_SAMPLE_RATE", "0"))
+MAX_RECORDS = 5000
+
+_lock = threading.Lock()
+_call_records = collections.deque(maxlen=MAX_RECORDS)
+_query_records = collections.deque(maxlen=MAX_RECORDS)
+_local = threading.local()
+
+
+def _result_size(result, measure_bytes=True):
+    """Retorna (linhas, bytes) de um resultado; None quando não se aplica."""
+    if isinstance(result, pd.DataFrame):
+        size = int(result.memory_usage(deep=True).sum()) if measure_bytes else None
+        return len(result), size
+    if isinstance(result, list):
+        return len(result), None
+    return None, None
+
+
+def _record_query(query, elapsed_ms, rows, error, plan=None):
+    call = getattr(_local, "call", None)
+    if call is not None:
+        call["queries"] += 1
+        if error:
+            call["error"] = error
+    record = {
+        "timestamp": time.time(),
+        "function": call["function"] if call else None,
+        "query": query.decode() if isinstance(query, bytes) else str(query),
+        "duration_ms": elapsed_ms,
+        "rows": rows,
+        "error": error,
+        "plan": plan,
+    }
+    with _lock:
+        _query_records.append(record)
+    if elapsed_ms >= SLOW_QUERY_MS:
+        logger.warning("Consulta lenta (%.1f ms) em %s: %s", elapsed_ms, record["function"], record["query"].strip())
+
+
+def _timed_execute(cursor, execute, query, params, error_type):
+    """Executa a consulta medindo o tempo e registra o resultado (ou o erro)."""
+    start = time.perf_counter()
+    try:
+        result = execute(query, params)
+    except error_type as e:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        _record_query(query, elapsed_ms, None, f"{type(e).__name__}: {e}".strip())
+        raise
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    plan = cursor._explain(query, params) if _should_explain(query, elapsed_ms) else None
+    rows = cursor.rowcount if cursor.rowcount >= 0 else None
+    _record_query(query, elapsed_ms, rows, None, plan)
+    return result
+
+
+def _should_explain(query, elapsed_ms):
+    if EXPLAIN_SAMPLE_RATE <= 0 or elapsed_ms < SLOW_QUERY_MS or getattr(_local, "explaining", False):
+        return False
+    text = query.decode() if isinstance(query, bytes) else str(query)
+    return text.lstrip().upper().startswith("SELECT") and random.random() < EXPLAIN_SAMPLE_RATE
+
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """Cursor psycopg2 que mede cada execute() e, opcionalmente, amostra EXPLAIN ANALYZE."""
+
+    def execute(self, query, vars=None):
+        if getattr(_local, "explaining", False):
+            return super().execute(query, vars)
+        return _timed_execute(self, super().execute, query, vars, psycopg2.Error)
+
+    def _explain(self, query, vars):
+        _local.explaining = True
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(b"EXPLAIN ANALYZE " + (query if isinstance(query, bytes) else query.encode()), vars)
+                return "\n".join(row[0] for row in cursor.fetchall())
+        except psycopg2.Error as e:
+            return f"EXPLAIN ANALYZE falhou: {e}"
+        finally:
+            _local.explaining = False
+
+
+class InstrumentedSqliteCursor(sqlite3.Cursor):
+    """Cursor sqlite3 que mede cada execute() e, opcionalmente, amostra EXPLAIN QUERY PLAN."""
+
+    def execute(self, sql, parameters=()):
+        if getattr(_local, "explaining", False):
+            return super().execute(sql, parameters)
+        return _timed_execute(self, super().execute, sql, parameters, sqlite3.Error)
+
+    def _explain(self, sql, parameters):
+        _local.explaining = True
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, parameters)
+            return "\n".join(row[-1] for row in cursor.fetchall())
+        except sqlite3.Error as e:
+            return f"EXPLAIN QUERY PLAN falhou: {e}"
+        finally:
+            _local.explaining = False
+
+
+class InstrumentedSqliteConnection(sqlite3.Connection):
+    """Conexão sqlite3 cujos cursores (inclusive os do pandas) são instrumentados."""
+
+    def cursor(self, factory=InstrumentedSqliteCursor):
+        return super().cursor(factory)
+
+
+def instrumented(func):
+    """
+    Registra latência, linhas, bytes, consultas e erros de uma função de acesso a dados.
+    Quando aplicado por fora de um cache (@st.cache_data ou @table_cache), uma chamada
+    que não executou nenhuma consulta é contabilizada como acerto de cache.
+    """
+    cached = hasattr(func, "clear")  # funções de st.cache_data e de table_cache expõem .clear()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        outer_call = getattr(_local, "call", None)
+        call = {"function": func.__name__, "queries": 0, "error": None}
+        _local.call = call
+        start = time.perf_counter()
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception as e:
+            call["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            _local.call = outer_call
+            cache_hit = cached and call["queries"] == 0 and call["error"] is None
+            # O tamanho só é medido quando os dados vieram do banco.
+            rows, size = _result_size(result, measure_bytes=not cache_hit)
+            record = {
+                "timestamp": time.time(),
+                "function": func.__name__,
+                "duration_ms": elapsed_ms,
+                "rows": rows,
+                "bytes": size,
+                "queries": call["queries"],
+                "cached": cached,
+                "cache_hit": cache_hit,
+                "error": call["error"],
+            }
+            with _lock:
+                _call_records.append(record)
+    if cached:
+        wrapper.clear = func.clear
+    return wrapper
+
+
+def get_call_records():
+    with _lock:
+        return list(_call_records)
+
+
+def get_query_records():
+    with _lock:
+        return list(_query_records)
+
+
+def reset_metrics():
+    with _lock:
+        _call_records.clear()
+        _query_records.clear()
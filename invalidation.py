@@ -0,0 +1,82 @@
+"""
+Invalidação dos caches entre processos do servidor via LISTEN/NOTIFY do Postgres.
+
+Os gatilhos da migração 0005 notificam o canal CHANNEL a cada escrita em
+equipments, customers, rentals e user_settings, com o payload "tabela:user_id".
+Cada processo mantém uma thread com uma conexão própria escutando o canal e
+repassa as alterações para `on_change(tabela, user_id)`, que invalida apenas as
+entradas do usuário afetado. Após uma (re)conexão, `on_change(None, None)` é
+chamado, pois notificações podem ter sido perdidas enquanto não havia conexão.
+"""
+import logging
+import select
+import threading
+import time
+
+import psycopg2
+
+logger = logging.getLogger("concrental.invalidation")
+
+CHANNEL = "concrental_changes"
+POLL_TIMEOUT = 5
+RECONNECT_DELAY = 5
+
+_listener = None
+_lock = threading.Lock()
+
+
+def parse_payload(payload):
+    """'rentals:42' -> ('rentals', '42')."""
+    table, _, user_id = payload.partition(":")
+    return table, user_id or None
+
+
+class ChangeListener(threading.Thread):
+    def __init__(self, connect, on_change):
+        super().__init__(name="concrental-change-listener", daemon=True)
+        self.connect = connect
+        self.on_change = on_change
+
+    def run(self):
+        while True:
+            conn = None
+            try:
+                conn = self.connect()
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                self._dispatch({(None, None)})
+                self._listen(conn)
+            except psycopg2.Error as e:
+                logger.warning("Conexão de invalidação perdida (%s); reconectando em %d s", e, RECONNECT_DELAY)
+            finally:
+                if conn is not None:
+                    conn.close()
+            time.sleep(RECONNECT_DELAY)
+
+    def _listen(self, conn):
+        while True:
+            if select.select([conn], [], [], POLL_TIMEOUT) == ([], [], []):
+                continue
+            conn.poll()
+            changes = set()
+            while conn.notifies:
+                changes.add(parse_payload(conn.notifies.pop(0).payload))
+            self._dispatch(changes)
+
+    def _dispatch(self, changes):
+        for table, user_id in changes:
+            try:
+                self.on_change(table, user_id)
+            except Exception:
+                logger.exception("Falha ao invalidar o cache de %s (usuário %s)", table, user_id)
+
+
+def start_change_listener(connect, on_change):
+    """Inicia a thread de escuta deste processo (apenas uma, mesmo se chamada de novo)."""
+    global _listener
+    with _lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = ChangeListener(connect, on_change)
+            _listener.start()
+        return _listener
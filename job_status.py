@@ -0,0 +1,42 @@
+"""
+Acompanhamento dos jobs em segundo plano (jobs.py) nas páginas.
+
+A página agenda o job e guarda o ID em st.session_state; tracked_job mostra o
+andamento em um fragmento que consulta o status a cada POLL_SECONDS sem rodar a
+página inteira, e roda a página de novo quando o job termina.
+"""
+import streamlit as st
+
+from db_management import get_job_status
+from jobs import FINISHED, PENDING
+
+POLL_SECONDS = 2
+
+
+def tracked_job(user_id, session_key, message):
+    """
+    Job guardado em st.session_state[session_key]. Enquanto está na fila ou em
+    execução, mostra `message` e retorna None; quando termina, retorna o job uma
+    única vez (dict de jobs.get_job, com status jobs.DONE ou jobs.FAILED) e o
+    remove da sessão.
+    """
+    job_id = st.session_state.get(session_key)
+    if job_id is None:
+        return None
+    job = get_job_status(user_id, job_id)
+    if job is None or job["status"] in FINISHED:
+        del st.session_state[session_key]
+        return job
+    _poll(user_id, job_id, message)
+    return None
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def _poll(user_id, job_id, message):
+    job = get_job_status(user_id, job_id)
+    if job is None or job["status"] in FINISHED:
+        st.rerun()
+    if job["status"] == PENDING and job["attempts"]:
+        st.warning(f"{message} Nova tentativa ({job['attempts'] + 1} de {job['max_attempts']}): {job['error']}")
+    else:
+        st.info(f"{message} ({job['status'].lower()}...)")
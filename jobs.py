@@ -0,0 +1,337 @@
+"""
+Jobs em segundo plano com fila persistente.
+
+Geocodificação, rotas do OSRM, uploads para o FileStack e PDFs de contratos não
+rodam mais dentro do rerun da página: a página grava o job na tabela jobs
+(migração 0012) com submit(), guarda o ID em st.session_state e acompanha o
+status com get_job() (ver job_status.py). Os workers reservam o próximo job
+pendente com SELECT ... FOR UPDATE SKIP LOCKED (no SQLite, o UPDATE que reserva o
+job é serializado pelo banco), então vários workers, no mesmo processo ou em
+outros, nunca executam o mesmo job.
+
+Um job que falha volta para a fila com espera exponencial (RETRY_DELAY, 2x, 4x...)
+até max_attempts tentativas; ValueError indica erro definitivo (endereço não
+encontrado, por exemplo) e encerra o job sem nova tentativa. Jobs em execução há
+mais de STALE_AFTER segundos (worker encerrado no meio) voltam para a fila.
+
+O app inicia WORKERS threads por processo (CONCRENTAL_JOB_WORKERS; 0 desativa) ao
+criar o repositório. Workers dedicados e manutenção:
+    python jobs.py work [--workers N] [--once]
+    python jobs.py status
+    python jobs.py purge [--days N]
+
+Os arquivos dos jobs (uploads aguardando envio e PDFs gerados) ficam em
+CONCRENTAL_JOBS_DIR (padrão job_files/), no disco do servidor: workers em outros
+hosts precisam do mesmo diretório compartilhado.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from repository import CONNECTION_ERRORS, create_repository
+
+logger = logging.getLogger("concrental.jobs")
+
+PENDING = "Pendente"
+RUNNING = "Executando"
+DONE = "Concluído"
+FAILED = "Falhou"
+FINISHED = (DONE, FAILED)
+WORKERS = int(os.environ.get("CONCRENTAL_JOB_WORKERS", 2))
+JOBS_DIR = os.environ.get("CONCRENTAL_JOBS_DIR", "job_files")
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 10
+STALE_AFTER = 600
+POLL_INTERVAL = 5
+RECONNECT_DELAY = 5
+PURGE_AFTER_DAYS = 7
+JOB_COLUMNS = ("id", "kind", "status", "attempts", "max_attempts", "result", "error")
+
+# Tipo do job -> (função, tabela alterada). A função recebe (repo, user_id,
+# payload) e retorna o resultado (JSON); a tabela alterada é invalidada no cache
+# do app ao concluir o job.
+HANDLERS = {}
+
+_runner = None
+_lock = threading.Lock()
+
+
+def handler(kind, changes=None):
+    """Registra a função que executa os jobs do tipo `kind`."""
+    def decorator(func):
+        HANDLERS[kind] = (func, changes)
+        return func
+    return decorator
+
+
+# --- Tipos de job ---
+@handler("geocode_customer", changes="customers")
+def _geocode_customer(repo, user_id, payload):
+    import geo
+
+    coords = geo.geocode(payload["address"] + ", Curitiba, Brazil", timeout=10)
+    if not coords:
+        raise ValueError("Endereço não encontrado.")
+    repo.update_customer(user_id, payload["customer_id"], {"latitude": coords[0], "longitude": coords[1]})
+    return {"latitude": coords[0], "longitude": coords[1]}
+
+
+@handler("add_user_address")
+def _add_user_address(repo, user_id, payload):
+    import geo
+
+    coords = geo.geocode(payload["address"])
+    if not coords:
+        raise ValueError("Endereço não encontrado ou inválido.")
+    repo.add_user_address(user_id, payload["address_name"], payload["address"], coords[0], coords[1])
+    return {"latitude": coords[0], "longitude": coords[1]}
+
+
+@handler("freight_route")
+def _freight_route(repo, user_id, payload):
+    import geo
+    import requests
+
+    customer_coords = geo.geocode(payload["address"])
+    if not customer_coords:
+        raise ValueError("Não foi possível encontrar as coordenadas para o endereço do cliente. "
+                         "Verifique o endereço cadastrado no CRM.")
+    try:
+        distance_km, route_error = geo.route_distance_km(tuple(payload["start_coords"]), customer_coords)
+    except requests.RequestException as e:
+        # OSRM fora do ar ou sem rede: o job volta para a fila. Algumas exceções do
+        # requests também são ValueError, que encerraria o job.
+        raise ConnectionError(f"OSRM indisponível: {e}") from e
+    if route_error is not None:
+        raise ValueError(f"Erro ao calcular rota com OSRM: {route_error}")
+    return {"distance_km": distance_km}
+
+
+def _upload(payload):
+    from file_management import remove_temp_file, upload_path
+
+    try:
+        url = upload_path(payload["path"])
+    except ValueError:
+        remove_temp_file(payload["path"])
+        raise
+    remove_temp_file(payload["path"])
+    return url
+
+
+@handler("upload_customer_document", changes="customers")
+def _upload_customer_document(repo, user_id, payload):
+    url = _upload(payload)
+    repo.update_customer(user_id, payload["customer_id"], {"document_path": url})
+    return {"url": url}
+
+
+@handler("upload_signed_contract", changes="rentals")
+def _upload_signed_contract(repo, user_id, payload):
+    url = _upload(payload)
+    repo.update_rental(user_id, payload["rental_id"], "signed_contract_path", url)
+    return {"url": url}
+
+
+@handler("contract_pdf")
+def _contract_pdf(repo, user_id, payload):
+    from pdf_generator import create_contract_pdf
+
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    path = os.path.join(JOBS_DIR, f"contrato_{payload['rental_id']}_{time.time_ns()}.pdf")
+    with open(path, "wb") as output:
+        output.write(create_contract_pdf(payload))
+    return {"path": path}
+
+
+# --- Fila ---
+def submit(repo, user_id, kind, payload, max_attempts=MAX_ATTEMPTS):
+    """Grava um job na fila e acorda os workers deste processo; retorna o ID do job."""
+    if kind not in HANDLERS:
+        raise ValueError(f"Tipo de job desconhecido: {kind}")
+    job_id = repo.enqueue_job(user_id, kind, json.dumps(payload), max_attempts, datetime.now())
+    if _runner is not None:
+        _runner.wake()
+    return job_id
+
+
+def get_job(repo, user_id, job_id):
+    """Job do usuário como dicionário (JOB_COLUMNS, com o resultado decodificado), ou None."""
+    row = repo.get_job(user_id, job_id)
+    if row is None:
+        return None
+    job = dict(zip(JOB_COLUMNS, row))
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def retry_delay(attempts):
+    """Espera antes da próxima tentativa: RETRY_DELAY, 2x, 4x, ..."""
+    return timedelta(seconds=RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def run_next(repo, on_change=None):
+    """
+    Executa o próximo job pendente. Retorna False se a fila está vazia. `on_change`
+    recebe (tabela, user_id) quando um job concluído alterou uma tabela em cache.
+    """
+    claimed = repo.claim_job(datetime.now())
+    if claimed is None:
+        return False
+    job_id, user_id, kind, payload, attempts, max_attempts = claimed
+    func, changes = HANDLERS.get(kind, (None, None))
+    try:
+        if func is None:
+            raise ValueError(f"Tipo de job desconhecido: {kind}")
+        result = func(repo, user_id, json.loads(payload))
+    except ValueError as e:
+        repo.fail_job(job_id, str(e), datetime.now())
+        return True
+    except Exception as e:
+        logger.exception("Job %s (%s) falhou na tentativa %d de %d", job_id, kind, attempts, max_attempts)
+        now = datetime.now()
+        repo.fail_job(job_id, str(e), now, now + retry_delay(attempts) if attempts < max_attempts else None)
+        return True
+    repo.finish_job(job_id, json.dumps(result), datetime.now())
+    if changes and on_change is not None:
+        on_change(changes, str(user_id))
+    return True
+
+
+def run_pending(repo, on_change=None):
+    """Executa os jobs pendentes até esvaziar a fila; retorna quantos foram executados."""
+    count = 0
+    while run_next(repo, on_change):
+        count += 1
+    return count
+
+
+class JobRunner:
+    """Pool de threads que executam a fila, cada uma com o seu repositório (conexão)."""
+
+    def __init__(self, connect, workers=WORKERS, on_change=None, poll_interval=POLL_INTERVAL):
+        self.connect = connect
+        self.workers = workers
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self.threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"concrental-job-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def wake(self):
+        self._wakeup.set()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def is_alive(self):
+        return any(thread.is_alive() for thread in self.threads)
+
+    def _work(self):
+        repo = None
+        while not self._stopping.is_set():
+            try:
+                if repo is None:
+                    repo = self.connect()
+                if run_next(repo, self.on_change):
+                    continue
+                now = datetime.now()
+                repo.requeue_stale_jobs(now - timedelta(seconds=STALE_AFTER), now)
+            except CONNECTION_ERRORS as e:
+                logger.warning("Worker de jobs sem conexão (%s); reconectando em %d s", e, RECONNECT_DELAY)
+                if repo is not None:
+                    try:
+                        repo.close()
+                    except CONNECTION_ERRORS:
+                        pass
+                repo = None
+                self._stopping.wait(RECONNECT_DELAY)
+                continue
+            except Exception:
+                logger.exception("Falha inesperada no worker de jobs")
+            # Fila vazia: espera um novo job deste processo ou o próximo ciclo.
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+        if repo is not None:
+            repo.close()
+
+
+def start_job_runner(connect, on_change=None, workers=WORKERS):
+    """Inicia os workers deste processo (apenas um pool, mesmo se chamada de novo)."""
+    global _runner
+    if workers <= 0:
+        return None
+    with _lock:
+        if _runner is None or not _runner.is_alive():
+            _runner = JobRunner(connect, workers, on_change).start()
+        return _runner
+
+
+def purge_jobs(repo, days=PURGE_AFTER_DAYS):
+    """Remove os jobs terminados e os arquivos de JOBS_DIR mais antigos que `days` dias."""
+    cutoff = datetime.now() - timedelta(days=days)
+    removed = repo.delete_finished_jobs(cutoff)
+    # PDFs gerados e uploads que esgotaram as tentativas (cada um em uma pasta própria).
+    for folder, subfolders, files in os.walk(JOBS_DIR, topdown=False):
+        for name in files:
+            path = os.path.join(folder, name)
+            if os.path.getmtime(path) < cutoff.timestamp():
+                os.remove(path)
+        if folder != JOBS_DIR and not os.listdir(folder):
+            os.rmdir(folder)
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Workers dos jobs em segundo plano do ConcRental.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    work_parser = subparsers.add_parser("work", help="Executa os jobs da fila.")
+    work_parser.add_argument("--workers", type=int, default=max(WORKERS, 1), help="Threads de execução.")
+    work_parser.add_argument("--once", action="store_true", help="Executa os jobs pendentes e termina.")
+    subparsers.add_parser("status", help="Mostra a quantidade de jobs por tipo e status.")
+    purge_parser = subparsers.add_parser("purge", help="Remove os jobs terminados antigos e os seus arquivos.")
+    purge_parser.add_argument("--days", type=int, default=PURGE_AFTER_DAYS)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(threadName)s %(levelname)s %(message)s")
+
+    if args.command == "work" and not args.once:
+        runner = JobRunner(create_repository, args.workers).start()
+        print(f"{args.workers} workers aguardando jobs (Ctrl+C para encerrar).")
+        try:
+            while runner.is_alive():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            runner.stop()
+        return 0
+
+    repo = create_repository()
+    try:
+        if args.command == "work":
+            print(f"{run_pending(repo)} jobs executados.")
+        elif args.command == "status":
+            counts = repo.count_jobs()
+            print(counts.to_string(index=False) if not counts.empty else "Nenhum job na fila.")
+        else:
+            print(f"{purge_jobs(repo, args.days)} jobs removidos.")
+    finally:
+        repo.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""
+Sistema de migrações do esquema do ConcRental.
+
+As migrações ficam em migrations/<backend>/ (postgres ou sqlite) como pares
+NNNN_nome.up.sql / NNNN_nome.down.sql, com a mesma numeração nos dois backends, e
+as versões aplicadas são registradas na tabela schema_migrations.
+
+Uso:
+    python migrate.py status
+    python migrate.py apply [--to VERSAO]
+    python migrate.py rollback [--steps N]
+    python migrate.py check-indexes
+
+O backend é o mesmo do app (CONCRENTAL_DB_BACKEND ou [database] backend, ver
+repository.py). No Postgres a conexão usa DATABASE_URL, se definida, ou as
+credenciais do .streamlit/secrets.toml. O check-indexes vale apenas para o Postgres:
+ele chama os métodos do Repository e verifica o EXPLAIN dos comandos que emitem,
+sem confirmar alterações.
+"""
+import argparse
+import os
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from reports import PAGE_COLUMNS
+from repository import PostgresRepository, create_repository
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.(up|down)\.sql$")
+
+# Chamadas aos métodos do Repository, com valores de exemplo, cujos comandos devem
+# usar índice. check_indexes registra o EXPLAIN de cada comando que o método emite,
+# então o SQL verificado é o mesmo que o app executa. Os comandos de manutenção que
+# percorrem todos os usuários (alertas, arquivo, resumo diário) ficam de fora.
+SAMPLE_USER = 1
+SAMPLE_SINCE = datetime(2000, 1, 1)
+
+
+def _loader_checks():
+    """Carregadores de cada página (projeção de PAGE_COLUMNS), completos e em delta."""
+    projections = {(table, columns) for page in PAGE_COLUMNS.values() for table, columns in page.items()}
+    projections |= {(table, None) for table in ("equipments", "customers", "rentals")}
+    checks = []
+    for table, columns in sorted(projections, key=lambda item: (item[0], item[1] or ())):
+        label = ", ".join(columns) if columns else "todas as colunas"
+        for since in (None, SAMPLE_SINCE):
+            name = f"get_all_{table} ({label}{', delta' if since else ''})"
+            checks.append((name, lambda repo, table=table, columns=columns, since=since:
+                           repo.sync_frame(table, SAMPLE_USER, columns, since)))
+    return checks
+
+
+EXPLAIN_CHECKS = [
+    ("verify_user", lambda repo: repo.get_user_credentials("admin")),
+    ("get_user_id_by_username", lambda repo: repo.get_user_id("admin")),
+    ("get_user_by_id", lambda repo: repo.get_username(SAMPLE_USER)),
+    ("is_admin_user", lambda repo: repo.is_admin(SAMPLE_USER)),
+    *_loader_checks(),
+    ("add_equipment_to_db", lambda repo: repo.add_equipment(SAMPLE_USER, "Betoneira", "Betoneiras", "SN-1",
+                                                            date(2024, 1, 1), "Quitado")),
+    ("update_equipment_in_db", lambda repo: repo.update_equipment(SAMPLE_USER, "EQ001", {"status": "Disponível"})),
+    ("delete_equipment_from_db", lambda repo: repo.delete_equipment(SAMPLE_USER, "EQ001")),
+    ("add_customer_to_db", lambda repo: repo.add_customer(SAMPLE_USER, "Nome", None, None, None, "Rua A", "CPF",
+                                                          "11144477735")),
+    ("update_customer_in_db", lambda repo: repo.update_customer(SAMPLE_USER, "CUST001", {"full_name": "Nome"})),
+    ("delete_customer_from_db", lambda repo: repo.delete_customer(SAMPLE_USER, "CUST001")),
+    ("search_customers", lambda repo: repo.search_customers(SAMPLE_USER, "silva")),
+    ("get_customer_duplicates", lambda repo: repo.list_customer_duplicates(SAMPLE_USER)),
+    ("merge_customers_in_db", lambda repo: repo.merge_customers(SAMPLE_USER, "CUST001", "CUST002")),
+    ("add_rentals_to_db", lambda repo: repo.add_rentals(SAMPLE_USER, "CUST001", ["EQ001"], date(2024, 1, 1),
+                                                        date(2024, 1, 5), 100.0)),
+    ("complete_rental_in_db", lambda repo: repo.complete_rental(SAMPLE_USER, "RENT001", "EQ001")),
+    ("update_rental_in_db", lambda repo: repo.update_rental(SAMPLE_USER, "RENT001", "payment_status", "Pix")),
+    ("export_entries_to_file", lambda repo: next(repo.iter_rental_entries(SAMPLE_USER), None)),
+    ("get_archived_rentals", lambda repo: repo.list_archived_rentals(SAMPLE_USER)),
+    ("alertas dos aluguéis alterados", lambda repo: repo.refresh_rental_alerts(date(2024, 1, 1), date(2024, 1, 8),
+                                                                                ["RENT001"], SAMPLE_USER)),
+    ("alertas do usuário", lambda repo: repo.refresh_rental_alerts(date(2024, 1, 1), date(2024, 1, 8),
+                                                                    user_id=SAMPLE_USER)),
+    ("get_rental_alerts", lambda repo: repo.list_rental_alerts(SAMPLE_USER)),
+    ("get_user_settings", lambda repo: repo.get_user_settings(SAMPLE_USER)),
+    ("get_user_addresses", lambda repo: repo.list_user_addresses(SAMPLE_USER)),
+    ("delete_user_address", lambda repo: repo.delete_user_address(SAMPLE_USER, 1)),
+    ("jobs (reserva)", lambda repo: repo.claim_job(SAMPLE_SINCE)),
+    ("jobs (conclusão)", lambda repo: repo.finish_job(1, "{}", SAMPLE_SINCE)),
+    ("jobs (interrompidos)", lambda repo: repo.requeue_stale_jobs(SAMPLE_SINCE, SAMPLE_SINCE)),
+    ("jobs (limpeza)", lambda repo: repo.delete_finished_jobs(SAMPLE_SINCE)),
+    ("get_job_status", lambda repo: repo.get_job(SAMPLE_USER, 1)),
+]
+
+
+class PlanningRepository(PostgresRepository):
+    """
+    Repositório que registra em `plans` o EXPLAIN de cada comando emitido pelos
+    métodos, na conexão de `repo`. Só os SELECTs são executados, para o método
+    receber os dados de que precisa; INSERT, UPDATE e DELETE são apenas planejados,
+    e nada é confirmado. A transação é a de check_indexes, aberta com repo.begin().
+    """
+
+    def __init__(self, repo):
+        self._lock = threading.RLock()
+        self.conn = repo.conn
+        self.plans = []
+
+    def begin(self):
+        pass
+
+    def end(self):
+        pass
+
+    def _plan(self, query, params):
+        with self.conn.cursor() as cursor:
+            cursor.execute("EXPLAIN " + self.sql(query), params)
+            self.plans.append((query, "\n".join(row[0] for row in cursor.fetchall())))
+
+    def execute(self, cursor, query, params=()):
+        self._plan(query, params)
+        statement = query.lstrip().upper()
+        if statement.startswith("SELECT") and "FOR UPDATE" not in statement:
+            super().execute(cursor, query, params)
+
+    def read_frame(self, query, params=()):
+        self._plan(query, params)
+        return super().read_frame(query, params)
+
+    @contextmanager
+    def transaction(self):
+        with self.cursor() as cursor:
+            yield cursor
+
+
+def load_migrations(dialect):
+    """Lê migrations/<dialect>/ e retorna a lista de migrações ordenada por versão."""
+    directory = os.path.join(MIGRATIONS_DIR, dialect)
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version, name, direction = match.groups()
+        entry = migrations.setdefault(int(version), {"version": int(version), "name": name})
+        with open(os.path.join(directory, filename), encoding="utf-8") as f:
+            entry[direction] = f.read()
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def ensure_migrations_table(repo):
+    with repo.transaction() as cursor:
+        repo.execute(cursor, """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+
+def get_applied_versions(repo):
+    with repo.cursor() as cursor:
+        repo.execute(cursor, "SELECT version FROM schema_migrations ORDER BY version")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def apply_migrations(repo, target=None):
+    """Aplica, em ordem, as migrações pendentes até a versão `target` (inclusive)."""
+    applied = set(get_applied_versions(repo))
+    for migration in load_migrations(repo.dialect):
+        if migration["version"] in applied:
+            continue
+        if target is not None and migration["version"] > target:
+            break
+        if "up" not in migration:
+            raise RuntimeError(f"Migração {migration['version']:04d} sem arquivo .up.sql")
+        print(f"Aplicando {migration['version']:04d}_{migration['name']}...")
+        with repo.transaction() as cursor:
+            repo.execute_script(cursor, migration["up"])
+            repo.execute(cursor, "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                         (migration["version"], migration["name"]))
+
+
+def rollback_migrations(repo, steps=1):
+    """Desfaz as `steps` últimas migrações aplicadas."""
+    migrations = {m["version"]: m for m in load_migrations(repo.dialect)}
+    for version in reversed(get_applied_versions(repo)[-steps:]):
+        migration = migrations.get(version)
+        if migration is None or "down" not in migration:
+            raise RuntimeError(f"Migração {version:04d} não possui arquivo .down.sql")
+        print(f"Revertendo {version:04d}_{migration['name']}...")
+        with repo.transaction() as cursor:
+            repo.execute_script(cursor, migration["down"])
+            repo.execute(cursor, "DELETE FROM schema_migrations WHERE version = %s", (version,))
+
+
+def print_status(repo):
+    applied = set(get_applied_versions(repo))
+    for migration in load_migrations(repo.dialect):
+        mark = "x" if migration["version"] in applied else " "
+        print(f"[{mark}] {migration['version']:04d}_{migration['name']}")
+
+
+def check_indexes(repo):
+    """
+    Executa cada chamada de EXPLAIN_CHECKS em um PlanningRepository e verifica se os
+    planos dos comandos que leem tabelas usam índice. O seq scan é desabilitado na
+    transação para que tabelas pequenas (ou vazias, num banco local) não mascarem a
+    ausência de um índice. Retorna a lista das chamadas com algum comando sem índice.
+    """
+    failures = []
+    repo.begin()  # SET LOCAL só vale dentro de uma transação explícita
+    try:
+        for name, call in EXPLAIN_CHECKS:
+            for query, plan in _plan_check(repo, name, call):
+                if "Scan" not in plan:
+                    continue  # não lê tabelas (INSERT ... VALUES, horário do banco)
+                uses_index = "Seq Scan" not in plan
+                print(f"[{'ok' if uses_index else 'FALHA'}] {name}: {' '.join(query.split())[:80]}")
+                if not uses_index:
+                    print(plan)
+                    if name not in failures:
+                        failures.append(name)
+    finally:
+        repo.end()
+    return failures
+
+
+def _plan_check(repo, name, call):
+    planner = PlanningRepository(repo)
+    try:
+        with repo.conn.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        call(planner)
+    except (repo.Error, ValueError) as e:
+        # Sem dados de exemplo o método pode parar no meio (ex.: cliente inexistente
+        # na mesclagem, ou o resultado de um comando que só foi planejado).
+        print(f"[aviso] {name}: interrompido após {len(planner.plans)} comandos ({e.__class__.__name__})")
+    finally:
+        repo.conn.rollback()
+    return planner.plans
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrações do esquema do ConcRental.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="Lista as migrações e indica quais já foram aplicadas.")
+    apply_parser = subparsers.add_parser("apply", help="Aplica as migrações pendentes.")
+    apply_parser.add_argument("--to", type=int, default=None, help="Versão final (inclusive).")
+    rollback_parser = subparsers.add_parser("rollback", help="Desfaz as últimas migrações.")
+    rollback_parser.add_argument("--steps", type=int, default=1, help="Quantidade de migrações a desfazer.")
+    subparsers.add_parser("check-indexes", help="Verifica com EXPLAIN se as consultas usam índices.")
+    args = parser.parse_args(argv)
+
+    repo = create_repository()
+    try:
+        ensure_migrations_table(repo)
+        if args.command == "status":
+            print_status(repo)
+        elif args.command == "apply":
+            apply_migrations(repo, args.to)
+        elif args.command == "rollback":
+            rollback_migrations(repo, args.steps)
+        elif args.command == "check-indexes":
+            if repo.dialect != "postgres":
+                print("check-indexes está disponível apenas para o backend postgres.", file=sys.stderr)
+                return 1
+            if check_indexes(repo):
+                return 1
+    finally:
+        repo.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+DROP TABLE IF EXISTS user_addresses;
+DROP TABLE IF EXISTS user_settings;
+DROP TABLE IF EXISTS rentals;
+DROP TABLE IF EXISTS customers;
+DROP TABLE IF EXISTS equipments;
+DROP TABLE IF EXISTS users;
@@ -0,0 +1,65 @@
+-- Esquema base do ConcRental.
+-- Usa IF NOT EXISTS para que bancos já existentes (criados manualmente) possam
+-- ser adotados pelo sistema de migrações sem perda de dados.
+
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS equipments (
+    equipment_id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    name TEXT NOT NULL,
+    category TEXT,
+    serial_number TEXT NOT NULL UNIQUE,
+    acquisition_date DATE,
+    status TEXT NOT NULL DEFAULT 'Disponível',
+    purchase_status TEXT,
+    times_rented INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    full_name TEXT NOT NULL,
+    company_name TEXT,
+    phone_number TEXT,
+    email_address TEXT,
+    address TEXT,
+    document_type TEXT,
+    document_number TEXT UNIQUE,
+    document_path TEXT,
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION
+);
+
+CREATE TABLE IF NOT EXISTS rentals (
+    rental_id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    customer_id TEXT NOT NULL REFERENCES customers (customer_id),
+    equipment_id TEXT NOT NULL REFERENCES equipments (equipment_id),
+    start_date TIMESTAMP NOT NULL,
+    end_date TIMESTAMP NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Ativo',
+    payment_status TEXT NOT NULL DEFAULT 'Em Aberto',
+    valor NUMERIC(12, 2) NOT NULL,
+    freight_cost NUMERIC(12, 2) DEFAULT 0,
+    signed_contract_path TEXT
+);
+
+CREATE TABLE IF NOT EXISTS user_settings (
+    user_id INTEGER PRIMARY KEY REFERENCES users (id),
+    fuel_consumption NUMERIC(8, 2),
+    fuel_cost NUMERIC(8, 2)
+);
+
+CREATE TABLE IF NOT EXISTS user_addresses (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    address_name TEXT NOT NULL,
+    address TEXT NOT NULL,
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION
+);
@@ -0,0 +1,11 @@
+DROP INDEX IF EXISTS idx_user_addresses_user_name;
+DROP INDEX IF EXISTS idx_rentals_id_number;
+DROP INDEX IF EXISTS idx_customers_id_number;
+DROP INDEX IF EXISTS idx_equipments_id_number;
+DROP INDEX IF EXISTS idx_rentals_equipment_id;
+DROP INDEX IF EXISTS idx_rentals_user_payment_end;
+DROP INDEX IF EXISTS idx_rentals_user_status_end;
+DROP INDEX IF EXISTS idx_rentals_customer_start;
+DROP INDEX IF EXISTS idx_customers_user_id;
+DROP INDEX IF EXISTS idx_equipments_user_id;
+DROP INDEX IF EXISTS idx_users_username_lower;
@@ -0,0 +1,26 @@
+-- Índices para os caminhos de acesso usados por db_management.py e pelas páginas.
+
+-- Login: verify_user compara lower(username).
+CREATE INDEX IF NOT EXISTS idx_users_username_lower ON users (lower(username));
+
+-- Carregadores por usuário: filtro por user_id + ordenação pelo ID.
+CREATE INDEX IF NOT EXISTS idx_equipments_user_id ON equipments (user_id, equipment_id);
+CREATE INDEX IF NOT EXISTS idx_customers_user_id ON customers (user_id, customer_id);
+
+-- get_all_rentals: join rentals -> customers por customer_id, ordenado por start_date.
+CREATE INDEX IF NOT EXISTS idx_rentals_customer_start ON rentals (customer_id, start_date DESC);
+
+-- Devoluções/atrasos (status + end_date) e Financeiro (payment_status + end_date).
+CREATE INDEX IF NOT EXISTS idx_rentals_user_status_end ON rentals (user_id, status, end_date);
+CREATE INDEX IF NOT EXISTS idx_rentals_user_payment_end ON rentals (user_id, payment_status, end_date);
+
+-- Verificação de chave estrangeira ao deletar equipamentos.
+CREATE INDEX IF NOT EXISTS idx_rentals_equipment_id ON rentals (equipment_id);
+
+-- Geração de IDs: maior sufixo numérico (ordenar o texto coloca 'EQ1000' antes de 'EQ999').
+CREATE INDEX IF NOT EXISTS idx_equipments_id_number ON equipments ((CAST(SUBSTRING(equipment_id FROM 3) AS INTEGER)));
+CREATE INDEX IF NOT EXISTS idx_customers_id_number ON customers ((CAST(SUBSTRING(customer_id FROM 5) AS INTEGER)));
+CREATE INDEX IF NOT EXISTS idx_rentals_id_number ON rentals ((CAST(SUBSTRING(rental_id FROM 5) AS INTEGER)));
+
+-- Endereços de partida ordenados por nome.
+CREATE INDEX IF NOT EXISTS idx_user_addresses_user_name ON user_addresses (user_id, address_name);
@@ -0,0 +1,2 @@
+-- Usuários administradores podem acessar a página de diagnóstico.
+ALTER TABLE users ADD COLUMN IF NOT EXISTS is_admin BOOLEAN NOT NULL DEFAULT false;
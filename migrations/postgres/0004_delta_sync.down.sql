@@ -0,0 +1,15 @@
+DROP TRIGGER IF EXISTS rentals_deleted ON rentals;
+DROP TRIGGER IF EXISTS customers_deleted ON customers;
+DROP TRIGGER IF EXISTS equipments_deleted ON equipments;
+DROP TRIGGER IF EXISTS rentals_touch ON rentals;
+DROP TRIGGER IF EXISTS customers_touch ON customers;
+DROP TRIGGER IF EXISTS equipments_touch ON equipments;
+DROP FUNCTION IF EXISTS record_deleted_row();
+DROP FUNCTION IF EXISTS touch_updated_at();
+DROP TABLE IF EXISTS deleted_rows;
+DROP INDEX IF EXISTS idx_rentals_user_updated;
+DROP INDEX IF EXISTS idx_customers_user_updated;
+DROP INDEX IF EXISTS idx_equipments_user_updated;
+ALTER TABLE rentals DROP COLUMN IF EXISTS updated_at;
+ALTER TABLE customers DROP COLUMN IF EXISTS updated_at;
+ALTER TABLE equipments DROP COLUMN IF EXISTS updated_at;
@@ -0,0 +1,48 @@
+-- Sincronização incremental dos caches: updated_at nas tabelas por usuário e
+-- registro das exclusões em deleted_rows.
+
+ALTER TABLE equipments ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE customers ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE rentals ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS idx_equipments_user_updated ON equipments (user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_customers_user_updated ON customers (user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_rentals_user_updated ON rentals (user_id, updated_at);
+
+CREATE TABLE IF NOT EXISTS deleted_rows (
+    table_name TEXT NOT NULL,
+    row_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_deleted_rows_lookup ON deleted_rows (table_name, user_id, deleted_at);
+
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- TG_ARGV[0] é o nome da coluna de ID da tabela.
+CREATE OR REPLACE FUNCTION record_deleted_row() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO deleted_rows (table_name, row_id, user_id)
+    VALUES (TG_TABLE_NAME, to_jsonb(OLD) ->> TG_ARGV[0], OLD.user_id);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER equipments_touch BEFORE UPDATE ON equipments
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE TRIGGER customers_touch BEFORE UPDATE ON customers
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE TRIGGER rentals_touch BEFORE UPDATE ON rentals
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+CREATE TRIGGER equipments_deleted AFTER DELETE ON equipments
+    FOR EACH ROW EXECUTE FUNCTION record_deleted_row('equipment_id');
+CREATE TRIGGER customers_deleted AFTER DELETE ON customers
+    FOR EACH ROW EXECUTE FUNCTION record_deleted_row('customer_id');
+CREATE TRIGGER rentals_deleted AFTER DELETE ON rentals
+    FOR EACH ROW EXECUTE FUNCTION record_deleted_row('rental_id');
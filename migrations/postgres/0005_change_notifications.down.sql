@@ -0,0 +1,5 @@
+DROP TRIGGER IF EXISTS user_settings_notify ON user_settings;
+DROP TRIGGER IF EXISTS rentals_notify ON rentals;
+DROP TRIGGER IF EXISTS customers_notify ON customers;
+DROP TRIGGER IF EXISTS equipments_notify ON equipments;
+DROP FUNCTION IF EXISTS notify_table_change();
@@ -0,0 +1,26 @@
+-- Notifica os processos do app (LISTEN concrental_changes) sobre escritas nas
+-- tabelas em cache. O payload é "tabela:user_id"; notificações iguais na mesma
+-- transação são entregues uma só vez.
+
+CREATE OR REPLACE FUNCTION notify_table_change() RETURNS trigger AS $$
+DECLARE
+    changed RECORD;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        changed := OLD;
+    ELSE
+        changed := NEW;
+    END IF;
+    PERFORM pg_notify('concrental_changes', TG_TABLE_NAME || ':' || changed.user_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER equipments_notify AFTER INSERT OR UPDATE OR DELETE ON equipments
+    FOR EACH ROW EXECUTE FUNCTION notify_table_change();
+CREATE TRIGGER customers_notify AFTER INSERT OR UPDATE OR DELETE ON customers
+    FOR EACH ROW EXECUTE FUNCTION notify_table_change();
+CREATE TRIGGER rentals_notify AFTER INSERT OR UPDATE OR DELETE ON rentals
+    FOR EACH ROW EXECUTE FUNCTION notify_table_change();
+CREATE TRIGGER user_settings_notify AFTER INSERT OR UPDATE OR DELETE ON user_settings
+    FOR EACH ROW EXECUTE FUNCTION notify_table_change();
@@ -0,0 +1,2 @@
+ALTER TABLE rentals DROP CONSTRAINT IF EXISTS rentals_no_overlap;
+ALTER TABLE rentals DROP COLUMN IF EXISTS period;
@@ -0,0 +1,12 @@
+-- Períodos dos aluguéis como intervalos: um equipamento não pode ter dois aluguéis
+-- em aberto (status diferente de 'Concluído') com períodos sobrepostos. A restrição
+-- cria o índice GiST (equipment_id, period) usado também nas consultas de
+-- disponibilidade. Falha se já houver sobreposições no banco.
+
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE rentals ADD COLUMN IF NOT EXISTS period tsrange
+    GENERATED ALWAYS AS (tsrange(start_date, end_date, '[]')) STORED;
+
+ALTER TABLE rentals ADD CONSTRAINT rentals_no_overlap
+    EXCLUDE USING gist (equipment_id WITH =, period WITH &&) WHERE (status <> 'Concluído');
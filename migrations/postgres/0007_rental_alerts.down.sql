@@ -0,0 +1,3 @@
+DROP TABLE IF EXISTS alert_runs;
+DROP TABLE IF EXISTS rental_alerts;
+DROP INDEX IF EXISTS idx_rentals_active_end;
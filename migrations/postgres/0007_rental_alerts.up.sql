@@ -0,0 +1,23 @@
+-- Alertas de devolução pré-calculados pelo job agendado (alerts.py): aluguéis
+-- ativos atrasados ou com devolução nos próximos dias, de todos os usuários. O
+-- painel lê os alertas do usuário pelo índice (user_id, kind), sem recalcular.
+
+CREATE TABLE IF NOT EXISTS rental_alerts (
+    rental_id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    kind TEXT NOT NULL,
+    end_date TIMESTAMP NOT NULL,
+    computed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_rental_alerts_user_kind ON rental_alerts (user_id, kind, end_date);
+
+-- O job percorre só os aluguéis ativos, de todos os usuários, pela data de devolução.
+CREATE INDEX IF NOT EXISTS idx_rentals_active_end ON rentals (end_date) WHERE status = 'Ativo';
+
+-- Execuções do job: a data de referência da última indica se os alertas são de hoje.
+CREATE TABLE IF NOT EXISTS alert_runs (
+    id SERIAL PRIMARY KEY,
+    reference_date DATE NOT NULL,
+    alert_count INTEGER NOT NULL,
+    finished_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,2 @@
+DROP INDEX IF EXISTS idx_customers_search_trgm;
+ALTER TABLE customers DROP COLUMN IF EXISTS search_text;
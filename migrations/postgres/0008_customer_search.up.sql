@@ -0,0 +1,15 @@
+-- Busca de clientes no servidor (Repository.search_customers): nome, empresa,
+-- documento e telefone (só os dígitos) em uma coluna de texto em minúsculas, com
+-- índice de trigramas. O índice atende tanto o LIKE '%termo%' quanto a busca
+-- aproximada por palavra (operador <%), e a consulta devolve só os primeiros
+-- resultados, então o custo não depende do número de clientes.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE customers ADD COLUMN IF NOT EXISTS search_text TEXT
+    GENERATED ALWAYS AS (lower(
+        full_name || ' ' || coalesce(company_name, '') || ' ' || coalesce(document_number, '') || ' ' ||
+        coalesce(replace(replace(replace(replace(replace(replace(phone_number, '(', ''), ')', ''), '-', ''), ' ', ''), '.', ''), '+', ''), '')
+    )) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_customers_search_trgm ON customers USING gin (search_text gin_trgm_ops);
@@ -0,0 +1,17 @@
+-- Possíveis clientes duplicados, calculados pelo job de duplicados.py por usuário.
+-- Cada par guarda o cliente mais antigo (customer_id), o mais novo (duplicate_id),
+-- a semelhança dos nomes e os motivos (telefone, email, nome). Excluir ou mesclar
+-- um dos clientes remove os pares em que ele aparece.
+
+CREATE TABLE IF NOT EXISTS customer_duplicates (
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    customer_id TEXT NOT NULL REFERENCES customers (customer_id) ON DELETE CASCADE,
+    duplicate_id TEXT NOT NULL REFERENCES customers (customer_id) ON DELETE CASCADE,
+    score DOUBLE PRECISION NOT NULL,
+    reasons TEXT NOT NULL,
+    computed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (customer_id, duplicate_id)
+);
+CREATE INDEX IF NOT EXISTS idx_customer_duplicates_user ON customer_duplicates (user_id, score DESC);
+-- A exclusão em cascata procura os pares pelo cliente mais novo.
+CREATE INDEX IF NOT EXISTS idx_customer_duplicates_duplicate ON customer_duplicates (duplicate_id);
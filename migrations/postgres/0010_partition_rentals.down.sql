@@ -0,0 +1,41 @@
+CREATE TABLE rentals_unpartitioned (
+    rental_id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    customer_id TEXT NOT NULL REFERENCES customers (customer_id),
+    equipment_id TEXT NOT NULL REFERENCES equipments (equipment_id),
+    start_date TIMESTAMP NOT NULL,
+    end_date TIMESTAMP NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Ativo',
+    payment_status TEXT NOT NULL DEFAULT 'Em Aberto',
+    valor NUMERIC(12, 2) NOT NULL,
+    freight_cost NUMERIC(12, 2) DEFAULT 0,
+    signed_contract_path TEXT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    period tsrange GENERATED ALWAYS AS (tsrange(start_date, end_date, '[]')) STORED
+);
+
+INSERT INTO rentals_unpartitioned (rental_id, user_id, customer_id, equipment_id, start_date, end_date, status,
+                                   payment_status, valor, freight_cost, signed_contract_path, updated_at)
+SELECT rental_id, user_id, customer_id, equipment_id, start_date, end_date, status,
+       payment_status, valor, freight_cost, signed_contract_path, updated_at
+FROM rentals;
+
+DROP TABLE rentals;
+ALTER TABLE rentals_unpartitioned RENAME TO rentals;
+
+ALTER TABLE rentals ADD CONSTRAINT rentals_no_overlap
+    EXCLUDE USING gist (equipment_id WITH =, period WITH &&) WHERE (status <> 'Concluído');
+CREATE INDEX idx_rentals_customer_start ON rentals (customer_id, start_date DESC);
+CREATE INDEX idx_rentals_user_status_end ON rentals (user_id, status, end_date);
+CREATE INDEX idx_rentals_user_payment_end ON rentals (user_id, payment_status, end_date);
+CREATE INDEX idx_rentals_equipment_id ON rentals (equipment_id);
+CREATE INDEX idx_rentals_id_number ON rentals ((CAST(SUBSTRING(rental_id FROM 5) AS INTEGER)));
+CREATE INDEX idx_rentals_user_updated ON rentals (user_id, updated_at);
+CREATE INDEX idx_rentals_active_end ON rentals (end_date) WHERE status = 'Ativo';
+
+CREATE TRIGGER rentals_touch BEFORE UPDATE ON rentals
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE TRIGGER rentals_deleted AFTER DELETE ON rentals
+    FOR EACH ROW EXECUTE FUNCTION record_deleted_row('rental_id');
+CREATE TRIGGER rentals_notify AFTER INSERT OR UPDATE OR DELETE ON rentals
+    FOR EACH ROW EXECUTE FUNCTION notify_table_change();
@@ -0,0 +1,91 @@
+-- Aluguéis particionados por usuário: HASH(user_id) em 16 partições. Todas as
+-- consultas e escritas do app filtram por user_id, então o planejador lê só a
+-- partição do usuário, e o crescimento de um usuário grande não aumenta os índices
+-- das partições dos outros. A chave primária passa a ser (user_id, rental_id); os
+-- IDs continuam sequenciais e únicos, atribuídos por Repository.add_rentals.
+--
+-- Restrições de exclusão não são aceitas na tabela particionada: a restrição contra
+-- períodos sobrepostos (migração 0006) é criada em cada partição, o que equivale à
+-- original porque um equipamento pertence a um único usuário.
+--
+-- Os gatilhos de linha disparam nas partições; por isso as funções de 0004 e 0005
+-- recebem o nome da tabela lógica como argumento opcional.
+
+CREATE OR REPLACE FUNCTION record_deleted_row() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO deleted_rows (table_name, row_id, user_id)
+    VALUES (coalesce(TG_ARGV[1], TG_TABLE_NAME), to_jsonb(OLD) ->> TG_ARGV[0], OLD.user_id);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_table_change() RETURNS trigger AS $$
+DECLARE
+    changed RECORD;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        changed := OLD;
+    ELSE
+        changed := NEW;
+    END IF;
+    PERFORM pg_notify('concrental_changes', coalesce(TG_ARGV[0], TG_TABLE_NAME) || ':' || changed.user_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TABLE rentals_partitioned (
+    rental_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    customer_id TEXT NOT NULL REFERENCES customers (customer_id),
+    equipment_id TEXT NOT NULL REFERENCES equipments (equipment_id),
+    start_date TIMESTAMP NOT NULL,
+    end_date TIMESTAMP NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Ativo',
+    payment_status TEXT NOT NULL DEFAULT 'Em Aberto',
+    valor NUMERIC(12, 2) NOT NULL,
+    freight_cost NUMERIC(12, 2) DEFAULT 0,
+    signed_contract_path TEXT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    period tsrange GENERATED ALWAYS AS (tsrange(start_date, end_date, '[]')) STORED,
+    PRIMARY KEY (user_id, rental_id)
+) PARTITION BY HASH (user_id);
+
+DO $$
+DECLARE
+    suffix TEXT;
+BEGIN
+    FOR i IN 0..15 LOOP
+        suffix := lpad(i::text, 2, '0');
+        EXECUTE format('CREATE TABLE rentals_p%s PARTITION OF rentals_partitioned FOR VALUES WITH (MODULUS 16, REMAINDER %s)', suffix, i);
+        EXECUTE format('ALTER TABLE rentals_p%1$s ADD CONSTRAINT rentals_p%1$s_no_overlap '
+                       'EXCLUDE USING gist (equipment_id WITH =, period WITH &&) WHERE (status <> ''Concluído'')', suffix);
+    END LOOP;
+END;
+$$;
+
+-- Cópia sem os gatilhos (ainda não criados): updated_at é preservado.
+INSERT INTO rentals_partitioned (rental_id, user_id, customer_id, equipment_id, start_date, end_date, status,
+                                 payment_status, valor, freight_cost, signed_contract_path, updated_at)
+SELECT rental_id, user_id, customer_id, equipment_id, start_date, end_date, status,
+       payment_status, valor, freight_cost, signed_contract_path, updated_at
+FROM rentals;
+
+DROP TABLE rentals;
+ALTER TABLE rentals_partitioned RENAME TO rentals;
+
+-- Índices de 0002, 0004 e 0007, agora criados em cada partição.
+CREATE INDEX idx_rentals_user_start ON rentals (user_id, start_date DESC);
+CREATE INDEX idx_rentals_customer_start ON rentals (customer_id, start_date DESC);
+CREATE INDEX idx_rentals_user_status_end ON rentals (user_id, status, end_date);
+CREATE INDEX idx_rentals_user_payment_end ON rentals (user_id, payment_status, end_date);
+CREATE INDEX idx_rentals_equipment_id ON rentals (equipment_id);
+CREATE INDEX idx_rentals_id_number ON rentals ((CAST(SUBSTRING(rental_id FROM 5) AS INTEGER)));
+CREATE INDEX idx_rentals_user_updated ON rentals (user_id, updated_at);
+CREATE INDEX idx_rentals_active_end ON rentals (end_date) WHERE status = 'Ativo';
+
+CREATE TRIGGER rentals_touch BEFORE UPDATE ON rentals
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE TRIGGER rentals_deleted AFTER DELETE ON rentals
+    FOR EACH ROW EXECUTE FUNCTION record_deleted_row('rental_id', 'rentals');
+CREATE TRIGGER rentals_notify AFTER INSERT OR UPDATE OR DELETE ON rentals
+    FOR EACH ROW EXECUTE FUNCTION notify_table_change('rentals');
@@ -0,0 +1,37 @@
+-- Arquivo dos aluguéis concluídos e pagos há mais de CONCRENTAL_ARCHIVE_AFTER_DAYS dias
+-- (archive.py). O job move as linhas de rentals para rentals_archive; os
+-- carregadores do app leem só rentals, e o arquivo é consultado apenas quando o
+-- histórico é pedido (Contratos, Financeiro e exportação). Mesmo particionamento
+-- por usuário de rentals (migração 0010).
+
+CREATE TABLE IF NOT EXISTS rentals_archive (
+    rental_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    customer_id TEXT NOT NULL REFERENCES customers (customer_id),
+    equipment_id TEXT NOT NULL REFERENCES equipments (equipment_id),
+    start_date TIMESTAMP NOT NULL,
+    end_date TIMESTAMP NOT NULL,
+    status TEXT NOT NULL,
+    payment_status TEXT NOT NULL,
+    valor NUMERIC(12, 2) NOT NULL,
+    freight_cost NUMERIC(12, 2) DEFAULT 0,
+    signed_contract_path TEXT,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, rental_id)
+) PARTITION BY HASH (user_id);
+
+DO $$
+BEGIN
+    FOR i IN 0..15 LOOP
+        EXECUTE format('CREATE TABLE IF NOT EXISTS rentals_archive_p%s PARTITION OF rentals_archive '
+                       'FOR VALUES WITH (MODULUS 16, REMAINDER %s)', lpad(i::text, 2, '0'), i);
+    END LOOP;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_rentals_archive_user_start ON rentals_archive (user_id, start_date DESC);
+-- Verificação de chave estrangeira ao excluir clientes e equipamentos.
+CREATE INDEX IF NOT EXISTS idx_rentals_archive_customer ON rentals_archive (customer_id);
+CREATE INDEX IF NOT EXISTS idx_rentals_archive_equipment ON rentals_archive (equipment_id);
+-- Os IDs de aluguel arquivados continuam reservados (Repository.add_rentals).
+CREATE INDEX IF NOT EXISTS idx_rentals_archive_id_number ON rentals_archive ((CAST(SUBSTRING(rental_id FROM 5) AS INTEGER)));
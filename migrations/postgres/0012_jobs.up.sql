@@ -0,0 +1,25 @@
+-- Fila persistente dos jobs em segundo plano (jobs.py): geocodificação, rotas,
+-- uploads e PDFs. Os workers reservam o próximo job pendente com
+-- SELECT ... FOR UPDATE SKIP LOCKED; payload e result são JSON em texto. Os
+-- horários são gravados pelo worker (não pelo banco), como em run_after.
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGSERIAL PRIMARY KEY,
+    user_id INTEGER REFERENCES users (id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Pendente',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    result TEXT,
+    error TEXT,
+    run_after TIMESTAMP NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+-- Próximo job da fila (jobs.claim) e jobs presos em execução (worker encerrado).
+CREATE INDEX IF NOT EXISTS idx_jobs_pending ON jobs (run_after, id) WHERE status = 'Pendente';
+CREATE INDEX IF NOT EXISTS idx_jobs_running ON jobs (started_at) WHERE status = 'Executando';
+-- Limpeza dos jobs terminados (python jobs.py purge).
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at) WHERE finished_at IS NOT NULL;
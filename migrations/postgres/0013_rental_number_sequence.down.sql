@@ -0,0 +1,7 @@
+ALTER TABLE rental_alerts DROP CONSTRAINT IF EXISTS rental_alerts_pkey;
+ALTER TABLE rental_alerts ADD PRIMARY KEY (rental_id);
+
+CREATE INDEX IF NOT EXISTS idx_rentals_id_number ON rentals ((CAST(SUBSTRING(rental_id FROM 5) AS INTEGER)));
+CREATE INDEX IF NOT EXISTS idx_rentals_archive_id_number ON rentals_archive ((CAST(SUBSTRING(rental_id FROM 5) AS INTEGER)));
+
+DROP SEQUENCE IF EXISTS rental_number_seq;
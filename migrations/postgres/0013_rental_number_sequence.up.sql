@@ -0,0 +1,21 @@
+-- Com a chave (user_id, rental_id) da migração 0010, o banco não rejeita mais o
+-- mesmo RENTnnn em dois usuários, e o MAX + 1 de add_rentals podia entregá-lo a
+-- duas sessões concorrentes. Os números dos aluguéis passam a vir de uma sequência
+-- global, que começa após o maior ID de rentals e rentals_archive; os índices de
+-- expressão usados pelo MAX + 1 deixam de ser necessários. rental_alerts passa a
+-- ter a mesma chave de rentals.
+
+CREATE SEQUENCE IF NOT EXISTS rental_number_seq;
+SELECT setval('rental_number_seq', GREATEST(last_number, 1), last_number > 0)
+FROM (
+    SELECT GREATEST(
+        COALESCE((SELECT MAX(CAST(SUBSTRING(rental_id FROM 5) AS INTEGER)) FROM rentals), 0),
+        COALESCE((SELECT MAX(CAST(SUBSTRING(rental_id FROM 5) AS INTEGER)) FROM rentals_archive), 0)
+    ) AS last_number
+) numbers;
+
+DROP INDEX IF EXISTS idx_rentals_id_number;
+DROP INDEX IF EXISTS idx_rentals_archive_id_number;
+
+ALTER TABLE rental_alerts DROP CONSTRAINT IF EXISTS rental_alerts_pkey;
+ALTER TABLE rental_alerts ADD PRIMARY KEY (user_id, rental_id);
@@ -0,0 +1,63 @@
+-- Esquema base do ConcRental (SQLite).
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS equipments (
+    equipment_id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    name TEXT NOT NULL,
+    category TEXT,
+    serial_number TEXT NOT NULL UNIQUE,
+    acquisition_date TEXT,
+    status TEXT NOT NULL DEFAULT 'Disponível',
+    purchase_status TEXT,
+    times_rented INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    full_name TEXT NOT NULL,
+    company_name TEXT,
+    phone_number TEXT,
+    email_address TEXT,
+    address TEXT,
+    document_type TEXT,
+    document_number TEXT UNIQUE,
+    document_path TEXT,
+    latitude REAL,
+    longitude REAL
+);
+
+CREATE TABLE IF NOT EXISTS rentals (
+    rental_id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    customer_id TEXT NOT NULL REFERENCES customers (customer_id),
+    equipment_id TEXT NOT NULL REFERENCES equipments (equipment_id),
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Ativo',
+    payment_status TEXT NOT NULL DEFAULT 'Em Aberto',
+    valor REAL NOT NULL,
+    freight_cost REAL DEFAULT 0,
+    signed_contract_path TEXT
+);
+
+CREATE TABLE IF NOT EXISTS user_settings (
+    user_id INTEGER PRIMARY KEY REFERENCES users (id),
+    fuel_consumption REAL,
+    fuel_cost REAL
+);
+
+CREATE TABLE IF NOT EXISTS user_addresses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    address_name TEXT NOT NULL,
+    address TEXT NOT NULL,
+    latitude REAL,
+    longitude REAL
+);
@@ -0,0 +1,12 @@
+-- Índices para os caminhos de acesso usados pelo repositório (ver migrations/postgres).
+CREATE INDEX IF NOT EXISTS idx_users_username_lower ON users (lower(username));
+CREATE INDEX IF NOT EXISTS idx_equipments_user_id ON equipments (user_id, equipment_id);
+CREATE INDEX IF NOT EXISTS idx_customers_user_id ON customers (user_id, customer_id);
+CREATE INDEX IF NOT EXISTS idx_rentals_customer_start ON rentals (customer_id, start_date DESC);
+CREATE INDEX IF NOT EXISTS idx_rentals_user_status_end ON rentals (user_id, status, end_date);
+CREATE INDEX IF NOT EXISTS idx_rentals_user_payment_end ON rentals (user_id, payment_status, end_date);
+CREATE INDEX IF NOT EXISTS idx_rentals_equipment_id ON rentals (equipment_id);
+CREATE INDEX IF NOT EXISTS idx_equipments_id_number ON equipments (CAST(SUBSTR(equipment_id, 3) AS INTEGER));
+CREATE INDEX IF NOT EXISTS idx_customers_id_number ON customers (CAST(SUBSTR(customer_id, 5) AS INTEGER));
+CREATE INDEX IF NOT EXISTS idx_rentals_id_number ON rentals (CAST(SUBSTR(rental_id, 5) AS INTEGER));
+CREATE INDEX IF NOT EXISTS idx_user_addresses_user_name ON user_addresses (user_id, address_name);
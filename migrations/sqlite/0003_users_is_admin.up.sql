@@ -0,0 +1,2 @@
+-- Usuários administradores podem acessar a página de diagnóstico.
+ALTER TABLE users ADD COLUMN is_admin INTEGER NOT NULL DEFAULT 0;
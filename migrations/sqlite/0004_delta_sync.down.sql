@@ -0,0 +1,16 @@
+DROP TRIGGER IF EXISTS rentals_deleted;
+DROP TRIGGER IF EXISTS rentals_touch;
+DROP TRIGGER IF EXISTS rentals_touch_insert;
+DROP TRIGGER IF EXISTS customers_deleted;
+DROP TRIGGER IF EXISTS customers_touch;
+DROP TRIGGER IF EXISTS customers_touch_insert;
+DROP TRIGGER IF EXISTS equipments_deleted;
+DROP TRIGGER IF EXISTS equipments_touch;
+DROP TRIGGER IF EXISTS equipments_touch_insert;
+DROP TABLE IF EXISTS deleted_rows;
+DROP INDEX IF EXISTS idx_rentals_user_updated;
+DROP INDEX IF EXISTS idx_customers_user_updated;
+DROP INDEX IF EXISTS idx_equipments_user_updated;
+ALTER TABLE rentals DROP COLUMN updated_at;
+ALTER TABLE customers DROP COLUMN updated_at;
+ALTER TABLE equipments DROP COLUMN updated_at;
@@ -0,0 +1,51 @@
+-- Sincronização incremental dos caches (ver migrations/postgres). O SQLite não aceita
+-- ADD COLUMN com default não constante, então updated_at é preenchido por gatilhos.
+
+ALTER TABLE equipments ADD COLUMN updated_at TEXT;
+ALTER TABLE customers ADD COLUMN updated_at TEXT;
+ALTER TABLE rentals ADD COLUMN updated_at TEXT;
+UPDATE equipments SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now');
+UPDATE customers SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now');
+UPDATE rentals SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now');
+
+CREATE INDEX IF NOT EXISTS idx_equipments_user_updated ON equipments (user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_customers_user_updated ON customers (user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_rentals_user_updated ON rentals (user_id, updated_at);
+
+CREATE TABLE IF NOT EXISTS deleted_rows (
+    table_name TEXT NOT NULL,
+    row_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    deleted_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_deleted_rows_lookup ON deleted_rows (table_name, user_id, deleted_at);
+
+CREATE TRIGGER equipments_touch_insert AFTER INSERT ON equipments BEGIN
+    UPDATE equipments SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE equipment_id = NEW.equipment_id;
+END;
+CREATE TRIGGER equipments_touch AFTER UPDATE ON equipments WHEN NEW.updated_at IS OLD.updated_at BEGIN
+    UPDATE equipments SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE equipment_id = NEW.equipment_id;
+END;
+CREATE TRIGGER equipments_deleted AFTER DELETE ON equipments BEGIN
+    INSERT INTO deleted_rows (table_name, row_id, user_id) VALUES ('equipments', OLD.equipment_id, OLD.user_id);
+END;
+
+CREATE TRIGGER customers_touch_insert AFTER INSERT ON customers BEGIN
+    UPDATE customers SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE customer_id = NEW.customer_id;
+END;
+CREATE TRIGGER customers_touch AFTER UPDATE ON customers WHEN NEW.updated_at IS OLD.updated_at BEGIN
+    UPDATE customers SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE customer_id = NEW.customer_id;
+END;
+CREATE TRIGGER customers_deleted AFTER DELETE ON customers BEGIN
+    INSERT INTO deleted_rows (table_name, row_id, user_id) VALUES ('customers', OLD.customer_id, OLD.user_id);
+END;
+
+CREATE TRIGGER rentals_touch_insert AFTER INSERT ON rentals BEGIN
+    UPDATE rentals SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE rental_id = NEW.rental_id;
+END;
+CREATE TRIGGER rentals_touch AFTER UPDATE ON rentals WHEN NEW.updated_at IS OLD.updated_at BEGIN
+    UPDATE rentals SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE rental_id = NEW.rental_id;
+END;
+CREATE TRIGGER rentals_deleted AFTER DELETE ON rentals BEGIN
+    INSERT INTO deleted_rows (table_name, row_id, user_id) VALUES ('rentals', OLD.rental_id, OLD.user_id);
+END;
@@ -0,0 +1,4 @@
+-- O SQLite atende um único local e não tem LISTEN/NOTIFY: as escritas já
+-- invalidam o cache do próprio processo. Migração mantida para alinhar a
+-- numeração com migrations/postgres.
+SELECT 1;
@@ -0,0 +1,3 @@
+DROP TRIGGER IF EXISTS rentals_no_overlap_update;
+DROP TRIGGER IF EXISTS rentals_no_overlap_insert;
+DROP INDEX IF EXISTS idx_rentals_equipment_period;
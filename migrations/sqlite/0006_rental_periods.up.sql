@@ -0,0 +1,25 @@
+-- Sem restrições de exclusão no SQLite: gatilhos rejeitam aluguéis em aberto com
+-- períodos sobrepostos no mesmo equipamento (ver migrations/postgres). As datas
+-- são comparadas com datetime() porque podem estar gravadas com ou sem horário.
+
+CREATE INDEX IF NOT EXISTS idx_rentals_equipment_period ON rentals (equipment_id, start_date, end_date);
+
+CREATE TRIGGER rentals_no_overlap_insert BEFORE INSERT ON rentals
+WHEN NEW.status <> 'Concluído' AND EXISTS (
+    SELECT 1 FROM rentals
+    WHERE equipment_id = NEW.equipment_id AND status <> 'Concluído'
+      AND datetime(start_date) <= datetime(NEW.end_date) AND datetime(end_date) >= datetime(NEW.start_date)
+)
+BEGIN
+    SELECT RAISE(ABORT, 'rentals_no_overlap: equipamento já reservado no período');
+END;
+
+CREATE TRIGGER rentals_no_overlap_update BEFORE UPDATE OF equipment_id, start_date, end_date, status ON rentals
+WHEN NEW.status <> 'Concluído' AND EXISTS (
+    SELECT 1 FROM rentals
+    WHERE equipment_id = NEW.equipment_id AND status <> 'Concluído' AND rental_id <> NEW.rental_id
+      AND datetime(start_date) <= datetime(NEW.end_date) AND datetime(end_date) >= datetime(NEW.start_date)
+)
+BEGIN
+    SELECT RAISE(ABORT, 'rentals_no_overlap: equipamento já reservado no período');
+END;
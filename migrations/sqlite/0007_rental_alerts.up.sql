@@ -0,0 +1,18 @@
+-- Alertas de devolução pré-calculados pelo job agendado (ver migrations/postgres).
+
+CREATE TABLE IF NOT EXISTS rental_alerts (
+    rental_id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    kind TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    computed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_rental_alerts_user_kind ON rental_alerts (user_id, kind, end_date);
+CREATE INDEX IF NOT EXISTS idx_rentals_active_end ON rentals (end_date) WHERE status = 'Ativo';
+
+CREATE TABLE IF NOT EXISTS alert_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    reference_date TEXT NOT NULL,
+    alert_count INTEGER NOT NULL,
+    finished_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
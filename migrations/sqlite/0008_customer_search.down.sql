@@ -0,0 +1 @@
+ALTER TABLE customers DROP COLUMN search_text;
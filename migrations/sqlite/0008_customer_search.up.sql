@@ -0,0 +1,8 @@
+-- Busca de clientes (ver migrations/postgres). O SQLite não tem índice de
+-- trigramas: a coluna é virtual e a busca usa LIKE sobre os clientes do usuário.
+
+ALTER TABLE customers ADD COLUMN search_text TEXT
+    GENERATED ALWAYS AS (lower(
+        full_name || ' ' || coalesce(company_name, '') || ' ' || coalesce(document_number, '') || ' ' ||
+        coalesce(replace(replace(replace(replace(replace(replace(phone_number, '(', ''), ')', ''), '-', ''), ' ', ''), '.', ''), '+', ''), '')
+    )) VIRTUAL;
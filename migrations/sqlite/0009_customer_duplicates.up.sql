@@ -0,0 +1,13 @@
+-- Possíveis clientes duplicados (ver migrations/postgres).
+
+CREATE TABLE IF NOT EXISTS customer_duplicates (
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    customer_id TEXT NOT NULL REFERENCES customers (customer_id) ON DELETE CASCADE,
+    duplicate_id TEXT NOT NULL REFERENCES customers (customer_id) ON DELETE CASCADE,
+    score REAL NOT NULL,
+    reasons TEXT NOT NULL,
+    computed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (customer_id, duplicate_id)
+);
+CREATE INDEX IF NOT EXISTS idx_customer_duplicates_user ON customer_duplicates (user_id, score DESC);
+CREATE INDEX IF NOT EXISTS idx_customer_duplicates_duplicate ON customer_duplicates (duplicate_id);
@@ -0,0 +1 @@
+DROP INDEX IF EXISTS idx_rentals_user_rental;
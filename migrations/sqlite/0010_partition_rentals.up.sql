@@ -0,0 +1,4 @@
+-- O SQLite não tem particionamento (ver migrations/postgres). As escritas do app
+-- agora filtram por user_id e ID; este índice atende os dois filtros juntos.
+
+CREATE INDEX IF NOT EXISTS idx_rentals_user_rental ON rentals (user_id, rental_id);
@@ -0,0 +1,8 @@
+-- Devolve os aluguéis arquivados para rentals antes de remover o arquivo.
+INSERT INTO rentals (rental_id, user_id, customer_id, equipment_id, start_date, end_date, status,
+                     payment_status, valor, freight_cost, signed_contract_path)
+SELECT rental_id, user_id, customer_id, equipment_id, start_date, end_date, status,
+       payment_status, valor, freight_cost, signed_contract_path
+FROM rentals_archive;
+
+DROP TABLE IF EXISTS rentals_archive;
@@ -0,0 +1,20 @@
+-- Arquivo dos aluguéis concluídos antigos (ver migrations/postgres).
+
+CREATE TABLE IF NOT EXISTS rentals_archive (
+    rental_id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    customer_id TEXT NOT NULL REFERENCES customers (customer_id),
+    equipment_id TEXT NOT NULL REFERENCES equipments (equipment_id),
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payment_status TEXT NOT NULL,
+    valor REAL NOT NULL,
+    freight_cost REAL DEFAULT 0,
+    signed_contract_path TEXT,
+    archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_rentals_archive_user_start ON rentals_archive (user_id, start_date DESC);
+CREATE INDEX IF NOT EXISTS idx_rentals_archive_customer ON rentals_archive (customer_id);
+CREATE INDEX IF NOT EXISTS idx_rentals_archive_equipment ON rentals_archive (equipment_id);
+CREATE INDEX IF NOT EXISTS idx_rentals_archive_id_number ON rentals_archive (CAST(SUBSTR(rental_id, 5) AS INTEGER));
@@ -0,0 +1,21 @@
+-- Fila dos jobs em segundo plano (ver migrations/postgres). Sem SKIP LOCKED: o
+-- UPDATE que reserva o job já é serializado pelo SQLite.
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER REFERENCES users (id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Pendente',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    result TEXT,
+    error TEXT,
+    run_after TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_pending ON jobs (run_after, id) WHERE status = 'Pendente';
+CREATE INDEX IF NOT EXISTS idx_jobs_running ON jobs (started_at) WHERE status = 'Executando';
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at) WHERE finished_at IS NOT NULL;
@@ -0,0 +1,16 @@
+CREATE TABLE rental_alerts_old (
+    rental_id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    kind TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    computed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO rental_alerts_old SELECT rental_id, user_id, kind, end_date, computed_at FROM rental_alerts;
+DROP TABLE rental_alerts;
+ALTER TABLE rental_alerts_old RENAME TO rental_alerts;
+CREATE INDEX IF NOT EXISTS idx_rental_alerts_user_kind ON rental_alerts (user_id, kind, end_date);
+
+CREATE INDEX IF NOT EXISTS idx_rentals_id_number ON rentals (CAST(SUBSTR(rental_id, 5) AS INTEGER));
+CREATE INDEX IF NOT EXISTS idx_rentals_archive_id_number ON rentals_archive (CAST(SUBSTR(rental_id, 5) AS INTEGER));
+
+DROP TABLE IF EXISTS rental_numbers;
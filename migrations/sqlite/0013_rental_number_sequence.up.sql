@@ -0,0 +1,29 @@
+-- Contador global dos números dos aluguéis (ver migrations/postgres). O SQLite não
+-- tem sequências: add_rentals incrementa a única linha de rental_numbers, o que já
+-- reserva o banco para a escrita e impede duas transações de lerem o mesmo valor.
+
+CREATE TABLE IF NOT EXISTS rental_numbers (
+    last_number INTEGER NOT NULL
+);
+INSERT INTO rental_numbers (last_number)
+SELECT MAX(
+    COALESCE((SELECT MAX(CAST(SUBSTR(rental_id, 5) AS INTEGER)) FROM rentals), 0),
+    COALESCE((SELECT MAX(CAST(SUBSTR(rental_id, 5) AS INTEGER)) FROM rentals_archive), 0)
+);
+
+DROP INDEX IF EXISTS idx_rentals_id_number;
+DROP INDEX IF EXISTS idx_rentals_archive_id_number;
+
+-- O SQLite não altera a chave primária: a tabela é recriada com a de rentals.
+CREATE TABLE rental_alerts_new (
+    rental_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    kind TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    computed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, rental_id)
+);
+INSERT INTO rental_alerts_new SELECT rental_id, user_id, kind, end_date, computed_at FROM rental_alerts;
+DROP TABLE rental_alerts;
+ALTER TABLE rental_alerts_new RENAME TO rental_alerts;
+CREATE INDEX IF NOT EXISTS idx_rental_alerts_user_kind ON rental_alerts (user_id, kind, end_date);
@@ -1,22 +1,33 @@
 
 import streamlit as st
 import pandas as pd
+from datetime import date, timedelta
 from streamlit_cookies_manager import CookieManager
 from db_management import (
     get_all_equipments, 
     add_equipment_to_db, 
     update_equipment_in_db, 
     delete_equipment_from_db,
+    get_equipment_utilization,
+    bulk_import_to_db,
     is_authenticated,
     logout
 )
+from profiler import start_page_profile
+from schemas import editable_frame
+from analytics import category_utilization
+from bulk_import import read_spreadsheet, validate
 
 st.set_page_config(page_title="ConcRental - Inventário", layout="wide")
 
+profiler = start_page_profile("1_Inventario")
+
 cookies = CookieManager()
 
 # --- Autenticação ---
-if not is_authenticated(cookies):
+with profiler.phase("autenticacao"):
+    authenticated = is_authenticated(cookies)
+if not authenticated:
     st.error("Por favor, faça o login para acessar esta página.")
     st.stop()
 
@@ -29,100 +40,189 @@ st.title("Gestor de Inventário")
 
 # --- Load Data from DB ---
 user_id = st.session_state.user_id
-equipment_df = get_all_equipments(user_id)
-
-# --- Display Inventory --- 
-st.header("Editar Inventário de Equipamentos")
-
-if equipment_df.empty:
-    st.info("Nenhum equipamento encontrado. Adicione um novo equipamento abaixo.")
-else:
-    st.session_state['original_equipment_df'] = equipment_df.copy()
-
-    edited_df = st.data_editor(
-        equipment_df,
-        use_container_width=True,
-        column_order=("equipment_id", "name", "category", "status", "purchase_status", "times_rented", "serial_number", "acquisition_date"),
-        column_config={
-            "equipment_id": st.column_config.TextColumn("ID Equipamento", disabled=True),
-            "name": st.column_config.TextColumn("Nome", required=True),
-            "category": st.column_config.TextColumn("Categoria", required=True),
-            "serial_number": st.column_config.TextColumn("Número de Série", required=True),
-            "acquisition_date": st.column_config.DateColumn("Data de Aquisição", format="DD/MM/YYYY", required=True),
-            "status": st.column_config.SelectboxColumn(
-                "Status",
-                options=["Disponível", "Alugado", "Em Manutenção"],
-                required=True,
-            ),
-            "purchase_status": st.column_config.SelectboxColumn(
-                "Status da Compra",
-                options=["Quitado", "Não Quitado"],
-                required=True,
-            ),
-            "times_rented": st.column_config.NumberColumn("Vezes Alugado", disabled=True)
-        },
-        key="inventory_editor"
-    )
-
-    if st.button("Salvar Alterações no Inventário"):
-        original_df = st.session_state.original_equipment_df.set_index("equipment_id")
-        edited_df = edited_df.set_index("equipment_id")
-        
-        updates_found = False
-        for idx in edited_df.index:
-            if not original_df.loc[idx].equals(edited_df.loc[idx]):
-                updates = edited_df.loc[idx].to_dict()
-                updates['acquisition_date'] = pd.to_datetime(updates['acquisition_date']).date()
-                update_equipment_in_db(idx, updates)
-                updates_found = True
-        
-        if updates_found:
-            st.success("Inventário atualizado com sucesso!")
-            st.rerun()
-        else:
-            st.info("Nenhuma alteração detectada.")
-
-st.divider()
-
-# --- Actions Section ---
-col1, col2 = st.columns(2)
-
-with col1:
-    with st.expander("Adicionar Novo Equipamento"):
-        with st.form(key="add_equipment_form", clear_on_submit=True):
-            st.subheader("Detalhes do Novo Equipamento")
-            new_name = st.text_input("Nome", placeholder="Ex: Betoneira 500L")
-            new_category = st.text_input("Categoria", placeholder="Ex: Maquinário Pesado")
-            new_serial = st.text_input("Número de Série", placeholder="Ex: SN-12345ABC")
-            new_acq_date = st.date_input("Data de Aquisição")
-            new_purchase_status = st.selectbox("Status da Compra", ["Não Quitado", "Quitado"])
-
-            if st.form_submit_button("Adicionar Equipamento"):
-                if new_name and new_serial and new_category:
-                    success, message = add_equipment_to_db(user_id, new_name, new_category, new_serial, new_acq_date, new_purchase_status)
-                    if success:
-                        st.success(message)
-                        st.rerun()
-                    else:
-                        st.error(message)
-                else:
-                    st.warning("Por favor, preencha todos os campos.")
-
-with col2:
-    with st.expander("Deletar Equipamento"):
-        if not equipment_df.empty:
-            equipment_list = equipment_df["name"] + " (" + equipment_df["serial_number"] + ")"
-            selected_equipment = st.selectbox("Selecione um equipamento para deletar", options=equipment_list, index=None)
-            
-            if selected_equipment:
-                equipment_id_to_delete = equipment_df[equipment_list == selected_equipment]["equipment_id"].iloc[0]
-                
-                if st.button("Deletar Equipamento Selecionado", type="primary"):
-                    success, message = delete_equipment_from_db(equipment_id_to_delete)
-                    if success:
-                        st.success(message)
-                        st.rerun()
+with profiler.phase("carregar_dados"):
+    equipment_df = get_all_equipments(user_id)
+
+tab_inventory, tab_utilization = st.tabs(["Inventário", "Utilização"])
+
+with tab_inventory:
+    # --- Display Inventory --- 
+    st.header("Editar Inventário de Equipamentos")
+
+    if equipment_df.empty:
+        st.info("Nenhum equipamento encontrado. Adicione um novo equipamento abaixo.")
+    else:
+        editor_df = editable_frame(equipment_df)
+        st.session_state['original_equipment_df'] = editor_df.copy()
+
+        edited_df = st.data_editor(
+            editor_df,
+            use_container_width=True,
+            column_order=("equipment_id", "name", "category", "status", "purchase_status", "times_rented", "serial_number", "acquisition_date"),
+            column_config={
+                "equipment_id": st.column_config.TextColumn("ID Equipamento", disabled=True),
+                "name": st.column_config.TextColumn("Nome", required=True),
+                "category": st.column_config.TextColumn("Categoria", required=True),
+                "serial_number": st.column_config.TextColumn("Número de Série", required=True),
+                "acquisition_date": st.column_config.DateColumn("Data de Aquisição", format="DD/MM/YYYY", required=True),
+                "status": st.column_config.SelectboxColumn(
+                    "Status",
+                    options=["Disponível", "Alugado", "Em Manutenção"],
+                    required=True,
+                ),
+                "purchase_status": st.column_config.SelectboxColumn(
+                    "Status da Compra",
+                    options=["Quitado", "Não Quitado"],
+                    required=True,
+                ),
+                "times_rented": st.column_config.NumberColumn("Vezes Alugado", disabled=True)
+            },
+            key="inventory_editor"
+        )
+
+        if st.button("Salvar Alterações no Inventário"):
+            original_df = st.session_state.original_equipment_df.set_index("equipment_id")
+            edited_df = edited_df.set_index("equipment_id")
+
+            updates_found = False
+            for idx in edited_df.index:
+                if not original_df.loc[idx].equals(edited_df.loc[idx]):
+                    updates = edited_df.loc[idx].to_dict()
+                    updates['acquisition_date'] = pd.to_datetime(updates['acquisition_date']).date()
+                    update_equipment_in_db(user_id, idx, updates)
+                    updates_found = True
+
+            if updates_found:
+                st.success("Inventário atualizado com sucesso!")
+                st.rerun()
+            else:
+                st.info("Nenhuma alteração detectada.")
+
+    st.divider()
+
+    # --- Actions Section ---
+    col1, col2 = st.columns(2)
+
+    with col1:
+        with st.expander("Adicionar Novo Equipamento"):
+            with st.form(key="add_equipment_form", clear_on_submit=True):
+                st.subheader("Detalhes do Novo Equipamento")
+                new_name = st.text_input("Nome", placeholder="Ex: Betoneira 500L")
+                new_category = st.text_input("Categoria", placeholder="Ex: Maquinário Pesado")
+                new_serial = st.text_input("Número de Série", placeholder="Ex: SN-12345ABC")
+                new_acq_date = st.date_input("Data de Aquisição")
+                new_purchase_status = st.selectbox("Status da Compra", ["Não Quitado", "Quitado"])
+
+                if st.form_submit_button("Adicionar Equipamento"):
+                    if new_name and new_serial and new_category:
+                        success, message = add_equipment_to_db(user_id, new_name, new_category, new_serial, new_acq_date, new_purchase_status)
+                        if success:
+                            st.success(message)
+                            st.rerun()
+                        else:
+                            st.error(message)
                     else:
-                        st.error(message)
+                        st.warning("Por favor, preencha todos os campos.")
+
+    with col2:
+        with st.expander("Deletar Equipamento"):
+            if not equipment_df.empty:
+                equipment_list = equipment_df["name"] + " (" + equipment_df["serial_number"] + ")"
+                selected_equipment = st.selectbox("Selecione um equipamento para deletar", options=equipment_list, index=None)
+
+                if selected_equipment:
+                    equipment_id_to_delete = equipment_df[equipment_list == selected_equipment]["equipment_id"].iloc[0]
+
+                    if st.button("Deletar Equipamento Selecionado", type="primary"):
+                        success, message = delete_equipment_from_db(user_id, equipment_id_to_delete)
+                        if success:
+                            st.success(message)
+                            st.rerun()
+                        else:
+                            st.error(message)
+            else:
+                st.info("Nenhum equipamento para deletar.")
+
+    with st.expander("Importar Planilha de Equipamentos"):
+        st.caption("CSV ou XLSX com as colunas Nome, Categoria e Número de Série, e opcionalmente Data de Aquisição e Status da Compra.")
+        uploaded_sheet = st.file_uploader("Planilha", type=["csv", "xlsx"], key="equipment_import_file")
+        if uploaded_sheet is not None:
+            try:
+                with profiler.phase("importacao"):
+                    valid_rows, error_rows = validate("equipments", read_spreadsheet(uploaded_sheet))
+            except ValueError as e:
+                st.error(f"Não foi possível ler a planilha: {e}")
+            else:
+                st.write(f"{len(valid_rows)} linhas válidas, {len(error_rows)} com erros.")
+                if not error_rows.empty:
+                    st.dataframe(error_rows, use_container_width=True, hide_index=True)
+                if not valid_rows.empty:
+                    st.dataframe(valid_rows.head(20), use_container_width=True, hide_index=True)
+                    if st.button(f"Importar {len(valid_rows)} Equipamentos", type="primary"):
+                        success, message = bulk_import_to_db(user_id, "equipments", valid_rows)
+                        if success:
+                            st.success(message)
+                        else:
+                            st.error(message)
+
+with tab_utilization:
+    st.header("Utilização dos Equipamentos")
+    st.caption("Dias alugados, ociosos e receita de cada equipamento no período, para orientar compras e vendas.")
+    today = date.today()
+    col1, col2 = st.columns(2)
+    window_start = col1.date_input("Início do Período", value=today - timedelta(days=365), key="utilization_start")
+    window_end = col2.date_input("Fim do Período", value=today, key="utilization_end")
+
+    if window_end < window_start:
+        st.warning("A data de fim deve ser posterior à de início.")
+    else:
+        with profiler.phase("utilizacao"):
+            utilization_df = get_equipment_utilization(user_id, window_start, window_end)
+            category_df = category_utilization(utilization_df)
+
+        if utilization_df.empty:
+            st.info("Nenhum equipamento encontrado.")
         else:
-            st.info("Nenhum equipamento para deletar.")
+            days_available = utilization_df['days_available'].sum()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Utilização Média", f"{utilization_df['days_rented'].sum() / days_available:.1%}" if days_available else "-")
+            col2.metric("Receita no Período", f"R$ {utilization_df['revenue'].sum():,.2f}")
+            col3.metric("Dias Ociosos", f"{utilization_df['idle_days'].sum():,}")
+
+            percent = st.column_config.ProgressColumn("Utilização", format="%.0f%%", min_value=0, max_value=100)
+            st.subheader("Por Categoria")
+            st.dataframe(
+                category_df.assign(utilization=category_df['utilization'] * 100),
+                use_container_width=True,
+                hide_index=True,
+                column_order=("category", "equipments", "utilization", "days_rented", "idle_days", "revenue", "revenue_per_day"),
+                column_config={
+                    "category": "Categoria",
+                    "equipments": "Equipamentos",
+                    "utilization": percent,
+                    "days_rented": "Dias Alugados",
+                    "idle_days": "Dias Ociosos",
+                    "revenue": st.column_config.NumberColumn("Receita", format="R$ %.2f"),
+                    "revenue_per_day": st.column_config.NumberColumn("Receita por Dia", format="R$ %.2f"),
+                },
+            )
+            st.subheader("Por Equipamento")
+            st.dataframe(
+                utilization_df.sort_values("utilization", ascending=False).assign(utilization=lambda df: df['utilization'] * 100),
+                use_container_width=True,
+                hide_index=True,
+                column_order=("equipment_id", "name", "category", "utilization", "rentals", "days_rented", "idle_days", "revenue", "revenue_per_day"),
+                column_config={
+                    "equipment_id": "ID Equipamento",
+                    "name": "Nome",
+                    "category": "Categoria",
+                    "utilization": percent,
+                    "rentals": "Aluguéis",
+                    "days_rented": "Dias Alugados",
+                    "idle_days": "Dias Ociosos",
+                    "revenue": st.column_config.NumberColumn("Receita", format="R$ %.2f"),
+                    "revenue_per_day": st.column_config.NumberColumn("Receita por Dia", format="R$ %.2f"),
+                },
+            )
+
+profiler.finish()
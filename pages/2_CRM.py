@@ -2,26 +2,39 @@
 import streamlit as st
 import pandas as pd
 import os
-import re
 from streamlit_cookies_manager import CookieManager
 from db_management import (
     get_all_customers,
     add_customer_to_db,
     update_customer_in_db,
     delete_customer_from_db,
+    bulk_import_to_db,
+    get_customer_duplicates,
+    find_customer_duplicates_in_db,
+    merge_customers_in_db,
     is_authenticated,
     logout,
-    geocode_and_update_customer
+    geocode_and_update_customer,
+    submit_upload
 )
-from validate_docbr import CPF, CNPJ
-from file_management import upload_file
+from customer_picker import customer_picker
+from job_status import tracked_job
+from jobs import DONE
+from profiler import start_page_profile
+from schemas import editable_frame
+from bulk_import import read_spreadsheet, validate
+from documents import validate_documents
 
 st.set_page_config(page_title="ConcRental - CRM de Clientes", layout="wide")
 
+profiler = start_page_profile("2_CRM")
+
 cookies = CookieManager()
 
 # --- Autenticação ---
-if not is_authenticated(cookies):
+with profiler.phase("autenticacao"):
+    authenticated = is_authenticated(cookies)
+if not authenticated:
     st.error("Por favor, faça o login para acessar esta página.")
     st.stop()
 
@@ -34,20 +47,19 @@ st.title("CRM de Clientes")
 
 # --- Load Data from DB ---
 user_id = st.session_state.user_id
-customers_df = get_all_customers(user_id)
+with profiler.phase("carregar_dados"):
+    customers_df = get_all_customers(user_id)
 
 # --- Funções de Callback ---
 def handle_doc_upload(customer_id, uploader_key):
     uploaded_file = st.session_state.get(uploader_key)
     if uploaded_file:
-        with st.spinner("Fazendo upload do arquivo para a nuvem..."):
-            file_url = upload_file(uploaded_file)
-        
-        if file_url:
-            update_customer_in_db(customer_id, {'document_path': file_url})
-            st.success("Documento salvo na nuvem com sucesso!")
+        # O envio para a nuvem roda em segundo plano (jobs.py).
+        success, result = submit_upload(st.session_state.user_id, "upload_customer_document", customer_id, uploaded_file)
+        if success:
+            st.session_state[f"upload_job_{customer_id}"] = result
         else:
-            st.error("O upload para a nuvem falhou. Verifique sua conexão e o tamanho do arquivo.")
+            st.error(result)
 
 # --- UI ---
 if 'form_success' not in st.session_state:
@@ -78,12 +90,10 @@ with col1:
                     if not all([new_full_name, new_email, new_doc_number]):
                         st.warning("Por favor, preencha todos os campos obrigatórios (Nome, Email, Documento).")
                     else:
-                        doc_number_clean = re.sub(r'\D', '', new_doc_number)
-                        is_valid = False
-                        if doc_type == "CPF": is_valid = CPF().validate(doc_number_clean)
-                        elif doc_type == "CNPJ": is_valid = CNPJ().validate(doc_number_clean)
+                        is_valid, doc_digits = validate_documents([new_doc_number], doc_type)
+                        doc_number_clean = doc_digits.iloc[0]
 
-                        if not is_valid:
+                        if not is_valid[0]:
                             st.error(f"{doc_type} inválido. Por favor, verifique o número.")
                         else:
                             success, message = add_customer_to_db(user_id, new_full_name, new_company_name, new_phone, new_email, new_address, doc_type, doc_number_clean)
@@ -96,12 +106,11 @@ with col1:
 with col2:
     with st.expander("Deletar Cliente"):
         if not customers_df.empty:
-            customer_list = customers_df["full_name"].tolist()
-            selected_customer_name_to_delete = st.selectbox("Selecione um cliente para deletar", options=customer_list, index=None)
-            if selected_customer_name_to_delete:
-                customer_id_to_delete = customers_df[customers_df["full_name"] == selected_customer_name_to_delete]["customer_id"].iloc[0]
+            customer_to_delete = customer_picker(user_id, "Buscar cliente para deletar", key="delete_customer")
+            if customer_to_delete:
+                customer_id_to_delete = customer_to_delete["customer_id"]
                 if st.button("Deletar Cliente Selecionado", type="primary"):
-                    success, message = delete_customer_from_db(customer_id_to_delete)
+                    success, message = delete_customer_from_db(user_id, customer_id_to_delete)
                     if success:
                         st.success(message)
                         st.rerun()
@@ -110,13 +119,74 @@ with col2:
         else:
             st.info("Nenhum cliente para deletar.")
 
+with st.expander("Importar Planilha de Clientes"):
+    st.caption("CSV ou XLSX com as colunas Nome Completo, Email e Documento (CPF ou CNPJ), e opcionalmente Tipo de Documento, Empresa, Telefone e Endereço.")
+    uploaded_sheet = st.file_uploader("Planilha", type=["csv", "xlsx"], key="customer_import_file")
+    if uploaded_sheet is not None:
+        try:
+            with profiler.phase("importacao"):
+                valid_rows, error_rows = validate("customers", read_spreadsheet(uploaded_sheet))
+        except ValueError as e:
+            st.error(f"Não foi possível ler a planilha: {e}")
+        else:
+            st.write(f"{len(valid_rows)} linhas válidas, {len(error_rows)} com erros.")
+            if not error_rows.empty:
+                st.dataframe(error_rows, use_container_width=True, hide_index=True)
+            if not valid_rows.empty:
+                st.dataframe(valid_rows.head(20), use_container_width=True, hide_index=True)
+                if st.button(f"Importar {len(valid_rows)} Clientes", type="primary"):
+                    success, message = bulk_import_to_db(user_id, "customers", valid_rows)
+                    if success:
+                        st.success(message)
+                    else:
+                        st.error(message)
+
+with st.expander("Possíveis Clientes Duplicados"):
+    if st.button("Procurar Duplicados Agora"):
+        with profiler.phase("duplicados"):
+            success, message = find_customer_duplicates_in_db(user_id)
+        if success:
+            st.success(message)
+        else:
+            st.error(message)
+    duplicates_df = get_customer_duplicates(user_id)
+    if duplicates_df.empty:
+        st.info("Nenhum possível duplicado na última verificação.")
+    else:
+        st.caption(f"Última verificação: {pd.to_datetime(duplicates_df['computed_at'].max()).strftime('%d/%m/%Y %H:%M')}")
+        st.dataframe(
+            duplicates_df[['customer_id', 'full_name', 'duplicate_id', 'duplicate_name', 'score', 'reasons']],
+            use_container_width=True, hide_index=True,
+            column_config={
+                "customer_id": "Cliente", "full_name": "Nome", "duplicate_id": "Possível Duplicado",
+                "duplicate_name": "Nome do Duplicado", "reasons": "Em Comum",
+                "score": st.column_config.ProgressColumn("Semelhança do Nome", min_value=0.0, max_value=1.0),
+            },
+        )
+        pairs = {row.Index: row for row in duplicates_df.itertuples()}
+        selected_pair = st.selectbox(
+            "Par para mesclar", options=list(pairs), index=None, placeholder="Selecione...",
+            format_func=lambda i: f"{pairs[i].full_name} ({pairs[i].customer_id}) × {pairs[i].duplicate_name} ({pairs[i].duplicate_id})",
+        )
+        if selected_pair is not None:
+            pair = pairs[selected_pair]
+            names = {pair.customer_id: pair.full_name, pair.duplicate_id: pair.duplicate_name}
+            keep_id = st.radio("Manter o cadastro", options=list(names), format_func=lambda i: f"{names[i]} ({i})", horizontal=True)
+            merged_id = pair.duplicate_id if keep_id == pair.customer_id else pair.customer_id
+            st.caption(f"Os aluguéis de {merged_id} passam para {keep_id}, os dados que faltam são copiados e {merged_id} é excluído.")
+            if st.button("Mesclar Clientes", type="primary"):
+                success, message = merge_customers_in_db(user_id, keep_id, merged_id)
+                if success:
+                    st.success(message)
+                    st.rerun()
+                else:
+                    st.error(message)
+
 with st.expander("Ações do Cliente (Contratos, Documentos e Coordenadas)"):
     if not customers_df.empty:
-        customer_list_actions = customers_df["full_name"].tolist()
-        selected_customer_name_actions = st.selectbox("Selecione um cliente para mais ações", options=customer_list_actions, index=None, key="actions_select")
+        selected_customer_row = customer_picker(user_id, "Buscar cliente para mais ações", key="actions_customer")
 
-        if selected_customer_name_actions:
-            selected_customer_row = customers_df[customers_df["full_name"] == selected_customer_name_actions].iloc[0]
+        if selected_customer_row:
             selected_customer_id = selected_customer_row["customer_id"]
             
             action_col1, action_col2, action_col3 = st.columns(3)
@@ -136,18 +206,28 @@ with st.expander("Ações do Cliente (Contratos, Documentos e Coordenadas)"):
                     st.info("Nenhum documento cadastrado.")
                 uploader_key = f"uploader_{selected_customer_id}"
                 st.file_uploader("Carregar novo documento", type=['pdf', 'png', 'jpg', 'jpeg'], key=uploader_key, on_change=handle_doc_upload, args=(selected_customer_id, uploader_key))
+                upload_job = tracked_job(user_id, f"upload_job_{selected_customer_id}", "Fazendo upload do arquivo para a nuvem...")
+                if upload_job:
+                    if upload_job["status"] == DONE:
+                        st.success("Documento salvo na nuvem com sucesso!")
+                    else:
+                        st.error(f"O upload para a nuvem falhou: {upload_job['error']}")
 
             with action_col3:
                 st.subheader("Geolocalização")
                 if st.button("Atualizar Coordenadas"):
                     address_to_geocode = selected_customer_row.get('address')
-                    with st.spinner("Buscando coordenadas..."):
-                        success, message = geocode_and_update_customer(selected_customer_id, address_to_geocode)
+                    success, result = geocode_and_update_customer(user_id, selected_customer_id, address_to_geocode)
                     if success:
-                        st.success(message)
-                        st.rerun()
+                        st.session_state.geocode_job = result
                     else:
-                        st.error(message)
+                        st.error(result)
+                geocode_job = tracked_job(user_id, "geocode_job", "Buscando coordenadas...")
+                if geocode_job:
+                    if geocode_job["status"] == DONE:
+                        st.success("Coordenadas atualizadas com sucesso!")
+                    else:
+                        st.error(geocode_job["error"])
     else:
         st.info("Nenhum cliente cadastrado para selecionar ações.")
 
@@ -159,10 +239,11 @@ if customers_df.empty:
     st.info("Nenhum cliente encontrado. Adicione um novo cliente para começar.")
 else:
     display_cols = [col for col in customers_df.columns if col not in ['document_path', 'latitude', 'longitude']]
-    st.session_state['original_customers_df'] = customers_df.copy()
+    editor_df = editable_frame(customers_df)
+    st.session_state['original_customers_df'] = editor_df.copy()
 
     edited_df = st.data_editor(
-        customers_df,
+        editor_df,
         use_container_width=True,
         column_order=display_cols,
         column_config={
@@ -184,15 +265,21 @@ else:
     if st.button("Salvar Alterações na Lista"):
         original_df = st.session_state.original_customers_df.set_index("customer_id")
         edited_df = edited_df.set_index("customer_id")
-        updates_found = False
-        for idx in edited_df.index:
-            if not original_df.loc[idx].equals(edited_df.loc[idx]):
-                updates = edited_df.loc[idx].to_dict()
-                update_customer_in_db(idx, updates)
-                updates_found = True
-        
-        if updates_found:
+        changed_ids = [idx for idx in edited_df.index if not original_df.loc[idx].equals(edited_df.loc[idx])]
+        changed_df = edited_df.loc[changed_ids]
+        # Documentos das linhas alteradas validados de uma vez; clientes antigos podem não ter documento.
+        doc_valid, doc_digits = validate_documents(changed_df['document_number'], changed_df['document_type'])
+        invalid_docs = changed_df.index[~doc_valid & changed_df['document_number'].notna().to_numpy()]
+
+        if not changed_ids:
+            st.info("Nenhuma alteração detectada.")
+        elif len(invalid_docs):
+            st.error(f"CPF/CNPJ inválido para: {', '.join(invalid_docs)}. Nenhuma alteração foi salva.")
+        else:
+            changed_df = changed_df.assign(document_number=doc_digits.where(changed_df['document_number'].notna(), None))
+            for idx in changed_df.index:
+                update_customer_in_db(user_id, idx, changed_df.loc[idx].to_dict())
             st.success("Dados dos clientes atualizados com sucesso!")
             st.rerun()
-        else:
-            st.info("Nenhuma alteração detectada.")
+
+profiler.finish()
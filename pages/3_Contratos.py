@@ -1,27 +1,36 @@
 import streamlit as st
 import pandas as pd
 import os
-from datetime import datetime
 from streamlit_cookies_manager import CookieManager
 from db_management import (
-    get_all_rentals,
-    get_all_customers,
-    get_all_equipments,
     add_rentals_to_db,
     complete_rental_in_db,
-    update_rental_in_db,
+    get_rental_alerts,
+    get_archived_rentals,
+    submit_job,
+    submit_upload,
     is_authenticated,
     logout
 )
-from pdf_generator import create_contract_pdf
-from file_management import upload_file
+from profiler import start_page_profile
+from prefetch import load_page_data
+from reports import PAGE_COLUMNS, merge_rental_details
+from availability import AvailabilityIndex
+from customer_picker import customer_picker
+from alerts import OVERDUE
+from job_status import tracked_job
+from jobs import DONE
 
 st.set_page_config(page_title="ConcRental - Contratos", layout="wide")
 
+profiler = start_page_profile("3_Contratos")
+
 cookies = CookieManager()
 
 # --- Autenticação ---
-if not is_authenticated(cookies):
+with profiler.phase("autenticacao"):
+    authenticated = is_authenticated(cookies)
+if not authenticated:
     st.error("Por favor, faça o login para acessar esta página.")
     st.stop()
 
@@ -34,22 +43,28 @@ st.title("Contratos de Aluguel")
 
 # --- Load Data from DB ---
 user_id = st.session_state.user_id
-rentals_df = get_all_rentals(user_id)
-customers_df = get_all_customers(user_id)
-equipment_df = get_all_equipments(user_id)
+with profiler.phase("carregar_dados"):
+    data = load_page_data(user_id, "3_Contratos")
+    rentals_df, customers_df, equipment_df = data["rentals"], data["customers"], data["equipments"]
 
 # --- Funções de Callback ---
 def handle_contract_upload(rental_id, uploader_key):
     uploaded_file = st.session_state.get(uploader_key)
     if uploaded_file:
-        with st.spinner("Fazendo upload do contrato para a nuvem..."):
-            file_url = upload_file(uploaded_file)
-        
-        if file_url:
-            update_rental_in_db(rental_id, 'signed_contract_path', file_url)
-            st.success("Contrato assinado salvo na nuvem com sucesso!")
+        # O envio para a nuvem roda em segundo plano (jobs.py).
+        success, result = submit_upload(st.session_state.user_id, "upload_signed_contract", rental_id, uploaded_file)
+        if success:
+            st.session_state[f"upload_job_{rental_id}"] = result
         else:
-            st.error("O upload para a nuvem falhou. Verifique sua conexão e o tamanho do arquivo.")
+            st.error(result)
+
+def contract_payload(row):
+    """Campos do PDF do contrato (pdf_generator.py) em JSON, para o job 'contract_pdf'."""
+    payload = {field: row[field] for field in ('rental_id', 'full_name', 'phone_number', 'address', 'name',
+                                               'serial_number', 'payment_status')}
+    payload.update(valor=float(row['valor']), start_date=pd.to_datetime(row['start_date']).isoformat(),
+                   end_date=pd.to_datetime(row['end_date']).isoformat())
+    return payload
 
 # --- Page Filtering ---
 customer_id_filter = st.session_state.get("customer_id_filter")
@@ -67,27 +82,28 @@ if customer_id_filter:
 if not customer_id_filter:
     with st.expander("Criar Novo Aluguel"):
         freight_cost_from_session = st.session_state.get("freight_cost_to_contract", 0.0)
+        # As datas ficam fora do formulário para que a lista de equipamentos
+        # livres acompanhe o período escolhido.
+        col1, col2 = st.columns(2)
+        start_date = col1.date_input("Data de Início")
+        end_date = col2.date_input("Data de Fim")
+        availability = AvailabilityIndex(rentals_df)
+        available_equipment = availability.free_equipment(equipment_df, start_date, end_date)
+        st.caption(f"{len(available_equipment)} de {len(equipment_df)} equipamentos livres no período.")
+        # A busca de clientes também fica fora do formulário, para responder a cada termo.
+        selected_customer = customer_picker(user_id, "Buscar Cliente", key="rental_customer") if not customers_df.empty else None
         with st.form(key="new_rental_form", clear_on_submit=True):
             st.subheader("Detalhes do Novo Contrato")
-            if not customers_df.empty:
-                customer_list = customers_df['full_name'].tolist()
-                selected_customer_name = st.selectbox("Escolha um Cliente", options=customer_list, index=None, placeholder="Selecione...")
-            else:
-                selected_customer_name = None
-            available_equipment = equipment_df[equipment_df['status'] == 'Disponível']
             selected_equipment_names = st.multiselect("Escolha o(s) Equipamento(s)", options=available_equipment['name'].tolist(), placeholder="Selecione...")
             col1, col2 = st.columns(2)
             valor_total = col1.number_input("Valor Total do Aluguel (R$)", min_value=0.01, placeholder="0.00", format="%.2f")
             freight_cost = col2.number_input("Custo do Frete (R$)", min_value=0.0, value=float(freight_cost_from_session), format="%.2f")
-            col1, col2 = st.columns(2)
-            start_date = col1.date_input("Data de Início")
-            end_date = col2.date_input("Data de Fim")
             if st.form_submit_button("Criar Contrato"):
-                if selected_customer_name and selected_equipment_names and valor_total > 0:
+                if selected_customer and selected_equipment_names and valor_total > 0:
                     if end_date < start_date:
                         st.warning("A data final não pode ser anterior à data de início.")
                     else:
-                        customer_id = customers_df[customers_df['full_name'] == selected_customer_name]['customer_id'].iloc[0]
+                        customer_id = selected_customer['customer_id']
                         equipment_ids_to_rent = available_equipment[available_equipment['name'].isin(selected_equipment_names)]['equipment_id'].tolist()
                         valor_per_item = valor_total / len(equipment_ids_to_rent)
                         success, message = add_rentals_to_db(user_id, customer_id, equipment_ids_to_rent, start_date, end_date, valor_per_item, freight_cost)
@@ -104,11 +120,11 @@ if not customer_id_filter:
 # --- View Rentals ---
 st.header("Gerenciar Aluguéis")
 
-def display_rentals(df, title):
+def display_rentals(df, title, overdue_ids=frozenset()):
     st.subheader(title)
     if not df.empty:
         for index, row in df.iterrows():
-            is_overdue = pd.to_datetime(row['end_date']).date() < datetime.now().date() and row['status_rental'] == 'Ativo'
+            is_overdue = row['rental_id'] in overdue_ids
             with st.container(border=True):
                 c1, c2, c3 = st.columns([2,1,1])
                 with c1:
@@ -116,12 +132,27 @@ def display_rentals(df, title):
                     st.markdown(f"**Valor do Aluguel:** R$ {row['valor']:.2f} | **Custo do Frete:** R$ {float(row['freight_cost'] or 0.0):.2f}")
                     st.markdown(f"**Devolução:** {pd.to_datetime(row['end_date']).strftime('%d/%m/%Y')} {'<span style=\'color:red;\'><b>(ATRASADO)</b></span>' if is_overdue else ''}", unsafe_allow_html=True)
                 with c2:
-                    pdf_bytes = create_contract_pdf(row)
-                    st.download_button(label="Gerar Contrato", data=pdf_bytes, file_name=f"contrato_{row['rental_id']}.pdf", mime="application/pdf", key=f"pdf_{row['rental_id']}", use_container_width=True)
+                    # O PDF é gerado em segundo plano só quando pedido (jobs.py).
+                    pdf_path_key = f"pdf_path_{row['rental_id']}"
+                    if st.button("Gerar Contrato", key=f"pdf_{row['rental_id']}", use_container_width=True):
+                        success, result = submit_job(user_id, "contract_pdf", contract_payload(row))
+                        if success:
+                            st.session_state[f"pdf_job_{row['rental_id']}"] = result
+                        else:
+                            st.error(result)
+                    pdf_job = tracked_job(user_id, f"pdf_job_{row['rental_id']}", "Gerando o contrato...")
+                    if pdf_job and pdf_job["status"] == DONE:
+                        st.session_state[pdf_path_key] = pdf_job["result"]["path"]
+                    elif pdf_job:
+                        st.error(f"Erro ao gerar o contrato: {pdf_job['error']}")
+                    pdf_path = st.session_state.get(pdf_path_key)
+                    if pdf_path and os.path.exists(pdf_path):
+                        with open(pdf_path, "rb") as pdf_file:
+                            st.download_button(label="Baixar Contrato", data=pdf_file.read(), file_name=f"contrato_{row['rental_id']}.pdf", mime="application/pdf", key=f"pdf_download_{row['rental_id']}", use_container_width=True)
                 with c3:
                     if row['status_rental'] == 'Ativo':
                         if st.button("Marcar como Devolvido", key=f"return_{row['rental_id']}", use_container_width=True):
-                            success, message = complete_rental_in_db(row['rental_id'], row['equipment_id'])
+                            success, message = complete_rental_in_db(user_id, row['rental_id'], row['equipment_id'])
                             if success: st.success(message); st.rerun()
                             else: st.error(message)
                 
@@ -135,15 +166,55 @@ def display_rentals(df, title):
                 
                 uploader_key = f"signed_{row['rental_id']}"
                 st.file_uploader("Carregar Contrato Assinado", type=['pdf', 'png', 'jpg', 'jpeg'], key=uploader_key, on_change=handle_contract_upload, args=(row['rental_id'], uploader_key))
+                upload_job = tracked_job(user_id, f"upload_job_{row['rental_id']}", "Fazendo upload do contrato para a nuvem...")
+                if upload_job:
+                    if upload_job["status"] == DONE:
+                        st.success("Contrato assinado salvo na nuvem com sucesso!")
+                    else:
+                        st.error(f"O upload para a nuvem falhou: {upload_job['error']}")
     else:
         st.info(f"Nenhum aluguel na seção '{title}'.")
 
 if rentals_df.empty:
     st.info("Nenhum contrato encontrado para a seleção atual.")
 else:
-    all_rentals_merged = rentals_df.merge(customers_df, on="customer_id").merge(equipment_df, on="equipment_id", suffixes=('_rental', '_equip'))
-    active_rentals = all_rentals_merged[all_rentals_merged['status_rental'] == 'Ativo']
-    completed_rentals = all_rentals_merged[all_rentals_merged['status_rental'] == 'Concluído']
-    
-    display_rentals(active_rentals, "Aluguéis Ativos e Atrasados")
-    display_rentals(completed_rentals, "Histórico de Aluguéis Concluídos")
+    with profiler.phase("merge"):
+        all_rentals_merged = merge_rental_details(rentals_df, customers_df, equipment_df, suffixes=('_rental', '_equip'))
+        active_rentals = all_rentals_merged[all_rentals_merged['status_rental'] == 'Ativo']
+        completed_rentals = all_rentals_merged[all_rentals_merged['status_rental'] == 'Concluído']
+
+    with profiler.phase("renderizacao"):
+        # Atrasos pré-calculados pelo job de alertas (alerts.py).
+        rental_alerts = get_rental_alerts(user_id)
+        overdue_ids = set(rental_alerts.loc[rental_alerts['kind'] == OVERDUE, 'rental_id'])
+        display_rentals(active_rentals, "Aluguéis Ativos e Atrasados", overdue_ids)
+        display_rentals(completed_rentals, "Histórico de Aluguéis Concluídos")
+
+# Aluguéis antigos movidos para o arquivo (archive.py): lidos só quando pedidos.
+st.subheader("Histórico Arquivado")
+if st.toggle("Carregar aluguéis arquivados", key="load_archived_rentals"):
+    with profiler.phase("arquivo"):
+        archived_df = get_archived_rentals(user_id, PAGE_COLUMNS["3_Contratos"]["rentals"])
+    if archived_df.empty or customers_df.empty or equipment_df.empty:
+        st.info("Nenhum aluguel arquivado.")
+    else:
+        archived_merged = merge_rental_details(archived_df, customers_df, equipment_df, suffixes=('_rental', '_equip'))
+        st.dataframe(
+            archived_merged[['rental_id', 'full_name', 'name', 'start_date', 'end_date', 'payment_status', 'valor',
+                             'freight_cost', 'signed_contract_path']],
+            column_config={
+                "rental_id": "Aluguel",
+                "full_name": "Cliente",
+                "name": "Equipamento",
+                "start_date": st.column_config.DateColumn("Início", format="DD/MM/YYYY"),
+                "end_date": st.column_config.DateColumn("Devolução", format="DD/MM/YYYY"),
+                "payment_status": "Pagamento",
+                "valor": st.column_config.NumberColumn("Valor", format="R$ %.2f"),
+                "freight_cost": st.column_config.NumberColumn("Frete", format="R$ %.2f"),
+                "signed_contract_path": st.column_config.LinkColumn("Contrato Assinado", display_text="Ver"),
+            },
+            hide_index=True,
+            use_container_width=True,
+        )
+
+profiler.finish()
@@ -1,22 +1,31 @@
 import streamlit as st
 import pandas as pd
+import os
 from datetime import datetime
 from streamlit_cookies_manager import CookieManager
 from db_management import (
-    get_all_rentals, 
-    get_all_customers, 
-    get_all_equipments, 
+    get_daily_revenue,
+    get_revenue_series,
+    export_entries_to_file,
     is_authenticated, 
     logout,
     update_rental_in_db
 )
+from profiler import start_page_profile
+from prefetch import load_page_data
+from reports import financial_summary, merge_rental_details
+from exports import FORMATS as EXPORT_FORMATS
 
 st.set_page_config(page_title="ConcRental - Financeiro", layout="wide")
 
+profiler = start_page_profile("4_Financeiro")
+
 cookies = CookieManager()
 
 # --- Autenticação ---
-if not is_authenticated(cookies):
+with profiler.phase("autenticacao"):
+    authenticated = is_authenticated(cookies)
+if not authenticated:
     st.error("Por favor, faça o login para acessar esta página.")
     st.stop()
 
@@ -29,52 +38,72 @@ st.title("Financeiro")
 
 # --- Load Data from DB ---
 user_id = st.session_state.user_id
-rentals_df = get_all_rentals(user_id)
-customers_df = get_all_customers(user_id)
-equipment_df = get_all_equipments(user_id)
+with profiler.phase("carregar_dados"):
+    data = load_page_data(user_id, "4_Financeiro")
+    rentals_df, customers_df, equipment_df = data["rentals"], data["customers"], data["equipments"]
 
 # --- KPIs Section ---
 st.header("Visão Geral Financeira")
 
-if rentals_df.empty:
+# Aluguéis concluídos e pagos antigos ficam no arquivo (archive.py) e só entram
+# nos totais quando pedido.
+include_archive = st.toggle("Incluir histórico arquivado", key="revenue_include_archive",
+                            help="Soma aos totais os aluguéis antigos já arquivados.")
+
+if rentals_df.empty and not include_archive:
     st.info("Nenhum dado financeiro para exibir. Crie um aluguel para começar.")
 else:
-    rentals_df['end_date'] = pd.to_datetime(rentals_df['end_date'])
-    rentals_df['start_date'] = pd.to_datetime(rentals_df['start_date'])
-    
-    today = datetime.now()
-
-    caixa_df = rentals_df[rentals_df['payment_status'] != 'Em Aberto']
-    receber_df = rentals_df[rentals_df['payment_status'] == 'Em Aberto']
-
-    caixa_mes = caixa_df[caixa_df['end_date'].dt.month == today.month]['valor'].sum()
-    receber_mes = receber_df[receber_df['end_date'].dt.month == today.month]['valor'].sum()
-
-    caixa_ano = caixa_df[caixa_df['end_date'].dt.year == today.year]['valor'].sum()
-    receber_ano = receber_df[receber_df['end_date'].dt.year == today.year]['valor'].sum()
-
-    caixa_total = caixa_df['valor'].sum()
-    receber_total = receber_df['valor'].sum()
+    # Receita reconhecida por dia do aluguel, não no mês da devolução (revenue.py).
+    with profiler.phase("kpis"):
+        summary = financial_summary(get_daily_revenue(user_id, include_archive), datetime.now())
 
     col1, col2, col3 = st.columns(3)
-    col1.metric("Caixa (Este Mês)", f"R$ {caixa_mes:.2f}")
-    col2.metric("Caixa (Este Ano)", f"R$ {caixa_ano:.2f}")
-    col3.metric("Caixa (Total)", f"R$ {caixa_total:.2f}")
+    col1.metric("Caixa (Este Mês)", f"R$ {summary['caixa_mes']:.2f}")
+    col2.metric("Caixa (Este Ano)", f"R$ {summary['caixa_ano']:.2f}")
+    col3.metric("Caixa (Total)", f"R$ {summary['caixa_total']:.2f}")
 
     col1, col2, col3 = st.columns(3)
-    col1.metric("A Receber (Este Mês)", f"R$ {receber_mes:.2f}")
-    col2.metric("A Receber (Este Ano)", f"R$ {receber_ano:.2f}")
-    col3.metric("A Receber (Total)", f"R$ {receber_total:.2f}")
+    col1.metric("A Receber (Este Mês)", f"R$ {summary['receber_mes']:.2f}")
+    col2.metric("A Receber (Este Ano)", f"R$ {summary['receber_ano']:.2f}")
+    col3.metric("A Receber (Total)", f"R$ {summary['receber_total']:.2f}")
+
+    st.subheader("Fluxo de Caixa")
+    period = st.radio("Agrupar por", options=["Mês", "Semana"], horizontal=True, key="revenue_period")
+    with profiler.phase("fluxo_de_caixa"):
+        series = get_revenue_series(user_id, "M" if period == "Mês" else "W", include_archive)
+        chart_df = pd.DataFrame({
+            "Recebido": series['rent_paid'],
+            "A Receber": series['rent_open'],
+            "Frete": series['freight_paid'] + series['freight_open'],
+        })
+    st.bar_chart(chart_df, y_label="R$")
 
 st.divider()
 
 # --- Detailed List Section ---
 st.header("Todos os Lançamentos")
 
+with st.expander("Exportar Lançamentos"):
+    export_format = st.selectbox("Formato", options=list(EXPORT_FORMATS), format_func=str.upper)
+    if st.button("Gerar Arquivo"):
+        with profiler.phase("exportacao"):
+            success, result = export_entries_to_file(user_id, export_format)
+        if success:
+            with open(result, "rb") as export_file:
+                st.download_button(
+                    "Baixar Lançamentos", data=export_file,
+                    file_name=f"lancamentos.{EXPORT_FORMATS[export_format]['extension']}",
+                    mime=EXPORT_FORMATS[export_format]['mime'],
+                )
+            os.remove(result)
+        else:
+            st.error(result)
+
 if rentals_df.empty or customers_df.empty or equipment_df.empty:
     st.info("Nenhum lançamento para exibir.")
 else:
-    all_rentals_merged = rentals_df.merge(customers_df, on="customer_id").merge(equipment_df, on="equipment_id")
+    with profiler.phase("merge"):
+        all_rentals_merged = merge_rental_details(rentals_df, customers_df, equipment_df)
 
     for index, row in all_rentals_merged.iterrows():
         border_color = "#FF4B4B" if row['payment_status'] == 'Em Aberto' else "#28A745"
@@ -102,7 +131,9 @@ else:
                     label_visibility="collapsed"
                 )
                 if selected_payment != row['payment_status']:
-                    update_rental_in_db(row['rental_id'], 'payment_status', selected_payment)
+                    update_rental_in_db(user_id, row['rental_id'], 'payment_status', selected_payment)
                     st.rerun()
             
-            st.markdown("</div>", unsafe_allow_html=True)
\ No newline at end of file
+            st.markdown("</div>", unsafe_allow_html=True)
+
+profiler.finish()
@@ -2,19 +2,22 @@ import streamlit as st
 import pandas as pd
 from streamlit_cookies_manager import CookieManager
 from db_management import (
-    get_all_rentals,
-    get_all_customers,
-    get_all_equipments,
     is_authenticated,
     logout
 )
+from profiler import start_page_profile
+from prefetch import load_page_data
 
 st.set_page_config(page_title="ConcRental - Mapa", layout="wide")
 
+profiler = start_page_profile("5_Mapa")
+
 cookies = CookieManager()
 
 # --- Autenticação ---
-if not is_authenticated(cookies):
+with profiler.phase("autenticacao"):
+    authenticated = is_authenticated(cookies)
+if not authenticated:
     st.error("Por favor, faça o login para acessar esta página.")
     st.stop()
 
@@ -28,9 +31,9 @@ st.markdown("Localização em tempo real dos equipamentos que estão atualmente
 
 # --- Load Data ---
 user_id = st.session_state.user_id
-rentals_df = get_all_rentals(user_id)
-customers_df = get_all_customers(user_id)
-equipment_df = get_all_equipments(user_id)
+with profiler.phase("carregar_dados"):
+    data = load_page_data(user_id, "5_Mapa")
+    rentals_df, customers_df = data["rentals"], data["customers"]
 
 if rentals_df.empty or customers_df.empty:
     st.info("Não há dados de aluguéis ou clientes para exibir no mapa.")
@@ -42,8 +45,9 @@ active_rentals_df = rentals_df[rentals_df['status'] == 'Ativo']
 if active_rentals_df.empty:
     st.info("Nenhum equipamento alugado no momento para exibir no mapa.")
 else:
-    map_data_df = active_rentals_df.merge(customers_df, on="customer_id")
-    map_data_df.dropna(subset=['latitude', 'longitude'], inplace=True)
+    with profiler.phase("merge"):
+        map_data_df = active_rentals_df.merge(customers_df, on="customer_id")
+        map_data_df.dropna(subset=['latitude', 'longitude'], inplace=True)
 
     if map_data_df.empty:
         st.warning("Nenhum dos clientes com aluguéis ativos possui um endereço geolocalizado. Verifique os endereços no CRM.")
@@ -52,4 +56,6 @@ else:
         map_data_df.rename(columns={'latitude': 'lat', 'longitude': 'lon'}, inplace=True)
         
         # Usando o st.map básico que é garantido de funcionar.
-        st.map(map_data_df, zoom=11)
\ No newline at end of file
+        st.map(map_data_df, zoom=11)
+
+profiler.finish()
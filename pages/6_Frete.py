@@ -1,5 +1,4 @@
 import streamlit as st
-import requests
 from db_management import (
     is_authenticated,
     logout,
@@ -8,18 +7,25 @@ from db_management import (
     get_user_addresses,
     add_user_address,
     delete_user_address,
-    get_all_customers
+    submit_job
 )
 from streamlit_cookies_manager import CookieManager
-from geopy.distance import geodesic
 import pandas as pd
+from profiler import start_page_profile
+from customer_picker import customer_picker
+from job_status import tracked_job
+from jobs import DONE
 
 st.set_page_config(page_title="ConcRental - Frete", layout="wide")
 
+profiler = start_page_profile("6_Frete")
+
 cookies = CookieManager()
 
 # --- Autenticação ---
-if not is_authenticated(cookies):
+with profiler.phase("autenticacao"):
+    authenticated = is_authenticated(cookies)
+if not authenticated:
     st.error("Por favor, faça o login para acessar esta página.")
     st.stop()
 
@@ -31,7 +37,6 @@ if st.sidebar.button("Sair"):
 st.title("Cálculo de Frete")
 
 user_id = st.session_state.user_id
-customers_df = get_all_customers(user_id)
 
 # --- Seção de Configurações ---
 with st.expander("Configurações de Cálculo de Frete", expanded=True):
@@ -69,14 +74,20 @@ with st.expander("Gerenciar Endereços de Partida"):
         address = st.text_input("Endereço Completo", placeholder="Ex: Rua das Flores, 123, São José dos Pinhais, PR")
         if st.form_submit_button("Adicionar Endereço"):
             if address_name and address:
-                success, message = add_user_address(user_id, address_name, address)
+                # Geocodificação em segundo plano (jobs.py).
+                success, result = add_user_address(user_id, address_name, address)
                 if success:
-                    st.success(message)
-                    st.rerun()
+                    st.session_state.address_job = result
                 else:
-                    st.error(message)
+                    st.error(result)
             else:
                 st.warning("Por favor, preencha todos os campos.")
+    address_job = tracked_job(user_id, "address_job", "Buscando as coordenadas do endereço...")
+    if address_job:
+        if address_job["status"] == DONE:
+            st.success("Endereço adicionado com sucesso!")
+        else:
+            st.error(address_job["error"])
 
     st.divider()
 
@@ -90,7 +101,7 @@ with st.expander("Gerenciar Endereços de Partida"):
                 st.text(f"{row['address_name']}: {row['address']}")
             with col2:
                 if st.button("Deletar", key=f"delete_{row['id']}"):
-                    success, message = delete_user_address(row['id'])
+                    success, message = delete_user_address(user_id, row['id'])
                     if success:
                         st.success(message)
                         st.rerun()
@@ -105,75 +116,52 @@ with st.expander("Calculadora de Frete", expanded=True):
     st.subheader("Calcular valor para o contrato")
     user_addresses = get_user_addresses(user_id)
 
-    if user_addresses.empty or user_settings["fuel_consumption"] == 0.0 or customers_df.empty:
-        st.warning("Por favor, cadastre pelo menos um endereço de partida, configure o consumo de combustível e cadastre clientes para usar a calculadora.")
+    if user_addresses.empty or user_settings["fuel_consumption"] == 0.0:
+        st.warning("Por favor, cadastre pelo menos um endereço de partida e configure o consumo de combustível para usar a calculadora.")
     else:
+        # Busca no servidor (fora do formulário, para responder a cada termo).
+        with profiler.phase("busca_cliente"):
+            selected_customer = customer_picker(user_id, "Buscar Cliente", key="freight_customer")
+        customer_address = selected_customer["address"] if selected_customer else None
+
         with st.form("freight_form"):
             start_address_name = st.selectbox(
                 "Escolha o endereço de partida",
                 options=user_addresses["address_name"].tolist()
             )
-            
-            # Replace text input with selectbox for customer
-            selected_customer_name = st.selectbox(
-                "Escolha o Cliente",
-                options=customers_df["full_name"].tolist()
-            )
-            
-            # Get the customer's address from the selected customer
-            customer_address = customers_df[customers_df["full_name"] == selected_customer_name]["address"].iloc[0]
 
             if st.form_submit_button("Calcular Frete"):
-                if customer_address:
-                    try:
-                        start_address_row = user_addresses[user_addresses["address_name"] == start_address_name].iloc[0]
-                        start_coords = (start_address_row["latitude"], start_address_row["longitude"])
-                        
-                        from geopy.geocoders import Nominatim
-                        geolocator = Nominatim(user_agent="concrental_app_v3")
-                        customer_location = geolocator.geocode(customer_address)
-
-                        if customer_location:
-                            customer_coords = (customer_location.latitude, customer_location.longitude)
-                            
-                            # Calcular distância
-                            # --- OSRM Integration ---
-                            # OSRM demo server URL
-                            osrm_url = "http://router.project-osrm.org/route/v1/driving/"
-                            
-                            # Format coordinates for OSRM API: longitude,latitude
-                            start_lon_lat = f"{start_coords[1]},{start_coords[0]}"
-                            customer_lon_lat = f"{customer_coords[1]},{customer_coords[0]}"
-                            
-                            # Construct the OSRM API request URL
-                            request_url = f"{osrm_url}{start_lon_lat};{customer_lon_lat}?overview=false"
-                            
-                            response = requests.get(request_url)
-                            data = response.json()
-                            
-                            if response.status_code == 200 and data['code'] == 'Ok':
-                                # Distance is in meters, convert to kilometers
-                                distance_one_way = data['routes'][0]['distance'] / 1000
-                                total_distance = distance_one_way * 4
-                                
-                                # Calcular custo
-                                total_fuel = total_distance / user_settings["fuel_consumption"]
-                                freight_cost = total_fuel * user_settings["fuel_cost"]
-                                
-                                st.session_state.calculated_freight_cost = freight_cost
-
-                                st.success(f"Cálculo concluído com sucesso!")
-                                st.info(f"Distância de ida (OSRM): {distance_one_way:.2f} km")
-                                st.info(f"Percurso total (4x): {total_distance:.2f} km")
-                                st.metric("Custo do Frete", f"R$ {freight_cost:.2f}")
-
-                            else:
-                                st.error(f"Erro ao calcular rota com OSRM: {data.get('message', 'Erro desconhecido')}")
-                                st.info("Verifique se os endereços são válidos e tente novamente.")
-
-                        else:
-                            st.error("Não foi possível encontrar as coordenadas para o endereço do cliente. Verifique o endereço cadastrado no CRM.")
-                    except Exception as e:
-                        st.error(f"Ocorreu um erro ao calcular a distância: {e}")
+                if not selected_customer:
+                    st.warning("Busque e selecione um cliente.")
+                elif customer_address:
+                    start_address_row = user_addresses[user_addresses["address_name"] == start_address_name].iloc[0]
+                    start_coords = [float(start_address_row["latitude"]), float(start_address_row["longitude"])]
+                    # Geocodificação e rota (OSRM) em segundo plano (jobs.py).
+                    success, result = submit_job(user_id, "freight_route", {"start_coords": start_coords, "address": customer_address})
+                    if success:
+                        st.session_state.freight_job = result
+                    else:
+                        st.error(result)
                 else:
                     st.warning("O cliente selecionado não possui um endereço cadastrado no CRM.")
+
+        freight_job = tracked_job(user_id, "freight_job", "Calculando a rota...")
+        if freight_job and freight_job["status"] == DONE:
+            distance_one_way = freight_job["result"]["distance_km"]
+            total_distance = distance_one_way * 4
+
+            # Calcular custo
+            total_fuel = total_distance / user_settings["fuel_consumption"]
+            freight_cost = total_fuel * user_settings["fuel_cost"]
+
+            st.session_state.calculated_freight_cost = freight_cost
+
+            st.success(f"Cálculo concluído com sucesso!")
+            st.info(f"Distância de ida (OSRM): {distance_one_way:.2f} km")
+            st.info(f"Percurso total (4x): {total_distance:.2f} km")
+            st.metric("Custo do Frete", f"R$ {freight_cost:.2f}")
+        elif freight_job:
+            st.error(freight_job["error"])
+            st.info("Verifique se os endereços são válidos e tente novamente.")
+
+profiler.finish()
@@ -0,0 +1,121 @@
+import streamlit as st
+import pandas as pd
+from streamlit_cookies_manager import CookieManager
+from db_management import (
+    is_authenticated,
+    is_admin_user,
+    logout
+)
+from instrumentation import get_call_records, get_query_records, reset_metrics, SLOW_QUERY_MS
+from profiler import start_page_profile
+from schemas import get_memory_reports
+
+st.set_page_config(page_title="ConcRental - Diagnóstico", layout="wide")
+
+profiler = start_page_profile("7_Diagnostico")
+
+cookies = CookieManager()
+
+# --- Autenticação ---
+with profiler.phase("autenticacao"):
+    authenticated = is_authenticated(cookies)
+if not authenticated:
+    st.error("Por favor, faça o login para acessar esta página.")
+    st.stop()
+
+if not is_admin_user(st.session_state.user_id):
+    st.error("Acesso restrito a administradores.")
+    st.stop()
+
+# --- Sidebar ---
+st.sidebar.title(f"Bem-vindo, {st.session_state.get('username', 'Usuário')}!")
+if st.sidebar.button("Sair"):
+    logout(cookies)
+
+st.title("Diagnóstico do Banco de Dados")
+st.caption("Métricas em memória deste processo do servidor, desde o último reinício ou limpeza.")
+
+if st.button("Limpar Métricas"):
+    reset_metrics()
+    st.rerun()
+
+calls_df = pd.DataFrame(get_call_records())
+queries_df = pd.DataFrame(get_query_records())
+
+if calls_df.empty:
+    st.info("Nenhuma chamada ao banco registrada ainda.")
+    st.stop()
+
+# --- Resumo por Função ---
+st.header("Resumo por Função")
+summary_df = calls_df.groupby("function").agg(
+    chamadas=("duration_ms", "size"),
+    p50_ms=("duration_ms", "median"),
+    p95_ms=("duration_ms", lambda s: s.quantile(0.95)),
+    max_ms=("duration_ms", "max"),
+    linhas_media=("rows", "mean"),
+    bytes_media=("bytes", "mean"),
+    consultas=("queries", "sum"),
+    erros=("error", "count"),
+)
+cached_calls = calls_df[calls_df["cached"]]
+if not cached_calls.empty:
+    summary_df["taxa_acerto_cache"] = cached_calls.groupby("function")["cache_hit"].mean()
+st.dataframe(summary_df.sort_values("p95_ms", ascending=False), use_container_width=True)
+
+# --- Histograma de Latência ---
+st.header("Histograma de Latência")
+selected_function = st.selectbox("Função", options=sorted(calls_df["function"].unique()))
+durations = calls_df.loc[calls_df["function"] == selected_function, "duration_ms"]
+bins = [0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float("inf")]
+labels = ["<1", "1-5", "5-10", "10-25", "25-50", "50-100", "100-250", "250-500", "500-1000", "1000-2500", ">2500"]
+histogram = pd.cut(durations, bins=bins, labels=labels, right=False).value_counts().reindex(labels)
+st.bar_chart(histogram.rename("chamadas").rename_axis("latência (ms)"))
+
+# --- Consultas Mais Lentas ---
+st.header("Consultas Mais Lentas")
+if queries_df.empty:
+    st.info("Nenhuma consulta registrada.")
+else:
+    slowest_df = queries_df.sort_values("duration_ms", ascending=False).head(20)
+    st.dataframe(slowest_df[["function", "duration_ms", "rows", "query"]], use_container_width=True, hide_index=True)
+    sampled_plans = slowest_df.dropna(subset=["plan"])
+    if sampled_plans.empty:
+        st.caption(f"Nenhum plano amostrado. Defina CONCRENTAL_EXPLAIN_SAMPLE_RATE para amostrar EXPLAIN ANALYZE de consultas acima de {SLOW_QUERY_MS:.0f} ms.")
+    for _, row in sampled_plans.iterrows():
+        with st.expander(f"Plano: {row['function']} ({row['duration_ms']:.1f} ms)"):
+            st.code(row["plan"])
+
+# --- Memória dos Quadros em Cache ---
+st.header("Memória dos Quadros em Cache")
+memory_df = pd.DataFrame(get_memory_reports())
+if memory_df.empty:
+    st.info("Nenhum quadro carregado ainda.")
+else:
+    memory_df = memory_df.assign(
+        bruto_kb=memory_df["raw_bytes"] / 1024,
+        tipado_kb=memory_df["typed_bytes"] / 1024,
+        reducao=memory_df["raw_bytes"] / memory_df["typed_bytes"].clip(lower=1),
+    )
+    st.caption("Última carga de cada quadro (função, usuário, projeção): memória antes e depois da aplicação dos tipos de schemas.py.")
+    st.dataframe(memory_df[["function", "user_id", "projection", "rows", "bruto_kb", "tipado_kb", "reducao"]].sort_values("tipado_kb", ascending=False),
+                 use_container_width=True, hide_index=True)
+    per_user = memory_df.groupby("user_id")[["bruto_kb", "tipado_kb"]].sum()
+    col1, col2 = st.columns(2)
+    col1.metric("Memória média por usuário (KB)", f"{per_user['tipado_kb'].mean():.1f}")
+    col2.metric("Sem os tipos (KB)", f"{per_user['bruto_kb'].mean():.1f}")
+    selected_frame = st.selectbox("Colunas do quadro", options=list(memory_df.index),
+                                  format_func=lambda i: f"{memory_df.loc[i, 'function']} (usuário {memory_df.loc[i, 'user_id']}, {memory_df.loc[i, 'projection']})")
+    columns_kb = pd.Series(memory_df.loc[selected_frame, "columns"]) / 1024
+    st.bar_chart(columns_kb.rename("KB").rename_axis("coluna"))
+
+# --- Erros ---
+st.header("Erros Recentes")
+errors_df = calls_df.dropna(subset=["error"])
+if errors_df.empty:
+    st.success("Nenhum erro registrado.")
+else:
+    errors_df = errors_df.assign(horario=pd.to_datetime(errors_df["timestamp"], unit="s"))
+    st.dataframe(errors_df[["horario", "function", "error"]].sort_values("horario", ascending=False), use_container_width=True, hide_index=True)
+
+profiler.finish()
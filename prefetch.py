@@ -0,0 +1,127 @@
+"""
+Carregamento concorrente dos quadros das páginas.
+
+As páginas liam aluguéis, clientes e equipamentos um depois do outro, na única
+conexão compartilhada do app. load_page_data lê os quadros da página
+(reports.PAGE_COLUMNS) ao mesmo tempo em um pool de threads, cada uma com o seu
+repositório (conexão). As leituras passam pelos mesmos caches (table_cache.py):
+uma leitura já em andamento para a mesma projeção é aguardada, não repetida.
+
+Logo depois do login (Inicio.py), warm_user_caches agenda em segundo plano a
+leitura das projeções do Dashboard, a página de entrada, para ela já encontrar o
+cache pronto. As demais páginas carregam as suas projeções quando abertas: aquecer
+todas leria os aluguéis várias vezes no login e guardaria cópias que talvez nunca
+sejam usadas.
+
+O pool tem CONCRENTAL_PREFETCH_WORKERS threads (padrão 3, uma por tabela) e
+mantém uma conexão por thread; 0 desativa o pool, e as páginas voltam a ler os
+quadros em sequência.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import db_management
+from reports import PAGE_COLUMNS
+from repository import create_repository
+
+logger = logging.getLogger("concrental.prefetch")
+
+PREFETCH_WORKERS = int(os.environ.get("CONCRENTAL_PREFETCH_WORKERS", 3))
+
+LOADERS = {
+    "equipments": db_management.get_all_equipments,
+    "customers": db_management.get_all_customers,
+    "rentals": db_management.get_all_rentals,
+}
+
+# Quadros lidos ao abrir cada página: (tabela, colunas), com None para todas as
+# colunas. O editor do inventário e a lista do CRM leem o quadro completo.
+PAGE_DATASETS = {page: tuple(columns.items()) for page, columns in PAGE_COLUMNS.items()}
+PAGE_DATASETS["1_Inventario"] = (("equipments", None),)
+PAGE_DATASETS["2_CRM"] = (("customers", None),)
+
+# Aquecidos após o login: apenas a página de entrada.
+WARM_DATASETS = PAGE_DATASETS["Inicio"]
+
+_executor = None
+_warming = set()
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def _pool():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(PREFETCH_WORKERS, thread_name_prefix="concrental-prefetch")
+        return _executor
+
+
+def _load(table, user_id, columns):
+    """Executa o carregador em uma thread do pool, com o repositório da thread."""
+    repo = getattr(_local, "repo", None)
+    if repo is None:
+        repo = _local.repo = create_repository()
+        db_management.use_thread_repository(repo)
+    try:
+        return LOADERS[table](user_id, columns)
+    except Exception:
+        # A conexão pode ter caído ou ficado em uma transação abortada: a
+        # próxima tarefa desta thread abre outra.
+        _local.repo = None
+        db_management.use_thread_repository(None)
+        try:
+            repo.close()
+        except Exception:
+            pass
+        raise
+
+
+def load_page_data(user_id, page):
+    """
+    Quadros da página (PAGE_DATASETS[page]) lidos em paralelo, como dicionário
+    tabela -> quadro. Uma leitura que falha no pool é refeita na sessão, onde o
+    erro é exibido como antes.
+    """
+    datasets = PAGE_DATASETS[page]
+    if PREFETCH_WORKERS <= 0 or len(datasets) == 1:
+        return {table: LOADERS[table](user_id, columns) for table, columns in datasets}
+    pool = _pool()
+    futures = [(table, columns, pool.submit(_load, table, user_id, columns)) for table, columns in datasets]
+    data = {}
+    for table, columns, future in futures:
+        try:
+            data[table] = future.result()
+        except Exception:
+            logger.warning("Falha ao ler %s em paralelo; lendo na sessão", table, exc_info=True)
+            data[table] = LOADERS[table](user_id, columns)
+    return data
+
+
+def warm_user_caches(user_id):
+    """
+    Agenda a leitura de WARM_DATASETS do usuário em segundo plano e retorna sem
+    esperar. Ignorada se o aquecimento do usuário ainda está em andamento.
+    """
+    if PREFETCH_WORKERS <= 0:
+        return
+    key = str(user_id)
+    with _lock:
+        if key in _warming:
+            return
+        _warming.add(key)
+    pending = [len(WARM_DATASETS)]
+
+    def done(future):
+        if future.exception() is not None:
+            logger.warning("Falha ao aquecer o cache do usuário %s", key, exc_info=future.exception())
+        with _lock:
+            pending[0] -= 1
+            if not pending[0]:
+                _warming.discard(key)
+
+    pool = _pool()
+    for table, columns in WARM_DATASETS:
+        pool.submit(_load, table, user_id, columns).add_done_callback(done)
@@ -0,0 +1,118 @@
+"""
+Profiler dos reruns das páginas do Streamlit.
+
+Ativação:
+    CONCRENTAL_PROFILE=1                 perfila todas as páginas deste processo
+    ?profile=1 na URL                    perfila apenas a sessão atual
+    CONCRENTAL_PROFILE_CPROFILE=Inicio,3_Contratos  (ou ?profile=cprofile)
+                                         grava também a saída do cProfile em profiles/
+
+Cada rerun gera uma linha de log com o tempo de cada fase nomeada e a quantidade de
+widgets criados. Os arquivos .prof podem ser abertos com `snakeviz` ou convertidos em
+flamegraph com `flameprof arquivo.prof > arquivo.svg`.
+"""
+import cProfile
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+logger = logging.getLogger("concrental.profiler")
+
+PROFILES_DIR = "profiles"
+_SESSION_KEY = "_page_profiler"
+
+
+def _widget_count():
+    ctx = get_script_run_ctx()
+    widget_ids = getattr(ctx, "widget_ids_this_run", None) if ctx else None
+    return len(widget_ids) if widget_ids is not None else 0
+
+
+def _profiling_mode(page):
+    """Retorna (ativo, usar_cprofile) a partir da variável de ambiente e da URL."""
+    query_value = st.query_params.get("profile")
+    cprofile_pages = [p.strip() for p in os.environ.get("CONCRENTAL_PROFILE_CPROFILE", "").split(",") if p.strip()]
+    use_cprofile = query_value == "cprofile" or page in cprofile_pages
+    enabled = use_cprofile or query_value == "1" or os.environ.get("CONCRENTAL_PROFILE") == "1"
+    return enabled, use_cprofile
+
+
+class PageProfiler:
+    """Mede fases nomeadas de um rerun. Fases com o mesmo nome são somadas."""
+
+    def __init__(self, page, enabled=False, use_cprofile=False):
+        self.page = page
+        self.enabled = enabled
+        self.phases = {}
+        self.widgets = {}
+        self.finished = False
+        self._start = time.perf_counter()
+        self._last_mark = self._start
+        self._cprofile = None
+        if enabled and use_cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        widgets_before = _widget_count()
+        try:
+            yield
+        finally:
+            self._last_mark = time.perf_counter()
+            self.phases[name] = self.phases.get(name, 0.0) + (self._last_mark - start) * 1000
+            self.widgets[name] = self.widgets.get(name, 0) + _widget_count() - widgets_before
+
+    def finish(self, interrupted=False):
+        """Registra o resumo do rerun. Chamado no fim da página ou no rerun seguinte."""
+        if not self.enabled or self.finished:
+            return
+        self.finished = True
+        end = self._last_mark if interrupted else time.perf_counter()
+        total_ms = (end - self._start) * 1000
+        breakdown = " | ".join(
+            f"{name} {elapsed:.1f} ms ({self.widgets[name]} widgets)" for name, elapsed in self.phases.items()
+        )
+        other_ms = total_ms - sum(self.phases.values())
+        # Num rerun interrompido o contexto atual já é o do rerun seguinte.
+        total_widgets = sum(self.widgets.values()) if interrupted else _widget_count()
+        status = " (interrompido por st.stop/st.rerun)" if interrupted else ""
+        logger.info("Rerun %s%s: total %.1f ms | %s | outros %.1f ms | widgets %d",
+                    self.page, status, total_ms, breakdown, other_ms, total_widgets)
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._dump_cprofile()
+
+    def _dump_cprofile(self):
+        os.makedirs(PROFILES_DIR, exist_ok=True)
+        path = os.path.join(PROFILES_DIR, f"{self.page}_{datetime.now():%Y%m%d_%H%M%S_%f}.prof")
+        self._cprofile.dump_stats(path)
+        logger.info("cProfile de %s salvo em %s", self.page, path)
+
+
+def start_page_profile(page):
+    """
+    Inicia o profiler do rerun atual da página. Se o rerun anterior desta sessão foi
+    interrompido (st.stop/st.rerun) antes de chamar finish(), ele é encerrado aqui.
+    """
+    previous = st.session_state.get(_SESSION_KEY)
+    if previous is not None:
+        previous.finish(interrupted=True)
+    enabled, use_cprofile = _profiling_mode(page)
+    if enabled and not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    profiler = PageProfiler(page, enabled, use_cprofile)
+    st.session_state[_SESSION_KEY] = profiler
+    return profiler
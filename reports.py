@@ -0,0 +1,59 @@
+# Colunas lidas por cada página (ver os carregadores em db_management.py). Inclui
+# as chaves usadas em merge_rental_details e os campos do PDF do contrato.
+PAGE_COLUMNS = {
+    # Aba de utilização (o editor do inventário lê todas as colunas).
+    "1_Inventario": {
+        "equipments": ("equipment_id", "name", "category", "acquisition_date"),
+        "rentals": ("rental_id", "equipment_id", "start_date", "end_date", "valor"),
+    },
+    "Inicio": {
+        "equipments": ("equipment_id", "name", "serial_number", "status"),
+        "customers": ("customer_id", "full_name", "address"),
+        "rentals": ("rental_id", "customer_id", "equipment_id", "end_date", "status", "payment_status", "valor"),
+    },
+    "3_Contratos": {
+        "equipments": ("equipment_id", "name", "serial_number", "status"),
+        "customers": ("customer_id", "full_name", "phone_number", "address"),
+        "rentals": ("rental_id", "customer_id", "equipment_id", "start_date", "end_date", "status",
+                    "payment_status", "valor", "freight_cost", "signed_contract_path"),
+    },
+    "4_Financeiro": {
+        "equipments": ("equipment_id", "name"),
+        "customers": ("customer_id", "full_name"),
+        "rentals": ("rental_id", "customer_id", "equipment_id", "start_date", "end_date", "payment_status", "valor",
+                    "freight_cost"),
+    },
+    "5_Mapa": {
+        "customers": ("customer_id", "latitude", "longitude"),
+        "rentals": ("customer_id", "status"),
+    },
+}
+
+
+def merge_rental_details(rentals_df, customers_df, equipment_df, suffixes=('_x', '_y')):
+    """
+    Junta os aluguéis com os dados do cliente e do equipamento, como nas listas do
+    Dashboard, Contratos e Financeiro. `suffixes` se aplica às colunas repetidas
+    entre aluguel e equipamento (ex.: status).
+    """
+    return rentals_df.merge(customers_df, on="customer_id").merge(equipment_df, on="equipment_id", suffixes=suffixes)
+
+
+def financial_summary(daily_df, today):
+    """
+    Calcula os KPIs do Financeiro (caixa e a receber no mês, no ano e no total) a
+    partir da receita diária reconhecida (revenue.daily_revenue): cada aluguel entra
+    nos meses em que esteve ativo, na proporção dos dias.
+    """
+    in_year = daily_df.index.year == today.year
+    in_month = in_year & (daily_df.index.month == today.month)
+    paid = daily_df['rent_paid']
+    open_ = daily_df['rent_open']
+    return {
+        "caixa_mes": paid[in_month].sum(),
+        "caixa_ano": paid[in_year].sum(),
+        "caixa_total": paid.sum(),
+        "receber_mes": open_[in_month].sum(),
+        "receber_ano": open_[in_year].sum(),
+        "receber_total": open_.sum(),
+    }
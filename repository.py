@@ -0,0 +1,850 @@
+"""
+Camada de acesso a dados do ConcRental.
+
+`Repository` define as operações usadas pelo app e contém o SQL comum aos dois
+backends; `PostgresRepository` e `SqliteRepository` definem a conexão e as
+diferenças de dialeto. O backend é escolhido por configuração:
+
+    CONCRENTAL_DB_BACKEND=postgres|sqlite      (ou [database] backend no secrets.toml)
+    CONCRENTAL_SQLITE_PATH=concrental.db       (ou [sqlite] path no secrets.toml)
+
+O SQL é escrito com o marcador %s; o SQLite o converte para ?.
+Os métodos de escrita confirmam a transação e, em caso de erro, fazem rollback e
+propagam a exceção do driver (`repo.Error` / `repo.IntegrityError`).
+
+Leituras e escritas filtram sempre pelo usuário (user_id) além do ID: no Postgres a
+tabela de aluguéis é particionada por usuário (migração 0010) e o filtro permite
+ler apenas a partição dele; também impede alterar linhas de outro usuário.
+"""
+import io
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+
+import pandas as pd
+import psycopg2
+import streamlit as st
+
+from instrumentation import InstrumentedCursor, InstrumentedSqliteConnection
+
+# Adaptadores explícitos (os padrões do sqlite3 estão obsoletos desde o Python 3.12).
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(Decimal, float)
+
+# Erros de conexão de qualquer backend, para quem cria o repositório.
+CONNECTION_ERRORS = (psycopg2.Error, sqlite3.Error)
+
+# Colunas que podem ser pedidas nas listagens (projeção). Também servem de lista
+# branca, já que os nomes são interpolados no SQL.
+EQUIPMENT_COLUMNS = ("equipment_id", "user_id", "name", "category", "serial_number", "acquisition_date",
+                     "status", "purchase_status", "times_rented")
+CUSTOMER_COLUMNS = ("customer_id", "user_id", "full_name", "company_name", "phone_number", "email_address",
+                    "address", "document_type", "document_number", "document_path", "latitude", "longitude")
+RENTAL_COLUMNS = ("rental_id", "user_id", "customer_id", "equipment_id", "start_date", "end_date", "status",
+                  "payment_status", "valor", "freight_cost", "signed_contract_path")
+# Importação em lote: prefixo dos IDs, chave única e valores fixos de cada tabela.
+BULK_TABLES = {
+    "equipments": {"id_column": "equipment_id", "prefix": "EQ", "unique": "serial_number",
+                   "defaults": {"status": "Disponível", "times_rented": 0}},
+    "customers": {"id_column": "customer_id", "prefix": "CUST", "unique": "document_number", "defaults": {}},
+}
+# Colunas devolvidas pela busca de clientes (search_customers).
+CUSTOMER_SEARCH_COLUMNS = ("customer_id", "full_name", "company_name", "document_number", "phone_number", "address",
+                           "document_path")
+# Dados do cliente mantido que são completados com os do duplicado na mesclagem.
+MERGE_FILL_COLUMNS = ("company_name", "phone_number", "email_address", "address", "document_type", "document_number",
+                      "document_path", "latitude", "longitude")
+# Colunas da exportação dos lançamentos (nome no arquivo -> expressão).
+ENTRY_COLUMNS = {
+    "rental_id": "r.rental_id",
+    "customer": "c.full_name",
+    "document_number": "c.document_number",
+    "equipment": "e.name",
+    "serial_number": "e.serial_number",
+    "start_date": "r.start_date",
+    "end_date": "r.end_date",
+    "status": "r.status",
+    "payment_status": "r.payment_status",
+    "valor": "r.valor",
+    "freight_cost": "r.freight_cost",
+}
+
+
+def _search_term(term):
+    """
+    Termo da busca de clientes em minúsculas; sem letras (documento ou telefone),
+    apenas os dígitos, como na coluna search_text. Retorna (termo, padrão LIKE de
+    trecho, padrão LIKE de prefixo), com os curingas do termo escapados.
+    """
+    text = " ".join(str(term).lower().split())
+    if not re.search(r"[^\W\d_]", text):
+        text = re.sub(r"\D", "", text)
+    escaped = re.sub(r"([\\%_])", r"\\\1", text)
+    return text, f"%{escaped}%", f"{escaped}%"
+
+
+def _secret(section, key, default=None):
+    try:
+        return st.secrets[section][key]
+    except Exception:
+        return default
+
+
+def get_backend():
+    return (os.environ.get("CONCRENTAL_DB_BACKEND") or _secret("database", "backend", "postgres")).lower()
+
+
+def get_postgres_params():
+    """
+    Retorna os parâmetros de conexão do Postgres. A variável de ambiente DATABASE_URL
+    tem prioridade (útil para bancos locais, migrações e benchmarks); caso contrário
+    são usadas as credenciais do secrets.toml do Streamlit.
+    """
+    dsn = os.environ.get("DATABASE_URL")
+    if dsn:
+        return {"dsn": dsn}
+    return {
+        "host": st.secrets["postgres"]["host"],
+        "port": st.secrets["postgres"]["port"],
+        "dbname": st.secrets["postgres"]["dbname"],
+        "user": st.secrets["postgres"]["user"],
+        "password": st.secrets["postgres"]["password"],
+        "sslmode": 'require',
+    }
+
+
+def open_postgres_connection():
+    """Abre uma nova conexão Postgres (sem cache), com as consultas instrumentadas."""
+    return psycopg2.connect(cursor_factory=InstrumentedCursor, **get_postgres_params())
+
+
+def create_repository():
+    """Cria o repositório do backend configurado."""
+    backend = get_backend()
+    if backend == "sqlite":
+        return SqliteRepository(os.environ.get("CONCRENTAL_SQLITE_PATH") or _secret("sqlite", "path", "concrental.db"))
+    if backend == "postgres":
+        return PostgresRepository()
+    raise ValueError(f"Backend de banco de dados desconhecido: {backend}")
+
+
+class Repository:
+    dialect = None
+    Error = Exception
+    IntegrityError = Exception
+    # Sufixo numérico dos IDs (EQ001, CUST001, RENT001); deve casar com o índice de expressão.
+    id_number_sql = "CAST(SUBSTRING({column} FROM {start}) AS INTEGER)"
+    # Trava da linha reservada por claim_job; o SQLite já serializa as escritas.
+    skip_locked = ""
+
+    def __init__(self):
+        # Uma operação por vez na conexão: o repositório do app é compartilhado pelas
+        # sessões e threads (db_management), e os comandos e o rollback de uma não
+        # podem cair no meio da transação de outra.
+        self._lock = threading.RLock()
+        self.conn = self.connect()
+
+    def connect(self):
+        raise NotImplementedError
+
+    def sql(self, query):
+        return query
+
+    def close(self):
+        self.conn.close()
+
+    # --- Auxiliares ---
+    @contextmanager
+    def cursor(self):
+        with self._lock:
+            cursor = self.conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    def begin(self):
+        """Prepara a conexão para uma transação explícita (ver PostgresRepository)."""
+
+    def end(self):
+        """Volta a conexão ao modo das leituras depois de begin()."""
+
+    @contextmanager
+    def transaction(self):
+        """Cursor cujas operações são confirmadas juntas, ou desfeitas em caso de erro."""
+        with self._lock:
+            self.begin()
+            try:
+                with self.cursor() as cursor:
+                    yield cursor
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            finally:
+                self.end()
+
+    @contextmanager
+    def server_cursor(self):
+        """Cursor para leituras longas em blocos (ver stream_rows)."""
+        with self.cursor() as cursor:
+            yield cursor
+
+    def stream_rows(self, query, params=(), chunk_size=10_000):
+        """
+        Gera o resultado em listas de até `chunk_size` linhas, sem carregá-lo inteiro.
+        A leitura ocupa a conexão até o fim; use um repositório próprio para ela.
+        """
+        with self._lock:
+            try:
+                with self.server_cursor() as cursor:
+                    self.execute(cursor, query, params)
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        yield rows
+            finally:
+                # Encerra a transação de leitura (e o cursor nomeado do Postgres).
+                self.conn.rollback()
+
+    def execute(self, cursor, query, params=()):
+        cursor.execute(self.sql(query), params)
+
+    def execute_script(self, cursor, script):
+        """Executa um script SQL com vários comandos (migrações) na transação atual."""
+        cursor.execute(script)
+
+    def fetch_one(self, query, params=()):
+        with self._lock:
+            try:
+                with self.cursor() as cursor:
+                    self.execute(cursor, query, params)
+                    return cursor.fetchone()
+            except self.Error:
+                self.conn.rollback()
+                raise
+
+    def read_frame(self, query, params=()):
+        with self._lock:
+            try:
+                return pd.read_sql(self.sql(query), self.conn, params=params)
+            except self.Error:
+                self.conn.rollback()
+                raise
+
+    def select_list(self, columns, allowed, alias=None):
+        """Lista de colunas do SELECT; None seleciona todas as de `allowed`."""
+        prefix = f"{alias}." if alias else ""
+        if columns is None:
+            columns = allowed
+        unknown = [column for column in columns if column not in allowed]
+        if unknown:
+            raise ValueError(f"Colunas desconhecidas: {', '.join(unknown)}")
+        return ", ".join(prefix + column for column in dict.fromkeys(columns))
+
+    def changed_since(self, prefix, since, params):
+        """Filtro das linhas alteradas desde `since` e os parâmetros correspondentes."""
+        if since is None:
+            return "", params
+        return f" AND {prefix}updated_at >= %s", params + (since,)
+
+    def next_number(self, cursor, table, column, prefix):
+        """Próximo número sequencial dos IDs com prefixo (EQ001, EQ002, ..., EQ1000)."""
+        number_sql = self.id_number_sql.format(column=column, start=len(prefix) + 1)
+        self.execute(cursor, f"SELECT MAX({number_sql}) FROM {table}")
+        return (cursor.fetchone()[0] or 0) + 1
+
+    def copy_rows(self, cursor, table, frame):
+        """Insere as linhas de `frame` em `table` (tabela de carga)."""
+        columns = ", ".join(frame.columns)
+        placeholders = ", ".join(["%s"] * len(frame.columns))
+        cursor.executemany(self.sql(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"),
+                           frame.itertuples(index=False, name=None))
+
+    def next_id(self, cursor, table, column, prefix):
+        return f"{prefix}{self.next_number(cursor, table, column, prefix):03d}"
+
+    def current_timestamp(self):
+        """Horário atual do banco (fora do horário congelado da transação)."""
+        return self.fetch_one("SELECT clock_timestamp()")[0]
+
+    # --- Sincronização incremental ---
+    def sync_frame(self, table, user_id, columns=None, since=None):
+        """
+        Lê as linhas de `table` do usuário alteradas desde `since` (todas, se None) e
+        os IDs excluídos no mesmo período. Retorna (quadro, ids_excluidos, lido_em),
+        em que `lido_em` é o horário do banco antes da leitura, o `since` da próxima.
+        """
+        listers = {"equipments": self.list_equipments, "customers": self.list_customers, "rentals": self.list_rentals}
+        synced_at = self.current_timestamp()
+        frame = listers[table](user_id, columns, since)
+        deleted = self.list_deleted_ids(table, user_id, since) if since is not None else []
+        return frame, deleted, synced_at
+
+    def list_deleted_ids(self, table, user_id, since):
+        query = "SELECT row_id FROM deleted_rows WHERE table_name = %s AND user_id = %s AND deleted_at >= %s"
+        with self.cursor() as cursor:
+            self.execute(cursor, query, (table, user_id, since))
+            return [row[0] for row in cursor.fetchall()]
+
+    # --- Usuários ---
+    def get_user_credentials(self, username):
+        """Retorna (id, password_hash, username) ou None."""
+        return self.fetch_one("SELECT id, password_hash, username FROM users WHERE lower(username) = lower(%s)", (username,))
+
+    def list_user_ids(self):
+        with self.cursor() as cursor:
+            self.execute(cursor, "SELECT id FROM users ORDER BY id")
+            return [row[0] for row in cursor.fetchall()]
+
+    def get_user_id(self, username):
+        result = self.fetch_one("SELECT id FROM users WHERE username = %s", (username,))
+        return result[0] if result else None
+
+    def get_username(self, user_id):
+        result = self.fetch_one("SELECT username FROM users WHERE id = %s", (user_id,))
+        return result[0] if result else None
+
+    def is_admin(self, user_id):
+        result = self.fetch_one("SELECT is_admin FROM users WHERE id = %s", (user_id,))
+        return bool(result and result[0])
+
+    # --- Equipamentos ---
+    def list_equipments(self, user_id, columns=None, since=None):
+        select = self.select_list(columns, EQUIPMENT_COLUMNS)
+        changed, params = self.changed_since("", since, (user_id,))
+        return self.read_frame(f'SELECT {select} FROM equipments WHERE user_id = %s{changed} ORDER BY equipment_id ASC', params)
+
+    def add_equipment(self, user_id, name, category, serial, acq_date, purchase_status):
+        with self.transaction() as cursor:
+            new_id = self.next_id(cursor, "equipments", "equipment_id", "EQ")
+            self.execute(cursor, "INSERT INTO equipments (user_id, equipment_id, name, category, serial_number, acquisition_date, status, purchase_status, times_rented) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                         (user_id, new_id, name, category, serial, acq_date, "Disponível", purchase_status, 0))
+        return new_id
+
+    def update_equipment(self, user_id, equipment_id, updates):
+        set_clause = ", ".join([f'{key} = %s' for key in updates.keys()])
+        with self.transaction() as cursor:
+            self.execute(cursor, f'UPDATE equipments SET {set_clause} WHERE user_id = %s AND equipment_id = %s',
+                         list(updates.values()) + [user_id, equipment_id])
+
+    def delete_equipment(self, user_id, equipment_id):
+        with self.transaction() as cursor:
+            self.execute(cursor, 'DELETE FROM equipments WHERE user_id = %s AND equipment_id = %s', (user_id, equipment_id))
+
+    # --- Importação em Lote ---
+    def bulk_insert(self, table, user_id, frame):
+        """
+        Insere as linhas validadas de `frame` (ver bulk_import.py) em `table` em uma
+        transação: os IDs são atribuídos em bloco, as linhas são copiadas para uma
+        tabela temporária e movidas com um único INSERT ... SELECT. Linhas cuja chave
+        única já existe são ignoradas. Retorna (inseridas, chaves_ignoradas).
+        """
+        spec = BULK_TABLES[table]
+        id_column, unique = spec["id_column"], spec["unique"]
+        with self.transaction() as cursor:
+            first_num = self.next_number(cursor, table, id_column, spec["prefix"])
+            numbers = pd.Series(range(first_num, first_num + len(frame)), index=frame.index)
+            staged = frame.assign(user_id=user_id, **spec["defaults"],
+                                  **{id_column: spec["prefix"] + numbers.astype(str).str.zfill(3)})
+            columns = ", ".join(staged.columns)
+            self.execute(cursor, "DROP TABLE IF EXISTS bulk_staging")
+            self.execute(cursor, f"CREATE TEMP TABLE bulk_staging AS SELECT {columns} FROM {table} WHERE 1 = 0")
+            self.copy_rows(cursor, "bulk_staging", staged)
+            self.execute(cursor, f"SELECT s.{unique} FROM bulk_staging s JOIN {table} t ON t.{unique} = s.{unique}")
+            skipped = [row[0] for row in cursor.fetchall()]
+            self.execute(cursor, f"""
+                INSERT INTO {table} ({columns})
+                SELECT {columns} FROM bulk_staging s
+                WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.{unique} = s.{unique})
+            """)
+            inserted = cursor.rowcount
+            self.execute(cursor, "DROP TABLE bulk_staging")
+        return inserted, skipped
+
+    # --- Clientes ---
+    def list_customers(self, user_id, columns=None, since=None):
+        select = self.select_list(columns, CUSTOMER_COLUMNS)
+        changed, params = self.changed_since("", since, (user_id,))
+        return self.read_frame(f'SELECT {select} FROM customers WHERE user_id = %s{changed} ORDER BY customer_id ASC', params)
+
+    def add_customer(self, user_id, full_name, company_name, phone, email, address, doc_type, doc_number):
+        with self.transaction() as cursor:
+            new_id = self.next_id(cursor, "customers", "customer_id", "CUST")
+            self.execute(cursor, "INSERT INTO customers (user_id, customer_id, full_name, company_name, phone_number, email_address, address, document_type, document_number) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                         (user_id, new_id, full_name, company_name, phone, email, address, doc_type, doc_number))
+        return new_id
+
+    def search_customers(self, user_id, term, limit=20):
+        """
+        Clientes do usuário cujo nome, empresa, documento ou telefone contém `term`,
+        até `limit`, com os nomes que começam pelo termo primeiro (migração 0008).
+        """
+        text, contains, prefix = _search_term(term)
+        query = f"""
+            SELECT {", ".join(CUSTOMER_SEARCH_COLUMNS)} FROM customers
+            WHERE user_id = %s AND search_text LIKE %s ESCAPE '\\'
+            ORDER BY lower(full_name) LIKE %s ESCAPE '\\' DESC, full_name
+            LIMIT %s
+        """
+        return self.read_frame(query, (user_id, contains, prefix, limit))
+
+    def update_customer(self, user_id, customer_id, updates):
+        set_clause = ", ".join([f'{key} = %s' for key in updates.keys()])
+        with self.transaction() as cursor:
+            self.execute(cursor, f'UPDATE customers SET {set_clause} WHERE user_id = %s AND customer_id = %s',
+                         list(updates.values()) + [user_id, customer_id])
+
+    def delete_customer(self, user_id, customer_id):
+        with self.transaction() as cursor:
+            self.execute(cursor, 'DELETE FROM customers WHERE user_id = %s AND customer_id = %s', (user_id, customer_id))
+
+    # --- Clientes Duplicados ---
+    def replace_customer_duplicates(self, user_id, candidates):
+        """Substitui os pares de possíveis duplicados do usuário (ver duplicates.py)."""
+        rows = [(user_id, row.customer_id, row.duplicate_id, float(row.score), row.reasons)
+                for row in candidates.itertuples(index=False)]
+        with self.transaction() as cursor:
+            self.execute(cursor, "DELETE FROM customer_duplicates WHERE user_id = %s", (user_id,))
+            if rows:
+                cursor.executemany(self.sql("""
+                    INSERT INTO customer_duplicates (user_id, customer_id, duplicate_id, score, reasons)
+                    VALUES (%s, %s, %s, %s, %s)
+                """), rows)
+
+    def list_customer_duplicates(self, user_id):
+        return self.read_frame("""
+            SELECT d.customer_id, c.full_name, c.phone_number, c.email_address,
+                   d.duplicate_id, dc.full_name AS duplicate_name, dc.phone_number AS duplicate_phone,
+                   dc.email_address AS duplicate_email, d.score, d.reasons, d.computed_at
+            FROM customer_duplicates d
+            JOIN customers c ON c.customer_id = d.customer_id
+            JOIN customers dc ON dc.customer_id = d.duplicate_id
+            WHERE d.user_id = %s
+            ORDER BY d.score DESC, d.customer_id
+        """, (user_id,))
+
+    def merge_customers(self, user_id, keep_id, duplicate_id):
+        """
+        Mescla `duplicate_id` em `keep_id` em uma transação: os aluguéis passam para o
+        cliente mantido, os dados que faltam nele são copiados do duplicado e o
+        duplicado é excluído (com os seus pares em customer_duplicates). Retorna o
+        número de aluguéis transferidos; ValueError se algum cliente não for do usuário.
+        """
+        columns = ", ".join(MERGE_FILL_COLUMNS)
+        with self.transaction() as cursor:
+            self.execute(cursor, f"SELECT {columns} FROM customers WHERE customer_id = %s AND user_id = %s",
+                         (duplicate_id, user_id))
+            duplicate = cursor.fetchone()
+            self.execute(cursor, "SELECT 1 FROM customers WHERE customer_id = %s AND user_id = %s", (keep_id, user_id))
+            if duplicate is None or cursor.fetchone() is None or keep_id == duplicate_id:
+                raise ValueError("Clientes inválidos para mesclagem.")
+            moved = 0
+            for table in ("rentals", "rentals_archive"):
+                self.execute(cursor, f"UPDATE {table} SET customer_id = %s WHERE user_id = %s AND customer_id = %s",
+                             (keep_id, user_id, duplicate_id))
+                moved += cursor.rowcount
+            # Exclui antes de copiar os dados: o documento do duplicado é único.
+            self.execute(cursor, "DELETE FROM customers WHERE user_id = %s AND customer_id = %s", (user_id, duplicate_id))
+            fill = ", ".join(f"{column} = COALESCE({column}, %s)" for column in MERGE_FILL_COLUMNS)
+            self.execute(cursor, f"UPDATE customers SET {fill} WHERE user_id = %s AND customer_id = %s",
+                         tuple(duplicate) + (user_id, keep_id))
+        return moved
+
+    # --- Aluguéis ---
+    def list_rentals(self, user_id, columns=None, since=None):
+        # O filtro por r.user_id seleciona a partição do usuário e, no delta, o índice (user_id, updated_at).
+        changed, params = self.changed_since("r.", since, (user_id, user_id))
+        query = f"""
+            SELECT {self.select_list(columns, RENTAL_COLUMNS, alias="r")} FROM rentals r
+            JOIN customers c ON r.customer_id = c.customer_id
+            WHERE c.user_id = %s AND r.user_id = %s{changed}
+            ORDER BY r.start_date DESC
+        """
+        return self.read_frame(query, params)
+
+    def add_rentals(self, user_id, customer_id, equipment_ids, start_date, end_date, valor, freight_cost=0):
+        """
+        Cria um aluguel por equipamento, todos ou nenhum: um período sobreposto a outro
+        aluguel em aberto do mesmo equipamento gera IntegrityError (migração 0006).
+        O status dos equipamentos segue os períodos (ver sync_equipment_status):
+        reservas futuras não o alteram agora. Retorna os IDs criados.
+        """
+        sql = "INSERT INTO rentals (user_id, rental_id, customer_id, equipment_id, start_date, end_date, status, payment_status, valor, freight_cost) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+        rental_ids = []
+        with self.transaction() as cursor:
+            numbers = self.next_rental_numbers(cursor, len(equipment_ids))
+            for number, equipment_id in zip(numbers, equipment_ids):
+                new_rental_id = f"RENT{number:03d}"
+                rental_ids.append(new_rental_id)
+                self.execute(cursor, sql, (user_id, new_rental_id, customer_id, equipment_id, start_date, end_date, "Ativo", "Em Aberto", valor, freight_cost))
+                self.execute(cursor, 'UPDATE equipments SET times_rented = times_rented + 1 WHERE user_id = %s AND equipment_id = %s', (user_id, equipment_id))
+            self._sync_equipment_status(cursor, date.today(), user_id, equipment_ids)
+        return rental_ids
+
+    def next_rental_numbers(self, cursor, count):
+        """
+        Reserva `count` números de aluguel no contador global (migração 0013): a chave
+        de rentals inclui o user_id, e o RENTnnn não pode se repetir entre usuários.
+        """
+        self.execute(cursor, "UPDATE rental_numbers SET last_number = last_number + %s RETURNING last_number", (count,))
+        last = cursor.fetchone()[0]
+        return list(range(last - count + 1, last + 1))
+
+    def complete_rental(self, user_id, rental_id, equipment_id):
+        """Conclui o aluguel; o equipamento continua 'Alugado' se outra reserva em aberto já começou."""
+        with self.transaction() as cursor:
+            self.execute(cursor, 'UPDATE rentals SET status = %s WHERE user_id = %s AND rental_id = %s', ("Concluído", user_id, rental_id))
+            self._sync_equipment_status(cursor, date.today(), user_id, [equipment_id])
+
+    def _sync_equipment_status(self, cursor, reference_date, user_id=None, equipment_ids=None):
+        scope, params = "", ()
+        if user_id is not None:
+            scope, params = " AND user_id = %s", (user_id,)
+        if equipment_ids is not None:
+            if not equipment_ids:
+                return 0
+            scope += f" AND equipment_id IN ({', '.join(['%s'] * len(equipment_ids))})"
+            params += tuple(equipment_ids)
+        # Alugado: há um aluguel em aberto já iniciado (inclusive os atrasados).
+        started = """EXISTS (
+            SELECT 1 FROM rentals r
+            WHERE r.user_id = equipments.user_id AND r.equipment_id = equipments.equipment_id
+              AND r.status <> 'Concluído' AND r.start_date <= %s
+        )"""
+        self.execute(cursor, f"UPDATE equipments SET status = 'Alugado' WHERE status = 'Disponível' AND {started}{scope}",
+                     (reference_date,) + params)
+        changed = cursor.rowcount
+        self.execute(cursor, f"UPDATE equipments SET status = 'Disponível' WHERE status = 'Alugado' AND NOT {started}{scope}",
+                     (reference_date,) + params)
+        return changed + cursor.rowcount
+
+    def sync_equipment_status(self, reference_date, user_id=None):
+        """
+        Deriva o status dos equipamentos dos períodos dos aluguéis em `reference_date`
+        (de todos os usuários, ou só de `user_id`): 'Alugado' com um aluguel em aberto
+        já iniciado, 'Disponível' sem nenhum. 'Em Manutenção' não é alterado, e só as
+        linhas que mudam são gravadas. Retorna o número de equipamentos alterados.
+        """
+        with self.transaction() as cursor:
+            return self._sync_equipment_status(cursor, reference_date, user_id)
+
+    def update_rental(self, user_id, rental_id, column, value):
+        with self.transaction() as cursor:
+            self.execute(cursor, f'UPDATE rentals SET {column} = %s WHERE user_id = %s AND rental_id = %s', (value, user_id, rental_id))
+
+    def iter_rental_entries(self, user_id, chunk_size=10_000):
+        """Lançamentos do usuário (colunas ENTRY_COLUMNS), incluindo os arquivados, em blocos, para exportação."""
+        query = f"""
+            SELECT {", ".join(ENTRY_COLUMNS.values())}
+            FROM (
+                SELECT {", ".join(RENTAL_COLUMNS)} FROM rentals WHERE user_id = %s
+                UNION ALL
+                SELECT {", ".join(RENTAL_COLUMNS)} FROM rentals_archive WHERE user_id = %s
+            ) r
+            JOIN customers c ON c.customer_id = r.customer_id
+            JOIN equipments e ON e.equipment_id = r.equipment_id
+            ORDER BY r.start_date DESC, r.rental_id
+        """
+        return self.stream_rows(query, (user_id, user_id), chunk_size)
+
+    # --- Arquivo de Aluguéis ---
+    def archive_condition(self, completed_before, user_id=None):
+        """Filtro (e parâmetros) dos aluguéis a arquivar; os em aberto ficam no A Receber."""
+        condition = "status = 'Concluído' AND payment_status <> 'Em Aberto' AND end_date < %s"
+        if user_id is None:
+            return condition, (completed_before,)
+        return condition + " AND user_id = %s", (completed_before, user_id)
+
+    def archive_rentals(self, completed_before, user_id=None):
+        """
+        Move para rentals_archive, em uma transação, os aluguéis concluídos e pagos com
+        devolução anterior a `completed_before` (de todos os usuários, ou só de
+        `user_id`). A exclusão em rentals é registrada em deleted_rows e notificada
+        como qualquer outra, então os caches do app descartam as linhas movidas.
+        Retorna o número de aluguéis arquivados.
+        """
+        columns = ", ".join(RENTAL_COLUMNS)
+        condition, params = self.archive_condition(completed_before, user_id)
+        with self.transaction() as cursor:
+            self.execute(cursor, f"INSERT INTO rentals_archive ({columns}) SELECT {columns} FROM rentals WHERE {condition}",
+                         params)
+            self.execute(cursor, f"DELETE FROM rentals WHERE {condition}", params)
+            return cursor.rowcount
+
+    def list_archived_rentals(self, user_id, columns=None):
+        return self.read_frame(f"""
+            SELECT {self.select_list(columns, RENTAL_COLUMNS)} FROM rentals_archive
+            WHERE user_id = %s
+            ORDER BY start_date DESC
+        """, (user_id,))
+
+    # --- Alertas de Devolução ---
+    def refresh_rental_alerts(self, reference_date, due_before, rental_ids=None, user_id=None):
+        """
+        Recalcula em uma única consulta os alertas dos aluguéis ativos de todos os
+        usuários (ou apenas de `user_id` e/ou de `rental_ids`): 'Atrasado' se a devolução
+        é anterior a `reference_date`, 'A Vencer' se é anterior a `due_before`. As
+        comparações com datas sem horário valem também para o texto do SQLite. Só o
+        cálculo completo é registrado em alert_runs. Retorna o número de alertas.
+        """
+        scope, params = "", ()
+        if user_id is not None:
+            # Também seleciona a partição do usuário em rentals.
+            scope, params = " AND user_id = %s", (user_id,)
+        if rental_ids is not None:
+            if not rental_ids:
+                return 0
+            scope += f" AND rental_id IN ({', '.join(['%s'] * len(rental_ids))})"
+            params += tuple(rental_ids)
+        with self.transaction() as cursor:
+            self.execute(cursor, "DELETE FROM rental_alerts WHERE 1 = 1" + scope, params)
+            self.execute(cursor, f"""
+                INSERT INTO rental_alerts (rental_id, user_id, kind, end_date)
+                SELECT rental_id, user_id, CASE WHEN end_date < %s THEN 'Atrasado' ELSE 'A Vencer' END, end_date
+                FROM rentals
+                WHERE status = 'Ativo' AND end_date < %s{scope}
+            """, (reference_date, due_before) + params)
+            count = cursor.rowcount
+            if rental_ids is None and user_id is None:
+                self.execute(cursor, "INSERT INTO alert_runs (reference_date, alert_count) VALUES (%s, %s)", (reference_date, count))
+        return count
+
+    def last_alert_run_date(self):
+        row = self.fetch_one("SELECT reference_date FROM alert_runs ORDER BY id DESC LIMIT 1")
+        return pd.Timestamp(row[0]).date() if row else None
+
+    def list_rental_alerts(self, user_id):
+        return self.read_frame("""
+            SELECT rental_id, kind, end_date FROM rental_alerts
+            WHERE user_id = %s ORDER BY kind, end_date
+        """, (user_id,))
+
+    def list_alert_digest(self):
+        """Alertas de todos os usuários com cliente e equipamento, para o resumo diário."""
+        return self.read_frame("""
+            SELECT u.username, a.kind, a.end_date, a.rental_id, c.full_name, c.phone_number, e.name
+            FROM rental_alerts a
+            JOIN users u ON u.id = a.user_id
+            JOIN rentals r ON r.user_id = a.user_id AND r.rental_id = a.rental_id
+            JOIN customers c ON c.customer_id = r.customer_id
+            JOIN equipments e ON e.equipment_id = r.equipment_id
+            ORDER BY u.username, a.kind, a.end_date
+        """)
+
+    # --- Configurações do Usuário ---
+    def get_user_settings(self, user_id):
+        """Retorna (fuel_consumption, fuel_cost) ou None."""
+        return self.fetch_one("SELECT fuel_consumption, fuel_cost FROM user_settings WHERE user_id = %s", (user_id,))
+
+    def save_user_settings(self, user_id, fuel_consumption, fuel_cost):
+        with self.transaction() as cursor:
+            # Upsert (Insert or Update)
+            self.execute(cursor, """
+                INSERT INTO user_settings (user_id, fuel_consumption, fuel_cost)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (user_id) DO UPDATE
+                SET fuel_consumption = EXCLUDED.fuel_consumption,
+                    fuel_cost = EXCLUDED.fuel_cost;
+            """, (user_id, fuel_consumption, fuel_cost))
+
+    # --- Endereços do Usuário ---
+    def list_user_addresses(self, user_id):
+        return self.read_frame("SELECT * FROM user_addresses WHERE user_id = %s ORDER BY address_name", (user_id,))
+
+    def add_user_address(self, user_id, address_name, address, latitude, longitude):
+        with self.transaction() as cursor:
+            self.execute(cursor, """
+                INSERT INTO user_addresses (user_id, address_name, address, latitude, longitude)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (user_id, address_name, address, latitude, longitude))
+
+    def delete_user_address(self, user_id, address_id):
+        with self.transaction() as cursor:
+            self.execute(cursor, "DELETE FROM user_addresses WHERE user_id = %s AND id = %s", (user_id, address_id))
+
+    # --- Fila de Jobs ---
+    def enqueue_job(self, user_id, kind, payload, max_attempts, now):
+        """Grava um job pendente (payload em JSON) e retorna o seu ID."""
+        with self.transaction() as cursor:
+            self.execute(cursor, """
+                INSERT INTO jobs (user_id, kind, payload, status, max_attempts, run_after, created_at)
+                VALUES (%s, %s, %s, 'Pendente', %s, %s, %s)
+                RETURNING id
+            """, (user_id, kind, payload, max_attempts, now, now))
+            return cursor.fetchone()[0]
+
+    def claim_job(self, now):
+        """
+        Reserva o próximo job pendente e retorna (id, user_id, kind, payload, attempts,
+        max_attempts), ou None se a fila está vazia. Dois workers nunca recebem o mesmo job.
+        """
+        with self.transaction() as cursor:
+            self.execute(cursor, f"""
+                UPDATE jobs SET status = 'Executando', attempts = attempts + 1, started_at = %s
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE status = 'Pendente' AND run_after <= %s
+                    ORDER BY run_after, id
+                    LIMIT 1{self.skip_locked}
+                )
+                RETURNING id, user_id, kind, payload, attempts, max_attempts
+            """, (now, now))
+            return cursor.fetchone()
+
+    def finish_job(self, job_id, result, now):
+        with self.transaction() as cursor:
+            self.execute(cursor, """
+                UPDATE jobs SET status = 'Concluído', result = %s, error = NULL, finished_at = %s
+                WHERE id = %s
+            """, (result, now, job_id))
+
+    def fail_job(self, job_id, error, now, retry_at=None):
+        """Devolve o job para a fila até `retry_at` ou, sem `retry_at`, o encerra como falho."""
+        with self.transaction() as cursor:
+            if retry_at is None:
+                self.execute(cursor, "UPDATE jobs SET status = 'Falhou', error = %s, finished_at = %s WHERE id = %s",
+                             (error, now, job_id))
+            else:
+                self.execute(cursor, "UPDATE jobs SET status = 'Pendente', error = %s, run_after = %s WHERE id = %s",
+                             (error, retry_at, job_id))
+
+    def requeue_stale_jobs(self, started_before, now):
+        """
+        Jobs em execução desde antes de `started_before` (worker encerrado no meio):
+        voltam para a fila ou, sem tentativas restantes, falham. Retorna a quantidade.
+        """
+        with self.transaction() as cursor:
+            self.execute(cursor, """
+                UPDATE jobs SET
+                    status = CASE WHEN attempts < max_attempts THEN 'Pendente' ELSE 'Falhou' END,
+                    error = 'Execução interrompida.',
+                    run_after = %s,
+                    finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE %s END
+                WHERE status = 'Executando' AND started_at < %s
+            """, (now, now, started_before))
+            return cursor.rowcount
+
+    def get_job(self, user_id, job_id):
+        """(id, kind, status, attempts, max_attempts, result, error) do job do usuário, ou None."""
+        return self.fetch_one("""
+            SELECT id, kind, status, attempts, max_attempts, result, error
+            FROM jobs WHERE id = %s AND user_id = %s
+        """, (job_id, user_id))
+
+    def count_jobs(self):
+        return self.read_frame("SELECT kind, status, COUNT(*) AS jobs FROM jobs GROUP BY kind, status ORDER BY kind, status")
+
+    def delete_finished_jobs(self, finished_before):
+        with self.transaction() as cursor:
+            self.execute(cursor, "DELETE FROM jobs WHERE finished_at < %s", (finished_before,))
+            return cursor.rowcount
+
+
+class PostgresRepository(Repository):
+    dialect = "postgres"
+    Error = psycopg2.Error
+    IntegrityError = psycopg2.IntegrityError
+    skip_locked = " FOR UPDATE SKIP LOCKED"
+
+    def connect(self):
+        conn = open_postgres_connection()
+        # As leituras rodam em autocommit e não deixam transação aberta na conexão: o
+        # now() dos gatilhos de updated_at numa escrita seguinte seria o início dela,
+        # anterior ao último sync_frame, e a escrita ficaria fora do delta.
+        conn.autocommit = True
+        return conn
+
+    def begin(self):
+        self.conn.autocommit = False
+
+    def end(self):
+        self.conn.autocommit = True
+
+    def next_rental_numbers(self, cursor, count):
+        # Os números de outra sessão podem se intercalar: não são necessariamente consecutivos.
+        self.execute(cursor, "SELECT nextval('rental_number_seq') FROM generate_series(1, %s)", (count,))
+        return [row[0] for row in cursor.fetchall()]
+
+    def copy_rows(self, cursor, table, frame):
+        # COPY em CSV: campos vazios sem aspas viram NULL.
+        buffer = io.StringIO(frame.to_csv(index=False, header=False))
+        cursor.copy_expert(f"COPY {table} ({', '.join(frame.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    def search_customers(self, user_id, term, limit=20):
+        # Índice de trigramas: trecho exato ou palavra parecida (erros de digitação),
+        # ordenados por prefixo do nome, trecho exato e semelhança.
+        text, contains, prefix = _search_term(term)
+        query = f"""
+            SELECT {", ".join(CUSTOMER_SEARCH_COLUMNS)} FROM customers
+            WHERE user_id = %s AND (search_text LIKE %s OR %s <%% search_text)
+            ORDER BY lower(full_name) LIKE %s DESC, search_text LIKE %s DESC,
+                     word_similarity(%s, search_text) DESC, full_name
+            LIMIT %s
+        """
+        return self.read_frame(query, (user_id, contains, text, prefix, contains, text, limit))
+
+    def archive_rentals(self, completed_before, user_id=None):
+        # Move as linhas em um único comando: um aluguel alterado por outra sessão
+        # entre um INSERT e um DELETE separados ficaria nas duas tabelas.
+        columns = ", ".join(RENTAL_COLUMNS)
+        condition, params = self.archive_condition(completed_before, user_id)
+        with self.transaction() as cursor:
+            self.execute(cursor, f"""
+                WITH moved AS (DELETE FROM rentals WHERE {condition} RETURNING {columns})
+                INSERT INTO rentals_archive ({columns}) SELECT {columns} FROM moved
+            """, params)
+            return cursor.rowcount
+
+    @contextmanager
+    def server_cursor(self):
+        # Cursor nomeado: o servidor guarda o resultado e envia cada bloco sob demanda.
+        # Ele só existe dentro de uma transação, encerrada por stream_rows.
+        with self._lock:
+            self.begin()
+            cursor = self.conn.cursor(name=f"concrental_stream_{uuid.uuid4().hex[:12]}")
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+                self.conn.rollback()
+                self.end()
+
+
+class SqliteRepository(Repository):
+    """Backend embarcado para instalações de um só local, em modo WAL."""
+    dialect = "sqlite"
+    Error = sqlite3.Error
+    IntegrityError = sqlite3.IntegrityError
+    id_number_sql = "CAST(SUBSTR({column}, {start}) AS INTEGER)"
+
+    def __init__(self, path):
+        self.path = path
+        super().__init__()
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, factory=InstrumentedSqliteConnection)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def sql(self, query):
+        return query.replace("%s", "?")
+
+    def current_timestamp(self):
+        # Mesmo formato dos gatilhos de updated_at (UTC, em milissegundos).
+        value = self.fetch_one("SELECT strftime('%Y-%m-%d %H:%M:%f', 'now')")[0]
+        return datetime.fromisoformat(value)
+
+    def execute_script(self, cursor, script):
+        # executescript() confirma a transação pendente e roda em autocommit; o BEGIN
+        # explícito mantém o script e o restante da transação atômicos.
+        cursor.executescript("BEGIN;\n" + script)
@@ -0,0 +1,59 @@
+"""
+Reconhecimento de receita pró-rata por dia.
+
+O valor e o frete de cada aluguel são distribuídos igualmente pelos dias do
+período, com o início e a devolução inclusive: um aluguel de 20/01 a 10/03 entra
+em janeiro, fevereiro e março na proporção dos dias. O cálculo usa um vetor de
+diferenças: cada aluguel soma sua diária no dia de início e a subtrai no dia
+seguinte à devolução (np.bincount), e a soma acumulada dá a receita de cada dia.
+O custo é proporcional ao número de aluguéis mais o número de dias do histórico.
+
+As colunas separam aluguel e frete, pagos ou em aberto (payment_status).
+"""
+import numpy as np
+import pandas as pd
+
+REVENUE_COLUMNS = ["rent_paid", "rent_open", "freight_paid", "freight_open"]
+# Semanas começando na segunda-feira, rotuladas pelo primeiro dia.
+FREQUENCIES = {"M": {"rule": "MS"}, "W": {"rule": "W-MON", "closed": "left", "label": "left"}}
+
+
+def daily_revenue(rentals_df):
+    """Receita reconhecida por dia (índice diário contínuo, colunas REVENUE_COLUMNS)."""
+    if rentals_df.empty:
+        return pd.DataFrame(columns=REVENUE_COLUMNS, index=pd.DatetimeIndex([], name="date"), dtype="float64")
+    starts = pd.to_datetime(rentals_df["start_date"]).to_numpy("datetime64[D]")
+    ends = pd.to_datetime(rentals_df["end_date"]).to_numpy("datetime64[D]")
+    # Devolução anterior ao início (dado inválido) conta como um único dia.
+    ends = np.maximum(ends, starts)
+    first_day = starts.min()
+    start_index = (starts - first_day).astype(np.int64)
+    end_index = (ends - first_day).astype(np.int64)
+    days = int(end_index.max()) + 1
+    duration = (end_index - start_index + 1).astype("float64")
+
+    paid = (rentals_df["payment_status"] != "Em Aberto").to_numpy()
+    rent = rentals_df["valor"].to_numpy(dtype="float64") / duration
+    freight_values = rentals_df["freight_cost"] if "freight_cost" in rentals_df else pd.Series(0.0, index=rentals_df.index)
+    freight = freight_values.fillna(0).to_numpy(dtype="float64") / duration
+    daily_amounts = {
+        "rent_paid": np.where(paid, rent, 0.0),
+        "rent_open": np.where(paid, 0.0, rent),
+        "freight_paid": np.where(paid, freight, 0.0),
+        "freight_open": np.where(paid, 0.0, freight),
+    }
+    series = {}
+    for column, amount in daily_amounts.items():
+        diff = np.bincount(start_index, weights=amount, minlength=days + 1)
+        diff -= np.bincount(end_index + 1, weights=amount, minlength=days + 1)
+        series[column] = np.cumsum(diff[:days])
+    index = pd.date_range(pd.Timestamp(first_day), periods=days, freq="D", name="date")
+    return pd.DataFrame(series, index=index, columns=REVENUE_COLUMNS)
+
+
+def revenue_series(daily_df, freq="M"):
+    """Soma a receita diária por mês ("M") ou semana ("W"); a coluna total inclui o frete."""
+    options = FREQUENCIES[freq]
+    series = daily_df.resample(options["rule"], closed=options.get("closed"), label=options.get("label")).sum()
+    series["total"] = series[REVENUE_COLUMNS].sum(axis=1)
+    return series
@@ -0,0 +1,101 @@
+"""
+Tipos das colunas dos quadros por usuário (equipamentos, clientes e aluguéis).
+
+O `pd.read_sql` devolve strings como object, datas como object (ou texto, no
+SQLite) e NUMERIC como Decimal. Os esquemas abaixo são aplicados na carga, antes
+do cache do Streamlit:
+
+    category        colunas de baixa cardinalidade (status, categoria, tipo de documento)
+    datetime64[ns]  datas e timestamps
+    int32           contadores e IDs de usuário
+    float64         valores monetários (somados no Financeiro) e coordenadas
+
+IDs e textos livres continuam como object. Cada carga registra o uso de memória do
+quadro antes e depois da conversão (ver `get_memory_reports`).
+"""
+import threading
+import time
+
+import pandas as pd
+
+EQUIPMENT_SCHEMA = {
+    "user_id": "int32",
+    "category": "category",
+    "acquisition_date": "datetime64[ns]",
+    "status": "category",
+    "purchase_status": "category",
+    "times_rented": "int32",
+}
+
+CUSTOMER_SCHEMA = {
+    "user_id": "int32",
+    "document_type": "category",
+    "latitude": "float64",
+    "longitude": "float64",
+}
+
+RENTAL_SCHEMA = {
+    "user_id": "int32",
+    "start_date": "datetime64[ns]",
+    "end_date": "datetime64[ns]",
+    "status": "category",
+    "payment_status": "category",
+    "valor": "float64",
+    "freight_cost": "float64",
+}
+
+# Colunas numéricas em que NULL significa zero.
+_ZERO_DEFAULTS = {"freight_cost"}
+
+_memory_reports = {}
+_lock = threading.Lock()
+
+
+def _convert(series, dtype):
+    if dtype == "datetime64[ns]":
+        return pd.to_datetime(series)
+    if dtype == "category":
+        return series.astype("category")
+    numeric = pd.to_numeric(series)
+    if series.name in _ZERO_DEFAULTS:
+        numeric = numeric.fillna(0)
+    return numeric.astype(dtype)
+
+
+def apply_schema(df, schema):
+    """Converte as colunas presentes em `df` para os tipos de `schema`."""
+    conversions = {column: _convert(df[column], dtype) for column, dtype in schema.items() if column in df.columns}
+    return df.assign(**conversions)
+
+
+def typed_frame(name, user_id, df, schema, columns=None):
+    """Aplica o esquema e registra o uso de memória do quadro que vai para o cache."""
+    raw_bytes = int(df.memory_usage(deep=True).sum())
+    typed = apply_schema(df, schema)
+    with _lock:
+        _memory_reports[(name, user_id, tuple(columns) if columns is not None else None)] = {
+            "function": name,
+            "user_id": user_id,
+            "projection": ", ".join(columns) if columns is not None else "*",
+            "rows": len(typed),
+            "raw_bytes": raw_bytes,
+            "typed_bytes": int(typed.memory_usage(deep=True).sum()),
+            "columns": typed.memory_usage(deep=True, index=False).to_dict(),
+            "timestamp": time.time(),
+        }
+    return typed
+
+
+def editable_frame(df):
+    """
+    Cópia com as colunas categóricas como object, para o st.data_editor: uma
+    categoria não aceita valores novos digitados pelo usuário.
+    """
+    categorical = [column for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)]
+    return df.astype({column: object for column in categorical})
+
+
+def get_memory_reports():
+    """Uso de memória da última carga de cada quadro (função, usuário, projeção)."""
+    with _lock:
+        return list(_memory_reports.values())
@@ -0,0 +1,151 @@
+"""
+Cache compartilhado em disco entre os processos do servidor no mesmo host.
+
+Opcional: ativado por CONCRENTAL_SHARED_CACHE_DIR (ex.: /var/cache/concrental) e
+requer o pyarrow (já instalado com o Streamlit).
+
+    frames/     quadros dos carregadores em Arrow IPC, lidos com memory map. Cada
+                arquivo guarda também o horário do banco da leitura (synced_at),
+                então um processo que o carrega só precisa sincronizar o delta
+                (ver table_cache.py).
+    lookups.db  SQLite (WAL) com resultados de geocodificação e rotas, em JSON.
+
+Gravações são atômicas (arquivo temporário + os.replace). Falhas de leitura ou
+gravação são registradas no log e tratadas como ausência no cache.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+try:
+    import pyarrow as pa
+    from pyarrow import ipc
+except ImportError:  # o cache compartilhado fica desativado
+    pa = ipc = None
+
+logger = logging.getLogger("concrental.shared_cache")
+
+CACHE_DIR = os.environ.get("CONCRENTAL_SHARED_CACHE_DIR")
+_SYNCED_AT_KEY = b"concrental_synced_at"
+_local = threading.local()
+
+
+def enabled():
+    return bool(CACHE_DIR) and pa is not None
+
+
+# --- Quadros ---
+def _frame_path(name, user_id, columns):
+    projection = ",".join(columns) if columns is not None else "*"
+    digest = hashlib.sha1(projection.encode()).hexdigest()[:12]
+    return os.path.join(CACHE_DIR, "frames", f"{name}_{user_id}_{digest}.arrow")
+
+
+def load_frame(name, user_id, columns=None):
+    """Retorna (quadro, synced_at) do disco ou None."""
+    if not enabled():
+        return None
+    path = _frame_path(name, user_id, columns)
+    if not os.path.exists(path):
+        return None
+    try:
+        with pa.memory_map(path) as source:
+            table = ipc.open_file(source).read_all()
+            frame = table.to_pandas()
+        synced_at = datetime.fromisoformat(table.schema.metadata[_SYNCED_AT_KEY].decode())
+        return frame, synced_at
+    except (OSError, KeyError, ValueError, pa.ArrowException) as e:
+        logger.warning("Falha ao ler %s do cache compartilhado: %s", path, e)
+        return None
+
+
+def save_frame(name, user_id, columns, frame, synced_at):
+    if not enabled():
+        return
+    path = _frame_path(name, user_id, columns)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[_SYNCED_AT_KEY] = synced_at.isoformat().encode()
+        table = table.replace_schema_metadata(metadata)
+        with pa.OSFile(tmp_path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+    except (OSError, pa.ArrowException) as e:
+        logger.warning("Falha ao gravar %s no cache compartilhado: %s", path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def clear_frames(name):
+    """Remove os quadros de um carregador (para medições com cache frio)."""
+    if not enabled():
+        return
+    directory = os.path.join(CACHE_DIR, "frames")
+    if os.path.isdir(directory):
+        for filename in os.listdir(directory):
+            if filename.startswith(f"{name}_"):
+                os.remove(os.path.join(directory, filename))
+
+
+# --- Consultas externas (geocodificação, rotas) ---
+def _lookup_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(CACHE_DIR, "lookups.db"), timeout=10)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS lookups (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        _local.conn = conn
+    return conn
+
+
+_memory_lookups = {}
+_memory_lock = threading.Lock()
+
+
+def get_lookup(namespace, key, max_age=None):
+    """Valor guardado para (namespace, key), ou None. `max_age` em segundos."""
+    if not enabled():
+        with _memory_lock:
+            stored = _memory_lookups.get((namespace, key))
+    else:
+        try:
+            stored = _lookup_connection().execute(
+                "SELECT value, created_at FROM lookups WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Falha ao ler o cache de %s: %s", namespace, e)
+            return None
+        stored = (json.loads(stored[0]), stored[1]) if stored else None
+    if stored is None or (max_age is not None and time.time() - stored[1] > max_age):
+        return None
+    return stored[0]
+
+
+def set_lookup(namespace, key, value):
+    if not enabled():
+        with _memory_lock:
+            _memory_lookups[(namespace, key)] = (value, time.time())
+        return
+    try:
+        conn = _lookup_connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO lookups (namespace, key, value, created_at) VALUES (?, ?, ?, ?)",
+                         (namespace, key, json.dumps(value), time.time()))
+    except sqlite3.Error as e:
+        logger.warning("Falha ao gravar o cache de %s: %s", namespace, e)
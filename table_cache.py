@@ -0,0 +1,150 @@
+"""
+Cache dos quadros por usuário com sincronização incremental.
+
+Substitui o st.cache_data nos carregadores de equipamentos, clientes e aluguéis.
+Cada entrada (usuário, projeção) guarda o quadro tipado e o horário do banco da
+última leitura. Depois de uma escrita, as entradas ficam desatualizadas e a
+próxima leitura busca apenas as linhas com updated_at posterior a esse horário
+e os IDs registrados em deleted_rows, e os combina com o quadro em cache. O custo
+passa a ser proporcional à atividade recente, e não ao histórico do usuário.
+
+A janela SYNC_OVERLAP cobre transações que gravaram updated_at antes da última
+leitura mas só confirmaram depois dela. Entradas mais antigas que FULL_SYNC_AFTER
+são recarregadas por completo.
+
+Com o cache compartilhado em disco ativo (shared_cache.py), uma entrada ausente no
+processo parte do quadro gravado por outro processo e sincroniza apenas o delta.
+"""
+import functools
+import threading
+from datetime import timedelta
+
+import pandas as pd
+
+import shared_cache
+from schemas import apply_schema, typed_frame
+
+SYNC_OVERLAP = timedelta(seconds=60)
+FULL_SYNC_AFTER = timedelta(hours=24)
+
+
+class _Entry:
+    def __init__(self, frame, synced_at, generation):
+        self.frame = frame
+        self.synced_at = synced_at
+        self.generation = generation
+
+
+class TableCache:
+    """
+    Cache de um carregador. `fetch(user_id, columns, since)` retorna
+    (quadro, ids_excluidos, lido_em), como Repository.sync_frame, ou None sem conexão.
+    """
+
+    def __init__(self, fetch, key, schema, sort_by, ascending=True):
+        self.fetch = fetch
+        self.name = fetch.__name__
+        self.key = key
+        self.schema = schema
+        self.sort_by = sort_by
+        self.ascending = ascending
+        self._entries = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._user_generations = {}
+
+    def _entry_lock(self, cache_key):
+        with self._lock:
+            return self._locks.setdefault(cache_key, threading.Lock())
+
+    def _current_generation(self, user_id):
+        with self._lock:
+            return self._generation, self._user_generations.get(str(user_id), 0)
+
+    def _fetch_columns(self, columns):
+        # A chave e a coluna de ordenação são necessárias para combinar o delta.
+        if columns is None:
+            return None
+        return tuple(dict.fromkeys(tuple(columns) + (self.key, self.sort_by)))
+
+    def get(self, user_id, columns=None):
+        # O mesmo usuário chega como int, numpy.int64 ou str (notificações); a chave
+        # segue a de mark_stale.
+        cache_key = (str(user_id), tuple(columns) if columns is not None else None)
+        with self._entry_lock(cache_key):
+            entry = self._entries.get(cache_key)
+            generation = self._current_generation(user_id)
+            if entry is not None and entry.generation == generation:
+                return entry.frame.copy()
+            if entry is None:
+                snapshot = shared_cache.load_frame(self.name, user_id, columns)
+                if snapshot is not None:
+                    entry = _Entry(snapshot[0], snapshot[1], None)
+            fetch_columns = self._fetch_columns(columns)
+            if entry is None or self._expired(entry):
+                result = self.fetch(user_id, fetch_columns, None)
+                if result is None:
+                    return pd.DataFrame()
+                frame, _, synced_at = result
+                frame = typed_frame(self.name, user_id, frame, self.schema, columns)
+            else:
+                result = self.fetch(user_id, fetch_columns, entry.synced_at - SYNC_OVERLAP)
+                if result is None:
+                    return entry.frame.copy()
+                changed, deleted, synced_at = result
+                frame = self._merge(entry.frame, apply_schema(changed, self.schema), deleted)
+            if entry is None or frame is not entry.frame:
+                shared_cache.save_frame(self.name, user_id, columns, frame, synced_at)
+            self._entries[cache_key] = _Entry(frame, synced_at, generation)
+            return frame.copy()
+
+    def _expired(self, entry):
+        synced_at = pd.Timestamp(entry.synced_at)
+        if synced_at.tzinfo is None:  # SQLite: horário UTC sem fuso
+            synced_at = synced_at.tz_localize("UTC")
+        return pd.Timestamp.now(tz="UTC") - synced_at > FULL_SYNC_AFTER
+
+    def _merge(self, cached, changed, deleted):
+        if changed.empty and not deleted:
+            return cached
+        removed = set(deleted) | set(changed[self.key])
+        merged = pd.concat([cached[~cached[self.key].isin(removed)], changed], ignore_index=True)
+        # Categorias diferentes entre o cache e o delta viram object no concat.
+        categorical = [column for column, dtype in self.schema.items()
+                       if dtype == "category" and column in merged.columns and merged[column].dtype != "category"]
+        if categorical:
+            merged = merged.astype({column: "category" for column in categorical})
+        return merged.sort_values(self.sort_by, ascending=self.ascending, kind="stable", ignore_index=True)
+
+    def mark_stale(self, user_id=None):
+        """Marca as entradas do usuário (ou todas) para sincronização na próxima leitura."""
+        with self._lock:
+            if user_id is None:
+                self._generation += 1
+            else:
+                key = str(user_id)
+                self._user_generations[key] = self._user_generations.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+        shared_cache.clear_frames(self.name)
+
+
+def table_cache(key, schema, sort_by, ascending=True):
+    """
+    Decorador dos carregadores: a função decorada recebe (user_id, columns) e
+    expõe .clear() e .mark_stale(), como as funções de st.cache_data.
+    """
+    def decorator(fetch):
+        cache = TableCache(fetch, key, schema, sort_by, ascending)
+
+        @functools.wraps(fetch)
+        def wrapper(user_id, columns=None):
+            return cache.get(user_id, columns)
+        wrapper.clear = cache.clear
+        wrapper.mark_stale = cache.mark_stale
+        return wrapper
+    return decorator
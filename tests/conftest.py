@@ -0,0 +1,93 @@
+"""
+Fixtures dos testes que usam o banco (ver test_repository.py): `repo` roda cada
+teste no SQLite e, com CONCRENTAL_TEST_DATABASE_URL, também no Postgres.
+"""
+import os
+import uuid
+
+import pytest
+
+import migrate
+from repository import create_repository
+
+TEST_DATABASE_URL = os.environ.get("CONCRENTAL_TEST_DATABASE_URL")
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def repo(request, monkeypatch, tmp_path):
+    backend = request.param
+    monkeypatch.setenv("CONCRENTAL_DB_BACKEND", backend)
+    if backend == "sqlite":
+        monkeypatch.setenv("CONCRENTAL_SQLITE_PATH", str(tmp_path / "concrental.db"))
+    elif TEST_DATABASE_URL:
+        monkeypatch.setenv("DATABASE_URL", TEST_DATABASE_URL)
+    else:
+        pytest.skip("CONCRENTAL_TEST_DATABASE_URL não definida")
+    repo = create_repository()
+    migrate.ensure_migrations_table(repo)
+    migrate.apply_migrations(repo)
+    yield repo
+    repo.conn.rollback()
+    repo.close()
+
+
+@pytest.fixture
+def user_id(repo):
+    """Usuário do teste; no Postgres, as linhas dele são apagadas ao final."""
+    user_id = _create_user(repo)
+    yield user_id
+    _delete_user(repo, user_id)
+
+
+@pytest.fixture
+def other_user_id(repo):
+    user_id = _create_user(repo)
+    yield user_id
+    _delete_user(repo, user_id)
+
+
+def _create_user(repo):
+    username = f"teste_{uuid.uuid4().hex[:12]}"
+    with repo.transaction() as cursor:
+        repo.execute(cursor, "INSERT INTO users (username, password_hash) VALUES (%s, %s)", (username, "x"))
+    return repo.get_user_id(username)
+
+
+def _delete_user(repo, user_id):
+    repo.conn.rollback()
+    # deleted_rows por último: as exclusões das outras tabelas o preenchem (migração 0004).
+    tables = sorted(_user_tables(repo), key=lambda table: table == "deleted_rows")
+    with repo.transaction() as cursor:
+        for table in tables:
+            repo.execute(cursor, f"DELETE FROM {table} WHERE user_id = %s", (user_id,))
+        repo.execute(cursor, "DELETE FROM users WHERE id = %s", (user_id,))
+
+
+def _user_tables(repo):
+    """Tabelas com a coluna user_id, cada uma antes das tabelas que ela referencia."""
+    if repo.dialect == "postgres":
+        tables = """
+            SELECT c.relname FROM pg_class c JOIN pg_attribute a ON a.attrelid = c.oid
+            WHERE a.attname = 'user_id' AND c.relkind IN ('r', 'p') AND NOT c.relispartition
+              AND c.relnamespace = current_schema()::regnamespace
+        """
+        references = "SELECT conrelid::regclass::text, confrelid::regclass::text FROM pg_constraint WHERE contype = 'f'"
+    else:
+        tables = """
+            SELECT m.name FROM sqlite_master m JOIN pragma_table_info(m.name) c
+            WHERE m.type = 'table' AND c.name = 'user_id'
+        """
+        references = 'SELECT m.name, f."table" FROM sqlite_master m JOIN pragma_foreign_key_list(m.name) f'
+    with repo.cursor() as cursor:
+        repo.execute(cursor, tables)
+        pending = {row[0] for row in cursor.fetchall()}
+        repo.execute(cursor, references)
+        edges = [(table, referenced) for table, referenced in cursor.fetchall() if table != referenced]
+    ordered = []
+    while pending:
+        free = sorted(table for table in pending
+                      if not any(referenced == table and source in pending for source, referenced in edges))
+        assert free, f"referências circulares entre {sorted(pending)}"
+        ordered += free
+        pending -= set(free)
+    return ordered
@@ -0,0 +1,55 @@
+"""
+Testes da detecção de clientes duplicados com linhas como as do cadastro: todo
+cliente tem documento (obrigatório no CRM e na importação, e único no banco).
+"""
+import pandas as pd
+import pytest
+
+from duplicates import CUSTOMER_COLUMNS, DOCUMENT_PENALTY, find_duplicates
+
+CUSTOMERS = [
+    ("CUST001", "Maria Aparecida da Silva", "(11) 98888-1234", "maria.silva@email.com", "52998224725"),
+    # Recadastro: nome com erro de digitação, outro CPF, mesmo telefone sem máscara.
+    ("CUST002", "Maria Aparecida da Sliva", "11988881234", None, "11144477735"),
+    ("CUST003", "José Carlos Pereira", "(21) 97777-0000", None, "123.456.789-09"),
+    # Mesmo CPF com outra formatação e o nome da empresa.
+    ("CUST004", "JC Pereira Construções", "(21) 3333-4444", None, "12345678909"),
+    ("CUST005", "Ana Beatriz Souza", "(31) 96666-1111", "ana@email.com", "39053344705"),
+    # Recadastro sem contato em comum: só o nome parecido.
+    ("CUST006", "Ana Beatriz Sousa", "(31) 95555-2222", None, "07068093868"),
+    ("CUST007", "Pedro Henrique Lima", "(41) 94444-3333", None, "28625587887"),
+]
+
+
+@pytest.fixture
+def customers():
+    return pd.DataFrame(CUSTOMERS, columns=list(CUSTOMER_COLUMNS))
+
+
+def _pairs(duplicates):
+    return dict(zip(zip(duplicates["customer_id"], duplicates["duplicate_id"]),
+                    zip(duplicates["score"], duplicates["reasons"])))
+
+
+def test_re_registration_with_another_document_is_reported(customers):
+    pairs = _pairs(find_duplicates(customers))
+    assert "telefone" in pairs[("CUST001", "CUST002")][1]
+    assert ("CUST005", "CUST006") in pairs
+
+
+def test_same_document_is_reported(customers):
+    pairs = _pairs(find_duplicates(customers))
+    assert "documento" in pairs[("CUST003", "CUST004")][1]
+
+
+def test_different_people_are_not_reported(customers):
+    customers.loc[len(customers)] = ("CUST008", "Paulo Roberto Lima", "(41) 93333-4444", None, "46201767029")
+    pairs = _pairs(find_duplicates(customers))
+    assert set(pairs) == {("CUST001", "CUST002"), ("CUST003", "CUST004"), ("CUST005", "CUST006")}
+
+
+def test_different_documents_lower_the_score(customers):
+    score = _pairs(find_duplicates(customers))[("CUST005", "CUST006")][0]
+    customers.loc[customers["customer_id"] == "CUST006", "document_number"] = None
+    unpenalized = _pairs(find_duplicates(customers))[("CUST005", "CUST006")][0]
+    assert score == pytest.approx(unpenalized - DOCUMENT_PENALTY, abs=0.001)
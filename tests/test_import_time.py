@@ -0,0 +1,18 @@
+"""
+Orçamento de tempo de import das páginas (benchmarks/import_time.py): cada página
+importa dentro de BUDGET_MS e não carrega nenhum módulo de LAZY_MODULES.
+"""
+import pytest
+
+from benchmarks.import_time import BUDGET_MS, PAGES, measure, page_imports
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_page_import_time(page):
+    try:
+        page_imports(page)
+    except SyntaxError as e:
+        pytest.skip(f"{page} não compila nesta versão do Python: {e.msg}")
+    result = measure(page, repeat=3)
+    assert result["lazy_loaded"] == []
+    assert result["median_ms"] <= BUDGET_MS
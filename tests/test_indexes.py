@@ -0,0 +1,14 @@
+"""
+Os comandos quentes do Repository usam índice (migrate.py check-indexes). Só no
+Postgres: o EXPLAIN roda com o seq scan desabilitado, então o resultado não
+depende do volume de dados do banco de teste.
+"""
+import pytest
+
+import migrate
+
+
+def test_hot_queries_use_indexes(repo):
+    if repo.dialect != "postgres":
+        pytest.skip("check-indexes usa o EXPLAIN do Postgres")
+    assert migrate.check_indexes(repo) == []
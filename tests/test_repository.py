@@ -0,0 +1,252 @@
+"""
+Testes do Repository nos dois backends (CONCRENTAL_DB_BACKEND).
+
+O SQLite roda sempre, em um arquivo temporário com as migrações aplicadas. O
+Postgres roda quando CONCRENTAL_TEST_DATABASE_URL aponta para um banco de teste:
+as migrações pendentes são aplicadas, e cada teste cria o seu usuário e apaga as
+linhas dele ao final.
+
+    CONCRENTAL_TEST_DATABASE_URL=postgresql://localhost/concrental_test python -m pytest
+"""
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from repository import create_repository
+
+
+def _unique(prefix):
+    return f"{prefix}-{uuid.uuid4().hex[:10]}"
+
+
+def _add_equipment(repo, user_id, name="Betoneira 400L"):
+    return repo.add_equipment(user_id, name, "Betoneiras", _unique("SN"), date(2024, 1, 10), "Quitado")
+
+
+def _add_customer(repo, user_id, name="Maria Silva"):
+    return repo.add_customer(user_id, name, None, "11999990000", None, "Rua A, 10", "CPF", _unique("DOC"))
+
+
+def test_equipment_crud(repo, user_id):
+    equipment_id = _add_equipment(repo, user_id)
+    equipments = repo.list_equipments(user_id)
+    assert equipments["equipment_id"].tolist() == [equipment_id]
+    assert equipments.loc[0, "status"] == "Disponível"
+
+    repo.update_equipment(user_id, equipment_id, {"status": "Em Manutenção", "category": "Mistura"})
+    equipments = repo.list_equipments(user_id, ("equipment_id", "status", "category"))
+    assert list(equipments.columns) == ["equipment_id", "status", "category"]
+    assert equipments.loc[0, ["status", "category"]].tolist() == ["Em Manutenção", "Mistura"]
+
+    repo.delete_equipment(user_id, equipment_id)
+    assert repo.list_equipments(user_id).empty
+
+
+def test_customer_crud(repo, user_id):
+    customer_id = _add_customer(repo, user_id)
+    repo.update_customer(user_id, customer_id, {"full_name": "Maria Souza"})
+    customers = repo.list_customers(user_id, ("customer_id", "full_name"))
+    assert customers.values.tolist() == [[customer_id, "Maria Souza"]]
+
+    repo.delete_customer(user_id, customer_id)
+    assert repo.list_customers(user_id).empty
+
+
+def test_changes_are_scoped_to_the_user(repo, user_id):
+    equipment_id = _add_equipment(repo, user_id)
+    other_user = user_id + 1_000_000
+    repo.update_equipment(other_user, equipment_id, {"status": "Em Manutenção"})
+    repo.delete_equipment(other_user, equipment_id)
+    equipments = repo.list_equipments(user_id)
+    assert equipments["status"].tolist() == ["Disponível"]
+    assert repo.list_equipments(other_user).empty
+
+
+def test_shared_repository_keeps_concurrent_writes(repo, user_id):
+    # O repositório do app é compartilhado pelas sessões: a transação de uma thread
+    # não pode ser desfeita nem confirmada pela outra.
+    errors = []
+
+    def write():
+        try:
+            for _ in range(25):
+                _add_equipment(repo, user_id)
+                repo.list_equipments(user_id, ("equipment_id",))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(repo.list_equipments(user_id)) == 50
+
+
+def test_rentals_and_equipment_status(repo, user_id):
+    equipment_id = _add_equipment(repo, user_id)
+    customer_id = _add_customer(repo, user_id)
+    today = date.today()
+
+    (rental_id,) = repo.add_rentals(user_id, customer_id, [equipment_id], today, today + timedelta(days=5), 250.0)
+    rentals = repo.list_rentals(user_id, ("rental_id", "customer_id", "equipment_id", "status", "valor"))
+    assert rentals.values.tolist() == [[rental_id, customer_id, equipment_id, "Ativo", 250.0]]
+    equipment = repo.list_equipments(user_id).iloc[0]
+    assert (equipment["status"], equipment["times_rented"]) == ("Alugado", 1)
+
+    repo.update_rental(user_id, rental_id, "payment_status", "Pix")
+    repo.complete_rental(user_id, rental_id, equipment_id)
+    rental = repo.list_rentals(user_id).iloc[0]
+    assert (rental["status"], rental["payment_status"]) == ("Concluído", "Pix")
+    assert repo.list_equipments(user_id).loc[0, "status"] == "Disponível"
+
+
+def test_overlapping_rental_is_rejected(repo, user_id):
+    first, second = _add_equipment(repo, user_id), _add_equipment(repo, user_id, "Andaime")
+    customer_id = _add_customer(repo, user_id)
+    start = date(2030, 3, 1)
+    repo.add_rentals(user_id, customer_id, [first], start, start + timedelta(days=9), 100.0)
+
+    # Todos ou nenhum: o equipamento livre também não é reservado.
+    with pytest.raises(repo.IntegrityError):
+        repo.add_rentals(user_id, customer_id, [second, first], start + timedelta(days=9),
+                         start + timedelta(days=12), 100.0)
+    assert repo.list_rentals(user_id)["equipment_id"].tolist() == [first]
+
+    # Períodos fechados: começa no dia seguinte ao fim, sem sobreposição.
+    repo.add_rentals(user_id, customer_id, [first], start + timedelta(days=10), start + timedelta(days=12), 100.0)
+    assert len(repo.list_rentals(user_id)) == 2
+
+
+def test_completed_rental_frees_the_period(repo, user_id):
+    equipment_id = _add_equipment(repo, user_id)
+    customer_id = _add_customer(repo, user_id)
+    start = date(2030, 3, 1)
+    (rental_id,) = repo.add_rentals(user_id, customer_id, [equipment_id], start, start + timedelta(days=9), 100.0)
+    repo.complete_rental(user_id, rental_id, equipment_id)
+    repo.add_rentals(user_id, customer_id, [equipment_id], start, start + timedelta(days=9), 100.0)
+    assert sorted(repo.list_rentals(user_id)["status"]) == ["Ativo", "Concluído"]
+
+
+def test_archive_rentals_moves_paid_completed_rentals(repo, user_id):
+    customer_id = _add_customer(repo, user_id)
+    first, second = _add_equipment(repo, user_id), _add_equipment(repo, user_id, "Andaime")
+    paid, unpaid = repo.add_rentals(user_id, customer_id, [first, second], date(2020, 3, 1), date(2020, 3, 5), 100.0)
+    repo.complete_rental(user_id, paid, first)
+    repo.complete_rental(user_id, unpaid, second)
+    repo.update_rental(user_id, paid, "payment_status", "Pix")
+
+    # Concluídos, mas em aberto no pagamento, continuam no A Receber.
+    assert repo.archive_rentals(date(2021, 1, 1), user_id) == 1
+    assert repo.list_rentals(user_id)["rental_id"].tolist() == [unpaid]
+    archived = repo.list_archived_rentals(user_id, ("rental_id", "status", "payment_status"))
+    assert archived.values.tolist() == [[paid, "Concluído", "Pix"]]
+
+
+def test_merge_customers_moves_rentals_and_fills_missing_data(repo, user_id):
+    keep_id = _add_customer(repo, user_id)
+    duplicate_id = repo.add_customer(user_id, "Maria da Silva", None, "11999990000", "maria@email.com", "Rua A, 10",
+                                     "CPF", _unique("DOC"))
+    equipment_id = _add_equipment(repo, user_id)
+    (rental_id,) = repo.add_rentals(user_id, duplicate_id, [equipment_id], date(2030, 3, 1), date(2030, 3, 5), 100.0)
+    repo.replace_customer_duplicates(user_id, pd.DataFrame(
+        {"customer_id": [keep_id], "duplicate_id": [duplicate_id], "score": [0.9], "reasons": ["telefone"]}))
+
+    assert repo.merge_customers(user_id, keep_id, duplicate_id) == 1
+    customers = repo.list_customers(user_id, ("customer_id", "email_address"))
+    assert customers.values.tolist() == [[keep_id, "maria@email.com"]]
+    assert repo.list_rentals(user_id, ("rental_id", "customer_id")).values.tolist() == [[rental_id, keep_id]]
+    assert repo.list_customer_duplicates(user_id).empty
+    with pytest.raises(ValueError):
+        repo.merge_customers(user_id, keep_id, duplicate_id)
+
+
+def test_claim_job_takes_each_due_job_once(repo, user_id):
+    # Antes de qualquer job real da fila: só os deste teste estão vencidos.
+    now = datetime(2000, 1, 1)
+    first = repo.enqueue_job(user_id, "teste", "{}", 3, now)
+    later = repo.enqueue_job(user_id, "teste", "{}", 3, now + timedelta(hours=1))
+
+    assert tuple(repo.claim_job(now)) == (first, user_id, "teste", "{}", 1, 3)
+    assert repo.claim_job(now) is None
+    assert repo.claim_job(now + timedelta(hours=1))[0] == later
+    assert repo.get_job(user_id, first)[2] == "Executando"
+
+
+def test_rental_ids_are_unique_across_users(repo, user_id, other_user_id):
+    # A chave de rentals inclui o user_id (Postgres, migração 0010): o RENTnnn vem
+    # de um contador global, e os alertas de um usuário não apagam os do outro.
+    today = date.today()
+    rental_ids = {}
+    for owner in (user_id, other_user_id):
+        equipment_id, customer_id = _add_equipment(repo, owner), _add_customer(repo, owner)
+        rental_ids[owner] = repo.add_rentals(owner, customer_id, [equipment_id], today - timedelta(days=5),
+                                             today - timedelta(days=1), 100.0)
+    assert set(rental_ids[user_id]).isdisjoint(rental_ids[other_user_id])
+
+    for owner in (user_id, other_user_id):
+        repo.refresh_rental_alerts(today, today + timedelta(days=7), rental_ids[owner], owner)
+    for owner in (user_id, other_user_id):
+        alerts = repo.list_rental_alerts(owner)
+        assert alerts[["rental_id", "kind"]].values.tolist() == [[rental_ids[owner][0], "Atrasado"]]
+
+
+def test_rental_numbers_reserved_by_another_session(repo, user_id):
+    if repo.dialect != "postgres":
+        pytest.skip("no SQLite a outra conexão esperaria pela trava de escrita")
+    equipment_id, customer_id = _add_equipment(repo, user_id), _add_customer(repo, user_id)
+    other = create_repository()
+    try:
+        # Transação ainda aberta em outra sessão: o MAX + 1 não veria esses números.
+        with other.transaction() as cursor:
+            reserved = other.next_rental_numbers(cursor, 2)
+            (rental_id,) = repo.add_rentals(user_id, customer_id, [equipment_id], date(2030, 3, 1),
+                                            date(2030, 3, 5), 100.0)
+    finally:
+        other.close()
+    assert int(rental_id[4:]) not in reserved
+
+
+@pytest.mark.parametrize("table", ["equipments", "customers", "rentals"])
+def test_sync_frame_returns_changes_and_deletions(repo, user_id, table):
+    customer_id = _add_customer(repo, user_id)
+    kept, removed = _add_equipment(repo, user_id), _add_equipment(repo, user_id, "Andaime")
+    rentals = repo.add_rentals(user_id, customer_id, [kept, removed], date(2030, 3, 1), date(2030, 3, 5), 100.0)
+    ids = {"equipments": (kept, removed), "rentals": tuple(rentals)}
+    if table == "customers":
+        ids[table] = (customer_id, _add_customer(repo, user_id, "João Souza"))
+    changed_id, deleted_id = ids[table]
+    id_column = {"equipments": "equipment_id", "customers": "customer_id", "rentals": "rental_id"}[table]
+
+    frame, deleted, synced_at = repo.sync_frame(table, user_id)
+    assert sorted(frame[id_column]) == sorted(ids[table])
+    assert deleted == []
+
+    with repo.transaction() as cursor:
+        if table == "rentals":
+            repo.execute(cursor, "UPDATE rentals SET valor = %s WHERE user_id = %s AND rental_id = %s",
+                         (180.0, user_id, changed_id))
+            repo.execute(cursor, "DELETE FROM rentals WHERE user_id = %s AND rental_id = %s", (user_id, deleted_id))
+        elif table == "equipments":
+            repo.execute(cursor, "DELETE FROM rentals WHERE user_id = %s", (user_id,))
+            repo.execute(cursor, "UPDATE equipments SET category = %s WHERE user_id = %s AND equipment_id = %s",
+                         ("Mistura", user_id, changed_id))
+            repo.execute(cursor, "DELETE FROM equipments WHERE user_id = %s AND equipment_id = %s",
+                         (user_id, deleted_id))
+        else:
+            repo.execute(cursor, "UPDATE customers SET full_name = %s WHERE user_id = %s AND customer_id = %s",
+                         ("Maria Souza", user_id, changed_id))
+            repo.execute(cursor, "DELETE FROM customers WHERE user_id = %s AND customer_id = %s",
+                         (user_id, deleted_id))
+
+    # O delta pode repetir linhas gravadas no mesmo instante da leitura anterior
+    # (TableCache já relê uma janela, SYNC_OVERLAP); a linha alterada tem de vir.
+    frame, deleted, next_synced_at = repo.sync_frame(table, user_id, since=synced_at)
+    assert changed_id in frame[id_column].tolist()
+    assert deleted_id not in frame[id_column].tolist()
+    assert deleted == [deleted_id]
+    assert next_synced_at >= synced_at